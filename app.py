@@ -5,13 +5,15 @@ import pandas as pd
 import altair as alt
 from io import BytesIO
 
-from recommender_core import (
-    load_data, load_ml_assets, calculate_station_similarity,
+from recommender_streamlit import (
+    load_data_compact, load_ml_assets, calculate_station_similarity_incremental,
+    calculate_similarity_tensor, load_station_neighbor_index,
+    load_station_list, load_station_data, data_version, build_station_latest_index, KOLOM_KESAMAAN,
     get_hybrid_recommendation, get_actual_recommendation,
     highlight_historical_recommendation,
-    get_historical_pejabat_recommendation
+    compute_historical_recommendations, compute_dashboard_kpis
 )
-from config import STATION_COL_NAME, normalize_station
+from instrumentation import stage, timed, flush as flush_metrics, start_from_env as start_metrics_server
 
 
 # =========================================================
@@ -27,6 +29,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentasi (aktif hanya bila ATMOSFERA_METRICS=1); rerun yang dihentikan st.stop() tidak tercatat
+start_metrics_server()
+timer_rerun = stage("app.rerun")
+
 # =========================================================
 # STATE + THEME TOKENS
 # =========================================================
@@ -323,6 +329,7 @@ def render_action_box(text, level="ok"):
     cls = {"ok":"action-ok", "warn":"action-warn", "bad":"action-bad"}.get(level,"action-ok")
     st.markdown(f'<div class="action-box {cls}">{text}</div>', unsafe_allow_html=True)
 
+@timed("app.generate_pdf_report")
 def generate_pdf_report(df: pd.DataFrame, title="Laporan Atmosfera-X"):
     buffer = BytesIO()
     try:
@@ -405,17 +412,16 @@ inject_css(t)
 # =========================================================
 # LOAD DATA & ASSETS
 # =========================================================
-df_full = load_data()
-scaler, cbf_model, fitur_list = load_ml_assets()
+# Data dimuat per halaman: daftar stasiun dari manifest partisi, tanpa membaca data
+with stage("app.muat_aset"):
+    versi_data = data_version()
+    scaler, cbf_model, fitur_list = load_ml_assets()
+    all_stations_clean = load_station_list(versi_data)
 
-if df_full.empty:
+if not all_stations_clean:
     st.error("Gagal memuat data. Pastikan file CSV dan model ada.")
     st.stop()
 
-sim_df = calculate_station_similarity(df_full)
-df_full["stasiun_normal"] = df_full[STATION_COL_NAME].astype(str).apply(normalize_station)
-all_stations_clean = sorted(df_full["stasiun_normal"].unique().tolist())
-
 # =========================================================
 # TOPBAR
 # =========================================================
@@ -491,32 +497,33 @@ def display_usage_guide():
     st.markdown('</div>', unsafe_allow_html=True)
 
 page = st.session_state.page
+timer_halaman = stage("app.page." + page.lower().replace(" ", "_"))
 
 if page == "Cara Penggunaan":
     display_usage_guide()
 
 elif page == "Dashboard KPI Historis":
     st.header("📊 Dashboard KPI Historis")
+    # Dashboard butuh seluruh stasiun: semua partisi dibaca paralel
+    df_full = load_data_compact(versi_data=versi_data)
+    if df_full.empty:
+        st.error("Gagal memuat data. Pastikan file CSV dan model ada.")
+        st.stop()
 
     st.markdown('<div class="card">', unsafe_allow_html=True)
     all_years = sorted(df_full["tanggal_lengkap"].dt.year.unique())
     selected_years = st.multiselect("Filter Tahun", options=all_years, default=all_years)
     st.markdown('</div>', unsafe_allow_html=True)
 
-    df_filtered = df_full[df_full["tanggal_lengkap"].dt.year.isin(selected_years)].copy()
-    if df_filtered.empty:
+    kpi = compute_dashboard_kpis(df_full, selected_years)
+    if kpi["df_filtered"].empty:
         st.warning("Tidak ada data untuk tahun yang dipilih.")
         st.stop()
 
-    df_filtered["Bulan_Tahun"] = df_filtered["tanggal_lengkap"].dt.strftime("%Y-%m")
-    kpi_monthly = df_filtered.groupby("Bulan_Tahun")["pm25"].mean().reset_index()
-
-    worst_station = (
-        df_filtered[df_filtered["kategori"] == "TIDAK SEHAT"]["stasiun_normal"]
-        .mode().iloc[0] if not df_filtered.empty else "N/A"
-    )
-    global_pm25 = df_filtered["pm25"].mean()
-    sehat_ratio = (df_filtered["kategori"].str.contains("SEHAT|BAIK", case=False).mean() * 100)
+    kpi_monthly = kpi["kpi_monthly"]
+    worst_station = kpi["worst_station"]
+    global_pm25 = kpi["global_pm25"]
+    sehat_ratio = kpi["sehat_ratio"]
 
     k1, k2, k3, k4 = st.columns(4)
     with k1:
@@ -563,8 +570,10 @@ elif page == "Dashboard KPI Historis":
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Log Rekomendasi Historis (100 Data Terbaru)")
 
-    df_full["Rekomendasi_Aktual_Masyarakat"] = df_full["kategori"].apply(get_actual_recommendation)
-    df_full["Rekomendasi_Kebijakan_Pejabat"] = df_full.apply(get_historical_pejabat_recommendation, axis=1)
+    # Kolom rekomendasi dihitung vektor sekali per versi dataset (rerun halaman hanya membaca cache)
+    df_rekomendasi = compute_historical_recommendations(df_full, versi_data)
+    df_full["Rekomendasi_Aktual_Masyarakat"] = df_rekomendasi["Rekomendasi_Aktual_Masyarakat"]
+    df_full["Rekomendasi_Kebijakan_Pejabat"] = df_rekomendasi["Rekomendasi_Kebijakan_Pejabat"]
 
     df_tracking = (
         df_full[[
@@ -602,15 +611,13 @@ elif page == "Rekomendasi Proaktif":
     selected_station = st.selectbox("Pilih Stasiun Target", options=all_stations_clean)
     st.markdown('</div>', unsafe_allow_html=True)
 
-    df_latest_by_station = (
-        df_full[df_full["stasiun_normal"] == selected_station]
-        .sort_values("tanggal_lengkap", ascending=False)
-    )
-    if df_latest_by_station.empty:
+    # Hanya partisi stasiun terpilih yang dibaca untuk data aktual terakhir
+    df_stasiun = load_station_data((selected_station,), versi_data=versi_data)
+    latest_data_row = build_station_latest_index(df_stasiun).latest_row(selected_station)
+    if latest_data_row.empty:
         st.warning("Data tidak tersedia untuk stasiun ini.")
         st.stop()
 
-    latest_data_row = df_latest_by_station.iloc[[0]]
     tanggal_aktual = latest_data_row["tanggal_lengkap"].dt.strftime("%Y-%m-%d %H:%M:%S").iloc[0]
     kategori_aktual = latest_data_row["kategori"].iloc[0]
     pill_html = kategori_pill(kategori_aktual)
@@ -647,8 +654,15 @@ elif page == "Rekomendasi Proaktif":
             render_action_box(rekom_aktual, level="ok")
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # Kesamaan antar stasiun hanya butuh tanggal, stasiun, dan polutan dari semua partisi
+    df_kesamaan = load_data_compact(columns=KOLOM_KESAMAAN, versi_data=versi_data)
+    sim_df = calculate_station_similarity_incremental(df_kesamaan)
+    neighbor_index = load_station_neighbor_index(sim_df)
+    sim_tensor = calculate_similarity_tensor(df_kesamaan)
+
     results_prediksi = get_hybrid_recommendation(
-        latest_data_row, selected_station, sim_df, scaler, cbf_model, fitur_list
+        latest_data_row, selected_station, sim_df, scaler, cbf_model, fitur_list,
+        neighbor_index=neighbor_index, sim_tensor=sim_tensor
     )
     status_pred = results_prediksi.get("Status Prediksi (CBF)")
     rekom_pred = results_prediksi.get("Rekomendasi Tindakan Primer")
@@ -700,4 +714,9 @@ elif page == "Rekomendasi Proaktif":
     st.markdown("---")
     st.subheader("🔗 Insight (Collaborative Filtering)")
     st.caption(results_prediksi.get("Peringatan Situasional (CF)"))
+    st.caption(results_prediksi.get("Peringatan Multi-Polutan (CF)"))
     st.markdown('</div>', unsafe_allow_html=True)
+
+timer_halaman.stop()
+timer_rerun.stop()
+flush_metrics()
@@ -0,0 +1,208 @@
+# backtest.py — Backtest walk-forward model CBF (tanpa kebocoran data masa depan)
+#
+# Jalankan:   python backtest.py                               (jendela expanding, uji 90 hari per fold)
+#             python backtest.py --mode sliding --train-days 365
+#             python backtest.py --test-days 30 --gap-days 7 --workers 4
+#             python backtest.py --scaling                     (waktu total untuk 1..N worker)
+#             python backtest.py --threshold config            (threshold_config.json alih-alih 0.5)
+#
+# evaluate_cbf.py & tune_and_evaluate.py memakai train_test_split acak, sehingga baris uji diapit baris latih
+# dari hari-hari sesudahnya (fitur lag/roll saling tumpang tindih). Di sini setiap fold hanya dilatih pada
+# data SEBELUM jendela uji. Matriks fitur diambil dari eval_matrix (.npy bersama, dibangun sekali per dataset
+# + scaler) dan dibuka read-only (memmap) oleh setiap proses worker, sehingga fold berjalan paralel tanpa
+# menyalin data per fold.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+import preprocessing
+from config import read_threshold_config
+
+OUTPUT_DEFAULT = 'laporan_backtest.csv'
+TEST_HARI = 90
+MIN_LATIH_HARI = 365
+SEMUA_STASIUN = 'SEMUA'
+# threshold_config.json dituning pada seluruh data (termasuk jendela uji backtest), sehingga tidak dipakai
+# secara default: memakainya membocorkan informasi masa depan ke metrik out-of-time
+THRESHOLD_DEFAULT = 0.5
+THRESHOLD_CONFIG = 'config'
+
+
+# --- A. FOLD WALK-FORWARD ---
+def buat_folds(tanggal, test_hari=TEST_HARI, min_latih_hari=MIN_LATIH_HARI, mode='expanding',
+               latih_hari=None, gap_hari=0):
+    """Daftar fold (no, mulai_latih, mulai_uji, akhir_uji) berdasarkan kalender, bukan jumlah baris.
+
+    expanding: latih = semua data sebelum (mulai_uji - gap); sliding: hanya latih_hari terakhir sebelumnya.
+    Fold tanpa baris uji (mis. tahun tanpa data) dilewati.
+    """
+    tanggal = pd.DatetimeIndex(tanggal)
+    awal, akhir = tanggal.min().normalize(), tanggal.max().normalize()
+    if mode == 'sliding' and latih_hari is None:
+        latih_hari = min_latih_hari
+    folds = []
+    mulai_uji = awal + pd.Timedelta(days=min_latih_hari)
+    while mulai_uji <= akhir:
+        akhir_uji = mulai_uji + pd.Timedelta(days=test_hari)
+        akhir_latih = mulai_uji - pd.Timedelta(days=gap_hari)
+        mulai_latih = awal if mode == 'expanding' else akhir_latih - pd.Timedelta(days=latih_hari)
+        if ((tanggal >= mulai_uji) & (tanggal < akhir_uji)).any():
+            folds.append({'fold': len(folds), 'mulai_latih': mulai_latih, 'akhir_latih': akhir_latih,
+                          'mulai_uji': mulai_uji, 'akhir_uji': akhir_uji})
+        mulai_uji = akhir_uji
+    return folds
+
+
+# --- B. ARRAY BERSAMA (READ-ONLY MEMMAP) ---
+_DATA_WORKER = {}
+
+
+def _init_worker(paths, nama_stasiun, threshold_global, threshold_stasiun):
+    _DATA_WORKER.update({nama: np.load(path, mmap_mode='r') for nama, path in paths.items()})
+    _DATA_WORKER.update(nama_stasiun=nama_stasiun, threshold_global=threshold_global,
+                        threshold_stasiun=threshold_stasiun)
+
+
+def _metrik(y, proba, prediksi):
+    return {
+        'n_uji': len(y), 'n_positif': int(y.sum()),
+        'accuracy': accuracy_score(y, prediksi),
+        'precision': precision_score(y, prediksi, zero_division=0),
+        'recall': recall_score(y, prediksi, zero_division=0),
+        'f1': f1_score(y, prediksi, zero_division=0),
+        'roc_auc': roc_auc_score(y, proba) if 0 < y.sum() < len(y) else np.nan,
+    }
+
+
+def _jalankan_fold(fold):
+    """Latih scaler + model pada jendela latih, evaluasi jendela uji; metrik gabungan dan per stasiun."""
+    mulai = time.perf_counter()
+    X, y, tanggal, stasiun = (_DATA_WORKER[k] for k in ('X', 'y', 'tanggal', 'stasiun'))
+    ns = lambda ts: np.datetime64(ts, 'ns').astype(np.int64)
+    latih = np.flatnonzero((tanggal >= ns(fold['mulai_latih'])) & (tanggal < ns(fold['akhir_latih'])))
+    uji = np.flatnonzero((tanggal >= ns(fold['mulai_uji'])) & (tanggal < ns(fold['akhir_uji'])))
+    info = {k: fold[k] for k in ('fold', 'mulai_latih', 'akhir_latih', 'mulai_uji', 'akhir_uji')}
+    if len(latih) == 0 or y[latih].all() or not y[latih].any():
+        return [], uji[:0], np.zeros(0), np.zeros(0, dtype=bool)
+
+    scaler = StandardScaler().fit(X[latih])
+    model = preprocessing.buat_model_cbf().fit(scaler.transform(X[latih]), y[latih])
+    y_uji, stasiun_uji = np.asarray(y[uji]), np.asarray(stasiun[uji])
+    proba = model.predict_proba(scaler.transform(X[uji]))[:, 1]
+    nama = _DATA_WORKER['nama_stasiun']
+    threshold = np.array([_DATA_WORKER['threshold_stasiun'].get(nama[s], _DATA_WORKER['threshold_global'])
+                          for s in range(len(nama))])[stasiun_uji]
+    prediksi = proba >= threshold
+    durasi = time.perf_counter() - mulai
+
+    baris = [{**info, 'stasiun': SEMUA_STASIUN, 'n_latih': len(latih), 'durasi_detik': durasi,
+              **_metrik(y_uji, proba, prediksi)}]
+    for s in np.unique(stasiun_uji):
+        m = stasiun_uji == s
+        baris.append({**info, 'stasiun': nama[s], 'n_latih': int((stasiun[latih] == s).sum()),
+                      'durasi_detik': np.nan, **_metrik(y_uji[m], proba[m], prediksi[m])})
+    return baris, uji, proba, prediksi
+
+
+# --- C. BACKTEST ---
+def _siapkan_data():
+    """Matriks evaluasi bersama; X sudah terskala, tetapi scaler tetap dilatih ulang per fold dari jendela latih."""
+    from eval_matrix import open_eval_matrix
+
+    return open_eval_matrix()
+
+
+def run_backtest(test_hari=TEST_HARI, min_latih_hari=MIN_LATIH_HARI, mode='expanding', latih_hari=None,
+                 gap_hari=0, threshold=None, max_workers=None, output=OUTPUT_DEFAULT, data=None, verbose=True):
+    """Menjalankan semua fold walk-forward di process pool; mengembalikan tabel metrik per fold per stasiun.
+
+    threshold: angka, THRESHOLD_CONFIG (threshold_config.json, global + per stasiun), atau None (THRESHOLD_DEFAULT).
+    """
+    eval_data = data or _siapkan_data()
+    y, kode_stasiun, nama_stasiun = np.asarray(eval_data.y), np.asarray(eval_data.stasiun), eval_data.nama_stasiun
+    if threshold == THRESHOLD_CONFIG:
+        threshold_global, threshold_stasiun = read_threshold_config()
+    else:
+        threshold_global, threshold_stasiun = THRESHOLD_DEFAULT if threshold is None else threshold, {}
+    # Baris tanpa tanggal (NaT = int64 minimum) tidak pernah masuk jendela latih/uji mana pun
+    folds = buat_folds(pd.to_datetime(eval_data.tanggal[eval_data.tanggal != np.iinfo(np.int64).min]),
+                       test_hari, min_latih_hari, mode, latih_hari, gap_hari)
+
+    mulai = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(eval_data.paths, nama_stasiun, threshold_global, threshold_stasiun)) as executor:
+        per_fold = list(executor.map(_jalankan_fold, folds))
+    durasi = time.perf_counter() - mulai
+
+    laporan = pd.DataFrame([baris for hasil, _, _, _ in per_fold for baris in hasil])
+    if output:
+        laporan.to_csv(output, index=False)
+    if verbose:
+        # Metrik gabungan: semua prediksi out-of-time digabung sebelum dihitung (bukan rata-rata antar fold)
+        uji = np.concatenate([u for _, u, _, _ in per_fold])
+        proba = np.concatenate([p for _, _, p, _ in per_fold])
+        prediksi = np.concatenate([d for _, _, _, d in per_fold])
+        gabungan = pd.DataFrame(
+            [{'stasiun': SEMUA_STASIUN, **_metrik(y[uji], proba, prediksi)}]
+            + [{'stasiun': nama_stasiun[s], **_metrik(y[uji][m], proba[m], prediksi[m])}
+               for s in np.unique(kode_stasiun[uji]) for m in [kode_stasiun[uji] == s]])
+        _cetak_ringkasan(laporan, gabungan, mode, len(folds), durasi, output)
+    return laporan, durasi
+
+
+def _cetak_ringkasan(laporan, gabungan, mode, n_fold, durasi, output):
+    print(f"--- 🧪 BACKTEST WALK-FORWARD ({mode}, {n_fold} fold) ---")
+    kolom = ['n_uji', 'n_positif', 'precision', 'recall', 'f1', 'roc_auc']
+    semua = laporan[laporan['stasiun'] == SEMUA_STASIUN]
+    print(semua[['fold', 'mulai_uji', 'n_latih'] + kolom].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print("\nGabungan seluruh fold per stasiun:")
+    print(gabungan[['stasiun', 'accuracy'] + kolom].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    tujuan = f" -> '{output}'" if output else ""
+    print(f"\n✅ Total waktu: {durasi:.2f} detik (waktu latih+uji fold: {semua['durasi_detik'].sum():.2f} detik){tujuan}")
+
+
+def scaling_report(workers=None, **kwargs):
+    """Waktu total backtest untuk 1, 2, 4, ... worker (hingga jumlah core) pada fold yang sama."""
+    data = _siapkan_data()
+    workers = workers or sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= os.cpu_count()], os.cpu_count()})
+    baris = []
+    for n in workers:
+        _, durasi = run_backtest(max_workers=n, output=None, data=data, verbose=False, **kwargs)
+        baris.append({'workers': n, 'waktu_detik': round(durasi, 3)})
+    laporan = pd.DataFrame(baris)
+    laporan['speedup'] = (laporan['waktu_detik'].iloc[0] / laporan['waktu_detik']).round(2)
+    print(f"--- ⏱️ SKALA WORKER ({os.cpu_count()} core) ---")
+    print(laporan.to_string(index=False))
+    return laporan
+
+
+def _threshold_arg(nilai):
+    return nilai if nilai == THRESHOLD_CONFIG else float(nilai)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtest walk-forward model CBF Atmosfera-X")
+    parser.add_argument('--mode', choices=['expanding', 'sliding'], default='expanding')
+    parser.add_argument('--test-days', type=int, default=TEST_HARI)
+    parser.add_argument('--min-train-days', type=int, default=MIN_LATIH_HARI)
+    parser.add_argument('--train-days', type=int, default=None, help="Panjang jendela latih (mode sliding)")
+    parser.add_argument('--gap-days', type=int, default=0, help="Jeda antara akhir latih dan awal uji")
+    parser.add_argument('--threshold', type=_threshold_arg, default=None,
+                        help=f"Angka, atau '{THRESHOLD_CONFIG}' untuk threshold_config.json (default: {THRESHOLD_DEFAULT})")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=OUTPUT_DEFAULT)
+    parser.add_argument('--scaling', action='store_true', help="Ukur waktu total untuk 1..N worker")
+    args = parser.parse_args()
+    opsi = dict(test_hari=args.test_days, min_latih_hari=args.min_train_days, mode=args.mode,
+                latih_hari=args.train_days, gap_hari=args.gap_days, threshold=args.threshold)
+    if args.scaling:
+        scaling_report(**opsi)
+    else:
+        run_backtest(max_workers=args.workers, output=args.output, **opsi)
@@ -0,0 +1,244 @@
+# benchmark.py — Microbenchmark jalur panas recommender_core
+#
+# Jalankan:   python benchmark.py                                  (data bawaan + dataset sintetis default)
+#             python benchmark.py --scales 10x365 50x1825          (skala sintetis: <stasiun>x<hari>)
+#             python benchmark.py --no-bundled --output run_b.json
+#             python benchmark.py --compare run_a.json run_b.json --threshold 10
+#
+# Kasus yang diukur: load_data (dingin, cache dikosongkan; dataset sintetis: read_partitioned_dataset pada
+# direktorinya), load_ml_assets (dingin), calculate_station_similarity (dingin),
+# get_hybrid_recommendation satu baris, dan jalur agregasi dashboard
+# (compute_dashboard_kpis + kolom rekomendasi historis). Hasil ditulis sebagai JSON; --compare menandai
+# kasus yang median waktunya naik melebihi ambang persentase.
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import recommender_core as core
+from config import STATION_COL_NAME, POLUTAN_COLS
+from data_store import read_partitioned_dataset, write_partitioned_dataset, to_compact_frame
+
+OUTPUT_DEFAULT = 'benchmark_hasil.json'
+SKALA_DEFAULT = ('10x365', '25x1095', '50x1825')
+ULANG_DEFAULT = 5
+N_BARIS_REKOMENDASI = 50
+AMBANG_REGRESI_PERSEN = 10.0
+MIN_SELISIH_MS = 0.1
+
+
+# --- A. PENGUKURAN ---
+def _ukur(fungsi, ulang=ULANG_DEFAULT, pemanasan=1):
+    """Menjalankan fungsi (pemanasan + ulang kali); mengembalikan statistik waktu dalam milidetik."""
+    for _ in range(pemanasan):
+        fungsi()
+    waktu = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        waktu.append((time.perf_counter() - mulai) * 1e3)
+    return {
+        'ulang': ulang,
+        'min_ms': min(waktu),
+        'median_ms': statistics.median(waktu),
+        'mean_ms': statistics.fmean(waktu),
+        'std_ms': statistics.pstdev(waktu),
+    }
+
+
+def _ukur_per_baris(fungsi, baris, ulang=ULANG_DEFAULT):
+    """Seperti _ukur, tetapi setiap pengulangan memakai baris input berikutnya (bergilir) dari daftar baris."""
+    it = itertools.cycle(baris)
+    return _ukur(lambda: fungsi(next(it)), ulang=ulang, pemanasan=1)
+
+
+# --- B. DATASET SINTETIS (SKEMA ADVANCED) ---
+def parse_skala(teks):
+    """'50x1825' -> (50 stasiun, 1825 hari)."""
+    n_stasiun, n_hari = teks.lower().split('x')
+    return int(n_stasiun), int(n_hari)
+
+
+def buat_dataset_sintetis(df_dasar, n_stasiun, n_hari, seed=42):
+    """Dataset ADVANCED sintetis: baris stasiun nyata diulang sepanjang n_hari dengan tanggal baru.
+
+    Stasiun ke-j meminjam pola stasiun nyata (j mod jumlah stasiun) dengan nama 'SIMjjj <stasiun>' agar
+    tidak dinormalisasi kembali ke stasiun DKI; nilai polutan dikalikan faktor acak per stasiun.
+    """
+    rng = np.random.default_rng(seed)
+    per_stasiun = {nama: grup.sort_values('tanggal_lengkap').reset_index(drop=True)
+                   for nama, grup in df_dasar.groupby(STATION_COL_NAME, observed=True)}
+    nama_dasar = sorted(per_stasiun)
+    tanggal = pd.date_range('2020-01-01', periods=n_hari, freq='D')
+    polutan = [c for c in POLUTAN_COLS if c in df_dasar.columns]
+
+    bagian = []
+    for j in range(n_stasiun):
+        dasar = per_stasiun[nama_dasar[j % len(nama_dasar)]]
+        potongan = dasar.iloc[np.arange(n_hari) % len(dasar)].reset_index(drop=True)
+        potongan['tanggal_lengkap'] = tanggal
+        potongan[STATION_COL_NAME] = f"SIM{j:03d} {nama_dasar[j % len(nama_dasar)]}"
+        potongan[polutan] = potongan[polutan].astype(np.float64) * rng.uniform(0.8, 1.2)
+        bagian.append(potongan)
+    return pd.concat(bagian, ignore_index=True)
+
+
+# --- C. SUITE ---
+def _jalankan_kasus(nama_dataset, root, df, ulang, termasuk_aset=False):
+    """Semua kasus untuk satu dataset; root = direktori partisi yang dibaca load_data."""
+    info = {'dataset': nama_dataset, 'n_baris': len(df), 'n_stasiun': int(df[STATION_COL_NAME].nunique()),
+            'n_hari': int(df['tanggal_lengkap'].nunique())}
+    hasil = []
+
+    def catat(kasus, statistik):
+        hasil.append({**info, 'kasus': kasus, **statistik})
+        print(f"  {kasus:<32} median {statistik['median_ms']:>10.3f} ms  (min {statistik['min_ms']:.3f})")
+
+    print(f"\n▶️ {nama_dataset}: {info['n_baris']} baris, {info['n_stasiun']} stasiun, {info['n_hari']} hari")
+    if root is None:
+        def muat():
+            core.load_data.clear()
+            return core.load_data()
+        catat('load_data', _ukur(muat, ulang))
+    else:
+        # core.load_data selalu membaca direktori partisi bawaan; yang diukur adalah pembacanya langsung
+        catat('read_partitioned_dataset', _ukur(lambda: read_partitioned_dataset(root=root), ulang))
+
+    if termasuk_aset:
+        def muat_aset():
+            core.load_ml_assets.clear()
+            return core.load_ml_assets()
+        catat('load_ml_assets', _ukur(muat_aset, ulang))
+    scaler, cbf_model, fitur_list = core.load_ml_assets()
+
+    def kesamaan():
+        core.calculate_station_similarity.clear()
+        return core.calculate_station_similarity(df)
+    catat('calculate_station_similarity', _ukur(kesamaan, ulang))
+
+    sim_df = core.compute_station_similarity(df)
+    neighbor_index = core.build_station_neighbor_index(sim_df, k=1)
+    sampel = df.sample(n=min(N_BARIS_REKOMENDASI, len(df)), random_state=42)
+    baris = [sampel.iloc[[i]] for i in range(len(sampel))]
+    catat('get_hybrid_recommendation_1_baris', _ukur_per_baris(
+        lambda row: core.get_hybrid_recommendation(row, row[STATION_COL_NAME].iloc[0], sim_df, scaler,
+                                                   cbf_model, fitur_list, neighbor_index=neighbor_index),
+        baris, ulang))
+
+    df_compact = to_compact_frame(df)
+    semua_tahun = sorted(df_compact['tanggal_lengkap'].dt.year.unique())
+    catat('dashboard_kpis', _ukur(lambda: core.compute_dashboard_kpis(df_compact, semua_tahun), ulang))
+    catat('dashboard_rekomendasi_historis', _ukur(lambda: (
+        core.get_actual_recommendation_vectorized(df_compact['kategori']),
+        core.get_historical_pejabat_recommendation_vectorized(df_compact)), ulang))
+    return hasil
+
+
+def _meta():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except Exception:
+        commit = None
+    import sklearn
+    return {
+        'dibuat_pada': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def run_suite(skala=SKALA_DEFAULT, bundled=True, ulang=ULANG_DEFAULT, output=OUTPUT_DEFAULT):
+    """Menjalankan semua kasus pada data bawaan dan setiap skala sintetis, lalu menulis JSON."""
+    hasil = []
+    df_dasar = core.load_data()
+    if df_dasar.empty:
+        print("❌ ERROR: Dataset bawaan tidak dapat dimuat.")
+        return None
+    if bundled:
+        hasil += _jalankan_kasus('bawaan', None, df_dasar, ulang, termasuk_aset=True)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_ispu_')
+    try:
+        for teks in skala:
+            n_stasiun, n_hari = parse_skala(teks)
+            df = buat_dataset_sintetis(df_dasar, n_stasiun, n_hari)
+            root = os.path.join(work_dir, teks)
+            write_partitioned_dataset(df, root)
+            hasil += _jalankan_kasus(f'sintetis_{n_stasiun}x{n_hari}', root, read_partitioned_dataset(root=root),
+                                     ulang)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    laporan = {'meta': _meta(), 'hasil': hasil}
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(laporan, f, indent=2)
+        print(f"\n✅ Hasil benchmark ({len(hasil)} kasus) disimpan ke '{output}'.")
+    return laporan
+
+
+# --- D. PERBANDINGAN DUA RUN ---
+def compare_runs(path_a, path_b, ambang_persen=AMBANG_REGRESI_PERSEN, min_selisih_ms=MIN_SELISIH_MS,
+                 statistik='median_ms'):
+    """Membandingkan run B terhadap run A per (dataset, kasus); mengembalikan (tabel, daftar regresi).
+
+    Regresi = waktu naik lebih dari ambang_persen DAN lebih dari min_selisih_ms (menyaring noise mikrodetik).
+    """
+    with open(path_a, encoding='utf-8') as f:
+        run_a = pd.DataFrame(json.load(f)['hasil'])
+    with open(path_b, encoding='utf-8') as f:
+        run_b = pd.DataFrame(json.load(f)['hasil'])
+    tabel = run_a[['dataset', 'kasus', statistik]].merge(
+        run_b[['dataset', 'kasus', statistik]], on=['dataset', 'kasus'], how='outer', suffixes=('_a', '_b'))
+    tabel['selisih_ms'] = tabel[f'{statistik}_b'] - tabel[f'{statistik}_a']
+    tabel['perubahan_persen'] = 100 * tabel['selisih_ms'] / tabel[f'{statistik}_a']
+    tabel['regresi'] = (tabel['perubahan_persen'] > ambang_persen) & (tabel['selisih_ms'] > min_selisih_ms)
+
+    print(f"--- 📊 PERBANDINGAN {statistik} ({path_a} -> {path_b}, ambang {ambang_persen:.1f}%) ---")
+    print(tabel.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    regresi = tabel[tabel['regresi']]
+    hanya_satu = tabel[tabel[[f'{statistik}_a', f'{statistik}_b']].isna().any(axis=1)]
+    if not hanya_satu.empty:
+        print(f"⚠️ {len(hanya_satu)} kasus hanya ada di salah satu run (tidak dibandingkan).")
+    if regresi.empty:
+        print("✅ Tidak ada regresi di atas ambang.")
+    else:
+        for _, row in regresi.iterrows():
+            print(f"❌ REGRESI {row['dataset']} / {row['kasus']}: +{row['perubahan_persen']:.1f}% "
+                  f"(+{row['selisih_ms']:.3f} ms)")
+    return tabel, regresi
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Microbenchmark jalur panas recommender Atmosfera-X")
+    parser.add_argument('--scales', nargs='*', default=list(SKALA_DEFAULT), metavar='STASIUNxHARI')
+    parser.add_argument('--no-bundled', action='store_true', help="Lewati data bawaan")
+    parser.add_argument('--repeat', type=int, default=ULANG_DEFAULT)
+    parser.add_argument('--output', default=OUTPUT_DEFAULT)
+    parser.add_argument('--compare', nargs=2, metavar=('RUN_A', 'RUN_B'))
+    parser.add_argument('--threshold', type=float, default=AMBANG_REGRESI_PERSEN, help="Ambang regresi (persen)")
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_SELISIH_MS)
+    parser.add_argument('--stat', default='median_ms', choices=['min_ms', 'median_ms', 'mean_ms'])
+    args = parser.parse_args()
+    if args.compare:
+        _, regresi = compare_runs(*args.compare, ambang_persen=args.threshold, min_selisih_ms=args.min_delta_ms,
+                                  statistik=args.stat)
+        sys.exit(1 if len(regresi) else 0)
+    run_suite(skala=args.scales, bundled=not args.no_bundled, ulang=args.repeat, output=args.output)
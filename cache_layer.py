@@ -0,0 +1,153 @@
+# cache_layer.py
+
+import functools
+import hashlib
+import inspect
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# --- A. HASHING ARGUMEN (KONVENSI SAMA DENGAN STREAMLIT) ---
+def _hash_value(value, hasher):
+    """Memasukkan representasi stabil sebuah argumen ke dalam hasher."""
+    if isinstance(value, pd.DataFrame):
+        hasher.update(str(list(value.columns)).encode())
+        hasher.update(str(list(value.dtypes)).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        hasher.update(str((value.name, value.dtype)).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(str((value.dtype, value.shape)).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(type(value).__name__.encode())
+        for item in value:
+            _hash_value(item, hasher)
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            _hash_value(key, hasher)
+            _hash_value(value[key], hasher)
+    else:
+        try:
+            hasher.update(pickle.dumps(value))
+        except Exception:
+            # Objek yang tidak bisa di-pickle dikenali dari identitasnya
+            hasher.update(f"{type(value).__name__}:{id(value)}".encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(func):
+    return inspect.signature(func)
+
+
+def make_cache_key(func, args, kwargs):
+    """Kunci cache dari argumen fungsi; parameter berawalan '_' tidak ikut di-hash (seperti Streamlit)."""
+    terikat = _signature(func).bind(*args, **kwargs)
+    terikat.apply_defaults()
+    hasher = hashlib.sha1(func.__qualname__.encode())
+    for nama, nilai in terikat.arguments.items():
+        if nama.startswith('_'):
+            continue
+        hasher.update(nama.encode())
+        _hash_value(nilai, hasher)
+    return hasher.hexdigest()
+
+
+# --- B. BACKEND BAWAAN: CACHE MEMORI LRU DALAM PROSES ---
+def memory_cache(func=None, *, max_entries=32, copy_result=False):
+    """Dekorator cache LRU di memori; copy_result=True mengembalikan salinan DataFrame (mirip st.cache_data)."""
+    if func is None:
+        return functools.partial(memory_cache, max_entries=max_entries, copy_result=copy_result)
+
+    entries = OrderedDict()
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = make_cache_key(func, args, kwargs)
+        with lock:
+            if key in entries:
+                entries.move_to_end(key)
+                hasil = entries[key]
+            else:
+                hasil = None
+        if hasil is None:
+            hasil = (func(*args, **kwargs),)
+            with lock:
+                entries[key] = hasil
+                while len(entries) > max_entries:
+                    entries.popitem(last=False)
+        nilai = hasil[0]
+        if copy_result and isinstance(nilai, (pd.DataFrame, pd.Series)):
+            return nilai.copy()
+        return nilai
+
+    wrapper.clear = lambda: entries.clear()
+    return wrapper
+
+
+def no_cache(func):
+    """Backend tanpa cache: fungsi selalu dijalankan ulang."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    wrapper.clear = lambda: None
+    return wrapper
+
+
+_BACKEND = {
+    'data': memory_cache(copy_result=True),
+    'resource': memory_cache,
+}
+_VERSI_BACKEND = [0]
+
+
+def set_cache_backend(data=None, resource=None):
+    """Mengganti dekorator backend cache (mis. st.cache_data/st.cache_resource, atau no_cache)."""
+    if data is not None:
+        _BACKEND['data'] = data
+    if resource is not None:
+        _BACKEND['resource'] = resource
+    _VERSI_BACKEND[0] += 1
+
+
+# --- C. DEKORATOR YANG DIPAKAI MODUL INTI ---
+class _CachedFunction:
+    """Membungkus fungsi dengan backend aktif secara malas, sehingga backend bisa diganti setelah import."""
+
+    def __init__(self, func, jenis):
+        functools.update_wrapper(self, func)
+        self._func = func
+        self._jenis = jenis
+        self._terbungkus = None
+        self._versi = None
+
+    def _aktif(self):
+        if self._terbungkus is None or self._versi != _VERSI_BACKEND[0]:
+            self._terbungkus = _BACKEND[self._jenis](self._func)
+            self._versi = _VERSI_BACKEND[0]
+        return self._terbungkus
+
+    def __call__(self, *args, **kwargs):
+        return self._aktif()(*args, **kwargs)
+
+    def clear(self):
+        """Mengosongkan cache fungsi ini pada backend aktif."""
+        clear = getattr(self._aktif(), 'clear', None)
+        if clear is not None:
+            clear()
+
+
+def cache_data(func):
+    """Cache untuk hasil berupa data (DataFrame, matriks); padanan st.cache_data."""
+    return _CachedFunction(func, 'data')
+
+
+def cache_resource(func):
+    """Cache untuk objek bersama yang hidup lama (model, indeks, mesin); padanan st.cache_resource."""
+    return _CachedFunction(func, 'resource')
@@ -0,0 +1,376 @@
+# chunked_preprocessing.py — Preprocessing out-of-core: partisi per stasiun di disk, memori terbatas
+#
+# Jalankan:   python chunked_preprocessing.py                    (build feature store ADVANCED + state)
+#             python chunked_preprocessing.py --verify           (bandingkan dengan build_feature_store di memori)
+#             python chunked_preprocessing.py --bench-rss 1 4 16 (peak RSS chunked vs di memori saat input membesar)
+#
+# Alur:
+#   1. File gabungan dibaca per chunk dan dipartisi per stasiun (kanonik) ke direktori kerja.
+#   2. Lintasan A per partisi: pembersihan + ffill -> jumlah/hitungan (mean) dan reservoir sample (kuantil 0.99).
+#   3. Lintasan B per partisi: imputasi & clipping dengan statistik global, fitur waktu, Lag/Roll -> mean Lag/Roll.
+#   4. Lintasan C per partisi: isi NaN Lag/Roll, dropna, OHE dengan skema global, tulis CSV & Feather per batch.
+# Memori puncak dibatasi oleh chunk (baca & tulis) dan partisi stasiun terbesar, bukan oleh ukuran seluruh input.
+
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import preprocessing
+from feature_kernel import grouped_ffill
+from preprocessing import POLUTAN_COLS, KOLOM_LAG_ROLL, KOLOM_YANG_DIHAPUS
+from data_store import read_partitioned_dataset
+from station_encoder import get_station_encoder
+
+CHUNKSIZE = 100_000
+UKURAN_RESERVOIR = 200_000
+
+
+# --- A. AGREGAT STREAMING ---
+class StreamingMean:
+    """Mean per kolom (skipna) dari banyak potongan data tanpa menyimpan datanya."""
+
+    def __init__(self, kolom):
+        self.kolom = list(kolom)
+        self.jumlah = np.zeros(len(self.kolom))
+        self.n = np.zeros(len(self.kolom), dtype=np.int64)
+
+    def update(self, df):
+        nilai = df[self.kolom].to_numpy(np.float64)
+        valid = ~np.isnan(nilai)
+        self.jumlah += np.where(valid, nilai, 0.0).sum(axis=0)
+        self.n += valid.sum(axis=0)
+
+    def result(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return dict(zip(self.kolom, (self.jumlah / self.n).tolist()))
+
+
+class ReservoirQuantile:
+    """Kuantil perkiraan dari reservoir sample (Algorithm R); tepat bila jumlah baris <= ukuran reservoir.
+
+    NaN ikut disimpan agar bisa diganti dengan mean global sebelum kuantil dihitung
+    (sama seperti fillna(mean) lalu quantile() pada build di memori).
+    """
+
+    def __init__(self, n_kolom, ukuran=UKURAN_RESERVOIR, seed=42):
+        self.sample = np.empty((ukuran, n_kolom))
+        self.ukuran = ukuran
+        self.terlihat = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, nilai):
+        nilai = np.asarray(nilai, dtype=np.float64)
+        n_isi = min(max(self.ukuran - self.terlihat, 0), len(nilai))
+        self.sample[self.terlihat:self.terlihat + n_isi] = nilai[:n_isi]
+        sisa = nilai[n_isi:]
+        if len(sisa):
+            # Baris ke-t diterima dengan peluang ukuran/(t+1); penugasan berurutan seperti versi satu-per-satu
+            posisi = self.rng.integers(0, self.terlihat + n_isi + np.arange(1, len(sisa) + 1))
+            terima = posisi < self.ukuran
+            self.sample[posisi[terima]] = sisa[terima]
+        self.terlihat += len(nilai)
+
+    def quantile(self, q, isi_nan):
+        sample = self.sample[:min(self.terlihat, self.ukuran)]
+        sample = np.where(np.isnan(sample), np.asarray(isi_nan)[None, :], sample)
+        return np.quantile(sample, q, axis=0)
+
+
+# --- B. PARTISI PER STASIUN DI DISK ---
+def partition_by_station(file_data, work_dir, chunksize=CHUNKSIZE, file_append=None):
+    """Membaca file gabungan (lalu file_append, bila ada) per chunk dan menulis baris tiap stasiun ke potongan
+    pickle terpisah.
+
+    Urutan baris per stasiun dipertahankan (chunk diberi nomor urut), sehingga drop_duplicates(keep='first')
+    per partisi sama dengan versi global. Mengembalikan {nama stasiun kanonik: [path potongan]}.
+    """
+    encoder = get_station_encoder()
+    partisi = {}
+    n_baris = 0
+    sumber = [file_data] + ([file_append] if file_append and os.path.exists(file_append) else [])
+    semua_chunk = (chunk for path in sumber for chunk in pd.read_csv(path, chunksize=chunksize))
+    for nomor, chunk in enumerate(semua_chunk):
+        n_baris += len(chunk)
+        chunk = preprocessing.filter_stasiun_valid(chunk)
+        ids = encoder.encode(chunk['stasiun'])
+        for kode in np.unique(ids[ids >= 0]):
+            nama = encoder.nama_kanonik[kode]
+            path = os.path.join(work_dir, f'part_{kode:05d}_{nomor:06d}.pkl')
+            chunk[ids == kode].to_pickle(path)
+            partisi.setdefault(nama, []).append(path)
+    print(f"   [Partisi]: {n_baris} baris input -> {len(partisi)} partisi stasiun di {work_dir}")
+    # Urutan nama sama dengan sort_values('stasiun') pada build di memori
+    return {nama: partisi[nama] for nama in sorted(partisi)}
+
+
+def _baca_partisi(paths):
+    return pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True)
+
+
+# --- C. BUILD FEATURE STORE CHUNKED ---
+def build_feature_store_chunked(file_data=preprocessing.FILE_DATA,
+                                output_csv=preprocessing.OUTPUT_FILE_ADVANCED,
+                                output_feather=preprocessing.OUTPUT_FILE_ADVANCED_FEATHER,
+                                state_path=preprocessing.STATE_PATH,
+                                output_partisi=preprocessing.OUTPUT_DIR_PARTISI,
+                                chunksize=CHUNKSIZE, ukuran_reservoir=UKURAN_RESERVOIR, work_dir=None):
+    """Setara build_feature_store, tetapi per partisi stasiun; statistik global dari agregat streaming.
+
+    Mean imputasi dan mean Lag/Roll dihitung tepat (hingga pembulatan penjumlahan); kuantil 0.99 dihitung
+    dari reservoir sample sehingga tepat bila jumlah baris <= ukuran_reservoir. Setiap batch juga ditulis
+    ke layout partisi per stasiun (output_partisi=None untuk melewatinya). Mengembalikan (state, n_baris).
+    """
+    from data_store import cast_advanced_types, write_station_partitions, write_manifest
+
+    dir_sementara = work_dir is None
+    work_dir = tempfile.mkdtemp(prefix='chunked_pp_') if dir_sementara else work_dir
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        print("--- ⚙️ TAHAP 1: PARTISI DATA GABUNGAN PER STASIUN ---")
+        # Baris mode append hanya ikut bila yang dibangun adalah data gabungan standar
+        file_append = preprocessing.FILE_DATA_APPEND if file_data == preprocessing.FILE_DATA else None
+        partisi = partition_by_station(file_data, work_dir, chunksize, file_append)
+        if not partisi:
+            raise ValueError(f"Tidak ada baris stasiun valid di {file_data}.")
+
+        # Lintasan A: mean & kuantil global dari nilai setelah ffill per stasiun
+        mean_polutan = StreamingMean(POLUTAN_COLS)
+        reservoir = ReservoirQuantile(len(POLUTAN_COLS), ukuran=ukuran_reservoir)
+        n_duplikat = 0
+        for paths in partisi.values():
+            df = _baca_partisi(paths)
+            n_awal = len(df)
+            df = preprocessing.bersihkan_data_gabungan(df, verbose=False)
+            n_duplikat += n_awal - len(df)
+            df[POLUTAN_COLS] = grouped_ffill(df, POLUTAN_COLS)
+            mean_polutan.update(df)
+            reservoir.update(df[POLUTAN_COLS].to_numpy(np.float64))
+        print(f"   [Pembersihan Duplikat Kunci]: {n_duplikat} baris duplikat (dengan Kunci Primer yang sama) dihapus.")
+
+        mean_isi = mean_polutan.result()
+        batas = reservoir.quantile(0.99, [mean_isi[c] for c in POLUTAN_COLS])
+        stats = {'mean_isi': mean_isi, 'batas_atas': dict(zip(POLUTAN_COLS, batas.tolist()))}
+        print("✅ Pembersihan dan Imputasi Dasar Selesai.")
+
+        # Lintasan B: imputasi + clipping beku, fitur waktu, Lag/Roll; simpan hasil antara per partisi
+        print("\n--- 🧠 TAHAP 2: ADVANCED FEATURE ENGINEERING (Lag/Roll) ---")
+        mean_lag_roll = StreamingMean(KOLOM_LAG_ROLL)
+        ffill_terakhir = {col: [] for col in POLUTAN_COLS}
+        stasiun_ohe, kategori_ohe = set(), set()
+        antara = []
+        for nomor, paths in enumerate(partisi.values()):
+            df = preprocessing.bersihkan_data_gabungan(_baca_partisi(paths), verbose=False)
+            df, _, ffill_baru = preprocessing.imputasi_polutan(df, stats=stats)
+            for col in POLUTAN_COLS:
+                ffill_terakhir[col].append(ffill_baru[col])
+            df = preprocessing.tambah_fitur_waktu(df)
+            df = preprocessing.hitung_lag_roll(df)
+            mean_lag_roll.update(df)
+            # Baris yang lolos dropna nanti (kolom Lag/Roll pasti terisi) menentukan kolom OHE
+            lolos = df.drop(columns=KOLOM_LAG_ROLL).notna().all(axis=1)
+            stasiun_ohe.update(df.loc[lolos, 'stasiun'])
+            kategori_ohe.update(df.loc[lolos, 'kategori'])
+            path = os.path.join(work_dir, f'antara_{nomor:05d}.pkl')
+            df.to_pickle(path)
+            antara.append(path)
+        stats['mean_lag_roll'] = mean_lag_roll.result()
+        kolom_ohe = ([f'stasiun_{s}' for s in sorted(stasiun_ohe)]
+                     + [f'kategori_{k}' for k in sorted(kategori_ohe)])
+
+        # Lintasan C: isi NaN Lag/Roll, dropna, OHE, tulis bertahap
+        writer = None
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc as ipc
+        except ImportError:
+            pa = None
+            print(f"⚠️ pyarrow tidak terpasang: {output_feather} tidak ditulis (hanya CSV).")
+
+        ekor, antrean, n_antrean, entri_partisi = [], [], 0, {}
+        hasil = {'kolom_output': None, 'n_baris': 0, 'skema': None}
+        tmp_csv, tmp_feather = output_csv + '.tmp', output_feather + '.tmp'
+
+        def tulis(bagian):
+            """OHE + tulis satu batch; beberapa partisi kecil digabung agar overhead per kolom tidak berulang."""
+            nonlocal writer
+            df = pd.concat(bagian, ignore_index=True)
+            df, _ = preprocessing.one_hot_encode(df, kolom_ohe)
+            df = df.drop(columns=KOLOM_YANG_DIHAPUS, errors='ignore')
+            pertama = hasil['kolom_output'] is None
+            hasil['kolom_output'] = list(df.columns)
+            df.to_csv(tmp_csv, mode='w' if pertama else 'a', header=pertama, index=False)
+            if pa is not None:
+                tabel = pa.Table.from_pandas(cast_advanced_types(df), preserve_index=False)
+                if writer is None:
+                    # Kolom teks yang seluruhnya kosong di batch pertama terbaca bertipe null
+                    hasil['skema'] = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                                                for f in tabel.schema], metadata=tabel.schema.metadata)
+                    writer = ipc.new_file(tmp_feather, hasil['skema'], options=ipc.IpcWriteOptions(compression='lz4'))
+                writer.write_table(tabel if tabel.schema == hasil['skema'] else tabel.cast(hasil['skema']))
+            if pa is not None and output_partisi:
+                # Satu stasiun tidak pernah terbagi ke dua batch, jadi partisinya ditulis utuh
+                entri_partisi.update(write_station_partitions(df, output_partisi))
+            hasil['n_baris'] += len(df)
+
+        n_dropna = 0
+        try:
+            for path in antara:
+                df = preprocessing.isi_nan_lag_roll(pd.read_pickle(path), stats)
+                ekor.append(preprocessing._ekor_per_stasiun(df))
+                n_awal = len(df)
+                df = df.dropna()
+                n_dropna += n_awal - len(df)
+                antrean.append(df)
+                n_antrean += len(df)
+                if n_antrean >= chunksize:
+                    tulis(antrean)
+                    antrean, n_antrean = [], 0
+            if antrean:
+                tulis(antrean)
+        finally:
+            if writer is not None:
+                writer.close()
+        kolom_output, n_baris = hasil['kolom_output'], hasil['n_baris']
+        os.replace(tmp_csv, output_csv)
+        if writer is not None:
+            os.replace(tmp_feather, output_feather)
+        if entri_partisi:
+            write_manifest(entri_partisi, kolom_output, output_partisi)
+        print(f"   [Pembersihan NaN Final]: {n_dropna} baris dengan NaN di Lag/Roll (akibat data sangat awal) dihapus.")
+
+        state = {
+            'stats': stats,
+            'ffill_terakhir': {col: pd.concat(bagian) for col, bagian in ffill_terakhir.items()},
+            'ekor': pd.concat(ekor, ignore_index=True),
+            'kolom_ohe': kolom_ohe,
+            'kolom_output': kolom_output,
+        }
+        if state_path:
+            joblib.dump(state, state_path)
+        print(f"✅ Dataset Advanced FE ({n_baris} baris) tersimpan di: {output_csv}"
+              f"{', ' + output_feather if writer is not None else ''}"
+              f"{' & ' + output_partisi + '/' if entri_partisi else ''}")
+        return state, n_baris
+    finally:
+        if dir_sementara:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def verify_chunked_mode(file_data=preprocessing.FILE_DATA, chunksize=1_000, atol=1e-9):
+    """Membandingkan build chunked (chunk kecil) dengan build_feature_store di memori pada data yang sama."""
+    with tempfile.TemporaryDirectory(prefix='verify_chunked_') as tmp:
+        csv_path = os.path.join(tmp, 'advanced.csv')
+        state, _ = build_feature_store_chunked(file_data, csv_path, os.path.join(tmp, 'advanced.feather'),
+                                               state_path=None, output_partisi=os.path.join(tmp, 'partisi'),
+                                               chunksize=chunksize)
+        df_chunked = pd.read_csv(csv_path)
+        df_partisi = read_partitioned_dataset(root=os.path.join(tmp, 'partisi'))
+        df_feather = pd.read_feather(os.path.join(tmp, 'advanced.feather'))
+
+    file_append = preprocessing.FILE_DATA_APPEND if file_data == preprocessing.FILE_DATA else None
+    df_penuh, state_penuh = preprocessing.build_feature_store(preprocessing.baca_data_gabungan(file_data, file_append))
+    # Bandingkan dalam bentuk yang sama seperti file output (melalui CSV)
+    buffer = io.StringIO()
+    df_penuh.to_csv(buffer, index=False)
+    buffer.seek(0)
+    df_penuh = pd.read_csv(buffer)
+
+    kolom_angka = [c for c in df_penuh.columns if pd.api.types.is_numeric_dtype(df_penuh[c]) and df_penuh[c].dtype != bool]
+    sama_skema = list(df_chunked.columns) == list(df_penuh.columns) and len(df_chunked) == len(df_penuh)
+    selisih = (float(np.abs(df_chunked[kolom_angka].to_numpy(float) - df_penuh[kolom_angka].to_numpy(float)).max())
+               if sama_skema else np.inf)
+    lainnya = sama_skema and df_chunked.drop(columns=kolom_angka).equals(df_penuh.drop(columns=kolom_angka))
+    cocok = bool(lainnya) and selisih <= atol and len(df_feather) == len(df_penuh) \
+        and len(df_partisi) == len(df_penuh) and state['kolom_ohe'] == state_penuh['kolom_ohe']
+    print(f"{'✅ COCOK' if cocok else '❌ TIDAK COCOK'}: {len(df_chunked)} vs {len(df_penuh)} baris, "
+          f"selisih maks numerik {selisih:.3e}")
+    return cocok
+
+
+# --- D. PEAK RSS TERHADAP UKURAN INPUT ---
+def peak_rss_mb():
+    """Peak RSS proses ini (MB); ru_maxrss dalam KiB di Linux dan byte di macOS."""
+    maks = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maks / (1024 * 1024) if sys.platform == 'darwin' else maks / 1024
+
+
+def tulis_input_skala(path, faktor, file_data=preprocessing.FILE_DATA):
+    """Input sintetis = faktor salinan data gabungan; salinan ke-j menjadi stasiun kota lain ('DKI-K{j} ...')."""
+    df = pd.read_csv(file_data)
+    for j in range(faktor):
+        salinan = df if j == 0 else df.assign(stasiun=f'DKI-K{j} ' + df['stasiun'].astype(str))
+        salinan.to_csv(path, mode='w' if j == 0 else 'a', header=j == 0, index=False)
+    return os.path.getsize(path)
+
+
+def _jalankan_anak(mode, file_data, chunksize):
+    """Satu build di proses terpisah agar peak RSS tiap ukuran input tidak saling memengaruhi."""
+    perintah = [sys.executable, os.path.abspath(__file__), '--input', file_data, '--chunksize', str(chunksize),
+                '--rss-json'] + (['--in-memory'] if mode == 'memori' else [])
+    with tempfile.TemporaryDirectory(prefix='rss_out_') as tmp:
+        hasil = subprocess.run(perintah, capture_output=True, text=True, check=True, cwd=tmp)
+    return json.loads(hasil.stdout.strip().splitlines()[-1])
+
+
+def benchmark_peak_rss(faktor=(1, 4, 16), chunksize=CHUNKSIZE):
+    """Peak RSS (MB) build chunked vs build di memori untuk input yang diperbesar faktor kali."""
+    baris = []
+    with tempfile.TemporaryDirectory(prefix='rss_input_') as tmp:
+        for f in faktor:
+            path = os.path.join(tmp, f'gabungan_x{f}.csv')
+            ukuran = tulis_input_skala(path, f)
+            for mode in ('memori', 'chunked'):
+                ukur = _jalankan_anak(mode, path, chunksize)
+                baris.append({'faktor': f, 'input_mb': round(ukuran / 1e6, 1), 'mode': mode, **ukur})
+    laporan = pd.DataFrame(baris)
+    print("\n--- 📈 PEAK RSS vs UKURAN INPUT ---")
+    print(laporan.to_string(index=False))
+    return laporan
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Preprocessing out-of-core (partisi per stasiun) Atmosfera-X")
+    parser.add_argument('--input', default=preprocessing.FILE_DATA)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    parser.add_argument('--work-dir', default=None, help="Direktori partisi (default: direktori sementara)")
+    parser.add_argument('--verify', action='store_true', help="Bandingkan dengan build_feature_store di memori")
+    parser.add_argument('--bench-rss', nargs='*', type=int, metavar='FAKTOR', help="Ukur peak RSS untuk input xFAKTOR")
+    # Dipakai oleh --bench-rss untuk proses anak
+    parser.add_argument('--rss-json', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--in-memory', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.verify:
+        verify_chunked_mode(args.input)
+    elif args.bench_rss is not None:
+        benchmark_peak_rss(args.bench_rss or (1, 4, 16), chunksize=args.chunksize)
+    elif args.rss_json:
+        mulai = time.perf_counter()
+        if args.in_memory:
+            # Sama seperti build_assets_and_train tanpa pelatihan: build di memori lalu tulis CSV, Feather & partisi
+            from data_store import write_advanced_dataset, write_partitioned_dataset
+            df_out, _ = preprocessing.build_feature_store(pd.read_csv(args.input))
+            df_out.to_csv('advanced.csv', index=False)
+            write_advanced_dataset(df_out, 'advanced.feather')
+            write_partitioned_dataset(df_out, 'partisi')
+            n_baris = len(df_out)
+        else:
+            _, n_baris = build_feature_store_chunked(args.input, 'advanced.csv', 'advanced.feather', state_path=None,
+                                                     output_partisi='partisi',
+                                                     chunksize=args.chunksize, work_dir=args.work_dir)
+        print(json.dumps({'baris_output': n_baris, 'detik': round(time.perf_counter() - mulai, 2),
+                          'peak_rss_mb': round(peak_rss_mb(), 1)}))
+    else:
+        build_feature_store_chunked(args.input, chunksize=args.chunksize, work_dir=args.work_dir)
+        print("⚠️ Model tidak dilatih ulang pada mode chunked; jalankan preprocessing.py untuk melatih CBF.")
@@ -1,17 +1,40 @@
 # config.py
 
+import json
 import os
 
 # --- KONFIGURASI PATH FILE ---
 FILE_ADVANCED = 'data_ispu_preprocess_final_ADVANCED.csv'
+# Versi biner kolumnar (Arrow IPC/Feather) dari FILE_ADVANCED; CSV tetap dipakai sebagai cadangan
+FILE_ADVANCED_FEATHER = 'data_ispu_preprocess_final_ADVANCED.feather'
+# Layout terpartisi per stasiun kanonik (satu Feather per stasiun + manifest.json)
+FILE_ADVANCED_PARTITIONS = 'data_ispu_preprocess_final_ADVANCED_partisi'
 MODEL_CBF_PATH = 'model_cbf_rekomendasi.pkl'
 SCALER_PATH = 'scaler_rekomendasi.pkl'
 FITUR_LIST_PATH = 'fitur_list.pkl'
+# Artefak hasil threshold_tuning.py (threshold global + opsional per stasiun)
+THRESHOLD_CONFIG_PATH = 'threshold_config.json'
 
 # --- PARAMETER REKOMENDASI ---
 OPTIMAL_THRESHOLD = 0.70 
 STATION_COL_NAME = 'stasiun' 
 
+
+def read_threshold_config(path=THRESHOLD_CONFIG_PATH):
+    """(threshold global, {stasiun: threshold}) dari artefak tuning; OPTIMAL_THRESHOLD bila artefak belum ada."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            cfg = json.load(f)
+        per_stasiun = {stasiun: float(nilai) for stasiun, nilai in (cfg.get('per_stasiun') or {}).items()}
+        return float(cfg['threshold']), per_stasiun
+    except (OSError, ValueError, KeyError, TypeError):
+        return OPTIMAL_THRESHOLD, {}
+
+# --- PARAMETER COLLABORATIVE FILTERING MULTI-POLUTAN ---
+POLUTAN_COLS = ['pm10', 'pm25', 'so2', 'co', 'o3', 'no2']
+# Bobot tiap polutan saat menggabungkan matriks kesamaan (dinormalisasi otomatis)
+BOBOT_POLUTAN_CF = {'pm10': 1.0, 'pm25': 1.0, 'so2': 1.0, 'co': 1.0, 'o3': 1.0, 'no2': 1.0}
+
 # Mapping untuk output rekomendasi tindak lanjut (Masyarakat)
 REKOMENDASI_TINDAKAN = {
     0: "Kualitas udara AMAN. Tetap pantau kondisi, terutama saat jam sibuk.",
@@ -13,18 +13,22 @@ KOLOM_STANDAR = [
 FILE_INPUT = 'dataset/ispu_jakarta_2024_2025.xlsx'
 OUTPUT_CSV = 'ispu_2024_2025_date_fixed.csv'
 
-def fix_2024_2025_date_columns(file_path, target_year):
+def fix_2024_2025_date_columns(file_path, target_year, df=None):
     """
     Mengambil data dari file 2024/2025 dan merekonstruksi kolom tanggal lengkap.
+    df: workbook yang sudah dimuat (opsional) agar file tidak dibaca ulang untuk setiap tahun.
     """
     print(f"--- Memproses data tahun {target_year} ---")
     
     # 1. Muat data
-    try:
-        df = pd.read_excel(file_path, engine='openpyxl')
-    except FileNotFoundError:
-        print(f"❌ ERROR: File {file_path} tidak ditemukan.")
-        return None
+    if df is None:
+        try:
+            df = pd.read_excel(file_path, engine='openpyxl')
+        except FileNotFoundError:
+            print(f"❌ ERROR: File {file_path} tidak ditemukan.")
+            return None
+    else:
+        df = df.copy()
     
     df.columns = df.columns.str.strip().str.lower()
     
@@ -72,6 +76,18 @@ def standardize_and_save_final_2024_data(df_final_raw, output_csv):
     """
     Memetakan kolom dari format 2024/2025 ke KOLOM_STANDAR sebelum disimpan.
     """
+    df_final = standardize_final_2024_data(df_final_raw)
+    
+    # 4. Simpan Hasil Akhir
+    df_final.to_csv(output_csv, index=False)
+    
+    return df_final
+
+
+def standardize_final_2024_data(df_final_raw):
+    """
+    Memetakan kolom dari format 2024/2025 ke KOLOM_STANDAR (tanpa menyimpan).
+    """
     
     # 1. Pemetaan Kolom Akhir (Mengambil semua kolom polutan yang benar)
     final_rename_map = {
@@ -99,18 +115,19 @@ def standardize_and_save_final_2024_data(df_final_raw, output_csv):
     df_final['hari'] = df_final['tanggal_lengkap'].dt.day.fillna(df_final.get('hari', pd.NA))
     
     # 3. Ambil hanya KOLOM_STANDAR
-    df_final = df_final.reindex(columns=KOLOM_STANDAR)
-    
-    # 4. Simpan Hasil Akhir
-    df_final.to_csv(output_csv, index=False)
-    
-    return df_final
+    return df_final.reindex(columns=KOLOM_STANDAR)
 
 
 if __name__ == '__main__':
     # --- EKSEKUSI ---
-    df_2024 = fix_2024_2025_date_columns(FILE_INPUT, 2024)
-    df_2025 = fix_2024_2025_date_columns(FILE_INPUT, 2025)
+    # Workbook dibaca sekali saja lalu dipakai untuk 2024 dan 2025
+    try:
+        df_workbook = pd.read_excel(FILE_INPUT, engine='openpyxl')
+    except FileNotFoundError:
+        print(f"❌ ERROR: File {FILE_INPUT} tidak ditemukan.")
+        df_workbook = None
+    df_2024 = fix_2024_2025_date_columns(FILE_INPUT, 2024, df=df_workbook) if df_workbook is not None else None
+    df_2025 = fix_2024_2025_date_columns(FILE_INPUT, 2025, df=df_workbook) if df_workbook is not None else None
     
     if df_2024 is not None or df_2025 is not None:
         
@@ -0,0 +1,334 @@
+# data_store.py
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import FILE_ADVANCED, FILE_ADVANCED_FEATHER, FILE_ADVANCED_PARTITIONS, STATION_COL_NAME, normalize_station
+from station_encoder import get_station_encoder
+
+
+# --- A. SKEMA TIPE DATA DATASET ADVANCED ---
+KOLOM_TANGGAL = 'tanggal_lengkap'
+PREFIX_ONE_HOT = ('stasiun_', 'kategori_')
+
+
+def cast_advanced_types(df):
+    """Menyeragamkan tipe kolom: tanggal -> datetime, one-hot -> bool, float -> float32."""
+    df = df.copy()
+    if KOLOM_TANGGAL in df.columns:
+        df[KOLOM_TANGGAL] = pd.to_datetime(df[KOLOM_TANGGAL])
+    for col in df.columns:
+        if col.startswith(PREFIX_ONE_HOT) and df[col].dtype != bool:
+            # CSV lama bisa menyimpan one-hot sebagai teks 'True'/'False'
+            df[col] = df[col].astype(str).str.strip().str.lower().isin(['true', '1', '1.0'])
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+# --- B. TULIS & BACA FORMAT KOLUMNAR ---
+def write_advanced_dataset(df, path=FILE_ADVANCED_FEATHER):
+    """Menyimpan dataset ADVANCED ke Arrow IPC (Feather v2, lz4) dengan tipe yang sudah diseragamkan."""
+    df_typed = cast_advanced_types(df).reset_index(drop=True)
+    df_typed.to_feather(path, compression='lz4')
+    return df_typed
+
+
+def read_advanced_dataset(columns=None, path=FILE_ADVANCED_FEATHER, csv_path=FILE_ADVANCED):
+    """Membaca dataset ADVANCED (opsional hanya sebagian kolom); Feather bila ada, CSV sebagai cadangan."""
+    columns = list(columns) if columns is not None else None
+    if os.path.exists(path):
+        try:
+            return pd.read_feather(path, columns=columns)
+        except ImportError:
+            # pyarrow tidak terpasang: lanjut ke CSV
+            pass
+
+    parse_dates = [KOLOM_TANGGAL] if columns is None or KOLOM_TANGGAL in columns else None
+    df = pd.read_csv(csv_path, usecols=columns, parse_dates=parse_dates)
+    return cast_advanced_types(df)
+
+
+def dataset_version(path=FILE_ADVANCED_FEATHER, csv_path=FILE_ADVANCED):
+    """Versi dataset yang aktif (path, mtime, ukuran); berubah setiap kali file data ditulis ulang."""
+    for kandidat in (path, csv_path):
+        if os.path.exists(kandidat):
+            info = os.stat(kandidat)
+            return (kandidat, info.st_mtime_ns, info.st_size)
+    return None
+
+
+def convert_csv_to_feather(csv_path=FILE_ADVANCED, path=FILE_ADVANCED_FEATHER):
+    """Membuat ulang file Feather dari CSV ADVANCED yang sudah ada (tanpa melatih ulang model)."""
+    df = pd.read_csv(csv_path)
+    return write_advanced_dataset(df, path)
+
+
+# --- C. PARTISI PER STASIUN (SATU FILE FEATHER PER STASIUN KANONIK + MANIFEST) ---
+NAMA_MANIFEST = 'manifest.json'
+VERSI_MANIFEST = 1
+
+
+def _manifest_path(root):
+    return os.path.join(root, NAMA_MANIFEST)
+
+
+def _nama_file_partisi(stasiun):
+    """Nama file aman untuk filesystem; hash pendek mencegah bentrok antar nama yang mirip."""
+    slug = re.sub(r'[^0-9A-Za-z]+', '_', str(stasiun)).strip('_')
+    return f"{slug}_{hashlib.sha1(str(stasiun).encode()).hexdigest()[:8]}.feather"
+
+
+def read_manifest(root=FILE_ADVANCED_PARTITIONS):
+    """Manifest partisi (dict) atau None bila layout partisi belum dibuat."""
+    path = _manifest_path(root)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_station_partitions(df, root=FILE_ADVANCED_PARTITIONS):
+    """Menulis (menimpa) partisi setiap stasiun yang ada di df; mengembalikan entri manifest per stasiun."""
+    os.makedirs(root, exist_ok=True)
+    entri = {}
+    for stasiun, bagian in df.groupby(STATION_COL_NAME, sort=True, observed=True):
+        bagian = bagian.sort_values(KOLOM_TANGGAL, kind='stable')
+        nama_file = _nama_file_partisi(stasiun)
+        path = os.path.join(root, nama_file)
+        df_typed = write_advanced_dataset(bagian, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        entri[str(stasiun)] = {
+            'file': nama_file,
+            'baris': int(len(df_typed)),
+            'tanggal_min': str(df_typed[KOLOM_TANGGAL].min()),
+            'tanggal_max': str(df_typed[KOLOM_TANGGAL].max()),
+        }
+    return entri
+
+
+def write_manifest(entri, kolom, root=FILE_ADVANCED_PARTITIONS):
+    """Manifest ditulis terakhir (atomik), sehingga pembaca tidak pernah melihat layout setengah jadi.
+
+    File partisi yang tidak lagi dirujuk manifest (mis. stasiun yang hilang dari build baru) dihapus.
+    """
+    manifest = {
+        'versi': VERSI_MANIFEST,
+        'kolom': list(kolom),
+        'partisi': {stasiun: entri[stasiun] for stasiun in sorted(entri)},
+    }
+    path = _manifest_path(root)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+    dipakai = {info['file'] for info in manifest['partisi'].values()}
+    for nama in os.listdir(root):
+        if nama.endswith('.feather') and nama not in dipakai:
+            os.remove(os.path.join(root, nama))
+    return manifest
+
+
+def write_partitioned_dataset(df, root=FILE_ADVANCED_PARTITIONS):
+    """Menulis ulang seluruh layout partisi dari dataset ADVANCED lengkap."""
+    return write_manifest(write_station_partitions(df, root), df.columns, root)
+
+
+def append_partitioned_dataset(df_baru, root=FILE_ADVANCED_PARTITIONS):
+    """Menambahkan baris baru; hanya partisi stasiun yang menerima baris baru yang ditulis ulang."""
+    manifest = read_manifest(root)
+    if manifest is None:
+        return None
+    stasiun_baru = [str(s) for s in pd.unique(df_baru[STATION_COL_NAME].dropna())]
+    lama = read_partitioned_dataset(stations=stasiun_baru, root=root)
+    gabungan = pd.concat([lama, cast_advanced_types(df_baru)], ignore_index=True) if len(lama) else df_baru
+    entri = dict(manifest['partisi'])
+    entri.update(write_station_partitions(gabungan, root))
+    return write_manifest(entri, manifest['kolom'], root)
+
+
+def _baca_satu_partisi(path, columns, mulai, akhir):
+    """Satu partisi sebagai tabel Arrow (belum dikonversi ke pandas), sudah difilter rentang tanggal."""
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+
+    kolom_baca = None
+    if columns is not None:
+        kolom_baca = list(dict.fromkeys(list(columns) + ([KOLOM_TANGGAL] if mulai or akhir else [])))
+    tabel = feather.read_table(path, columns=kolom_baca)
+    if mulai is not None:
+        tabel = tabel.filter(pc.greater_equal(tabel[KOLOM_TANGGAL], mulai.to_datetime64()))
+    if akhir is not None:
+        tabel = tabel.filter(pc.less_equal(tabel[KOLOM_TANGGAL], akhir.to_datetime64()))
+    return tabel.select(list(columns)) if columns is not None else tabel
+
+
+def read_partitioned_dataset(stations=None, start=None, end=None, columns=None,
+                             root=FILE_ADVANCED_PARTITIONS, max_workers=None):
+    """Membaca hanya partisi stasiun yang diminta (None = semua), opsional dibatasi rentang tanggal [start, end].
+
+    Partisi yang rentang tanggalnya (menurut manifest) di luar [start, end] tidak dibuka sama sekali; partisi
+    yang tersisa dibaca paralel sebagai tabel Arrow lalu dikonversi ke pandas sekali. Tanpa manifest (atau
+    tanpa pyarrow), dataset ADVANCED utuh dibaca lalu difilter. Hasil terurut per stasiun lalu per tanggal.
+    """
+    mulai = pd.Timestamp(start) if start is not None else None
+    akhir = pd.Timestamp(end) if end is not None else None
+    manifest = read_manifest(root)
+    try:
+        import pyarrow as pa
+    except ImportError:
+        manifest = None
+    if manifest is None:
+        df = read_advanced_dataset(columns=columns)
+        if stations is not None:
+            df = df[df[STATION_COL_NAME].isin(list(stations))]
+        if mulai is not None:
+            df = df[df[KOLOM_TANGGAL] >= mulai]
+        if akhir is not None:
+            df = df[df[KOLOM_TANGGAL] <= akhir]
+        return df.reset_index(drop=True)
+
+    partisi = manifest['partisi']
+    diminta = None if stations is None else set(map(str, stations))
+    dipilih = [nama for nama in partisi if diminta is None or nama in diminta]
+    dipilih = [nama for nama in dipilih
+               if (mulai is None or pd.Timestamp(partisi[nama]['tanggal_max']) >= mulai)
+               and (akhir is None or pd.Timestamp(partisi[nama]['tanggal_min']) <= akhir)]
+    if not dipilih:
+        # Frame kosong dengan tipe kolom yang sama seperti hasil normal (skema dibaca dari satu partisi)
+        if not partisi:
+            return pd.DataFrame(columns=manifest['kolom'] if columns is None else list(columns))
+        contoh = os.path.join(root, next(iter(partisi.values()))['file'])
+        return _baca_satu_partisi(contoh, columns, None, None).slice(0, 0).to_pandas()
+
+    paths = [os.path.join(root, partisi[nama]['file']) for nama in dipilih]
+    if len(paths) == 1:
+        tabel = [_baca_satu_partisi(paths[0], columns, mulai, akhir)]
+    else:
+        # pyarrow melepas GIL saat membaca & dekompresi, sehingga thread cukup untuk paralelisme
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1)) as executor:
+            tabel = list(executor.map(lambda path: _baca_satu_partisi(path, columns, mulai, akhir), paths))
+    return pa.concat_tables(tabel).to_pandas()
+
+
+def partitioned_dataset_version(root=FILE_ADVANCED_PARTITIONS):
+    """Versi layout partisi (mtime & ukuran manifest); None bila belum ada."""
+    path = _manifest_path(root)
+    if not os.path.exists(path):
+        return None
+    info = os.stat(path)
+    return (path, info.st_mtime_ns, info.st_size)
+
+
+def convert_to_partitions(root=FILE_ADVANCED_PARTITIONS):
+    """Membuat layout partisi dari dataset ADVANCED yang sudah ada (tanpa melatih ulang model)."""
+    return write_partitioned_dataset(read_advanced_dataset(), root)
+
+
+# --- D. REPRESENTASI RINGKAS DI MEMORI ---
+# Kolom one-hot dengan prefix yang sama dipadatkan menjadi satu kolom kode kecil (categorical int8)
+# yang kategorinya adalah nama kolom one-hot aslinya. Ekspansi hanya dilakukan saat skoring.
+KOLOM_PADAT_ONE_HOT = {'stasiun_ohe': 'stasiun_', 'kategori_ohe': 'kategori_'}
+
+
+def _pack_one_hot(df, prefix):
+    """Memadatkan kelompok kolom one-hot ber-prefix sama menjadi satu Series categorical."""
+    kolom_ohe = [c for c in df.columns if c.startswith(prefix) and df[c].dtype == bool]
+    if not kolom_ohe:
+        return None, []
+    matriks = df[kolom_ohe].to_numpy()
+    # Baris tanpa satu pun nilai True mendapat kode -1 (NaN)
+    # Tipe kode bertanda yang cukup untuk jumlah kolom (int8 meluap di atas 127 stasiun)
+    tipe_kode = np.promote_types(np.int8, np.min_scalar_type(len(kolom_ohe)))
+    codes = np.where(matriks.any(axis=1), matriks.argmax(axis=1), -1).astype(tipe_kode)
+    packed = pd.Categorical.from_codes(codes, categories=kolom_ohe)
+    return pd.Series(packed, index=df.index), kolom_ohe
+
+
+def _normalize_station_codes(stasiun):
+    """Memetakan kolom stasiun categorical ke nama kanonik; normalize_station dijalankan per nama unik saja."""
+    return get_station_encoder().to_categorical(stasiun)
+
+
+def to_compact_frame(df):
+    """Mengubah dataset ADVANCED ke bentuk ringkas: kode categorical, float32, dan one-hot terpadatkan."""
+    df_typed = cast_advanced_types(df)
+    kolom_baru = {}
+    kolom_dibuang = []
+    for kolom_padat, prefix in KOLOM_PADAT_ONE_HOT.items():
+        packed, kolom_ohe = _pack_one_hot(df_typed, prefix)
+        if packed is not None:
+            kolom_baru[kolom_padat] = packed
+            kolom_dibuang.extend(kolom_ohe)
+
+    df_compact = df_typed.drop(columns=kolom_dibuang)
+    for col in df_compact.columns:
+        if pd.api.types.is_integer_dtype(df_compact[col]) and not pd.api.types.is_bool_dtype(df_compact[col]):
+            df_compact[col] = pd.to_numeric(df_compact[col], downcast='integer')
+
+    if STATION_COL_NAME in df_compact.columns:
+        stasiun = df_compact[STATION_COL_NAME].astype('category')
+        df_compact[STATION_COL_NAME] = stasiun
+        df_compact['stasiun_normal'] = _normalize_station_codes(stasiun)
+    if 'kategori' in df_compact.columns:
+        df_compact['kategori'] = df_compact['kategori'].astype('category')
+
+    for kolom_padat, packed in kolom_baru.items():
+        df_compact[kolom_padat] = packed
+    return df_compact
+
+
+def build_feature_frame(df, fitur_list):
+    """Menyusun frame fitur float64 sesuai fitur_list, mengekspansi kolom one-hot terpadatkan bila perlu."""
+    kolom_hilang = [c for c in fitur_list if c not in df.columns]
+    ekspansi = {}
+    for kolom_padat, prefix in KOLOM_PADAT_ONE_HOT.items():
+        if kolom_padat not in df.columns:
+            continue
+        nilai = df[kolom_padat].astype(object).to_numpy()
+        for col in kolom_hilang:
+            if col.startswith(prefix):
+                ekspansi[col] = nilai == col
+    if ekspansi:
+        df = pd.concat([df.drop(columns=list(KOLOM_PADAT_ONE_HOT), errors='ignore'),
+                        pd.DataFrame(ekspansi, index=df.index)], axis=1)
+    # Skoring selalu float64 walaupun kolom sumbernya float32/int8 (hasil sama dengan frame lama)
+    return df.reindex(columns=fitur_list).astype(np.float64)
+
+
+def memory_report(df_before, df_after):
+    """Membandingkan jejak memori (deep) per kolom sebelum dan sesudah representasi ringkas."""
+    sebelum = df_before.memory_usage(deep=True, index=False)
+    sesudah = df_after.memory_usage(deep=True, index=False)
+    laporan = pd.DataFrame({
+        'tipe_sebelum': df_before.dtypes.astype(str),
+        'bytes_sebelum': sebelum,
+    }).join(pd.DataFrame({
+        'tipe_sesudah': df_after.dtypes.astype(str),
+        'bytes_sesudah': sesudah,
+    }), how='outer')
+    laporan[['tipe_sebelum', 'tipe_sesudah']] = laporan[['tipe_sebelum', 'tipe_sesudah']].fillna('-')
+    laporan[['bytes_sebelum', 'bytes_sesudah']] = laporan[['bytes_sebelum', 'bytes_sesudah']].fillna(0).astype(int)
+    laporan.loc['TOTAL'] = ['', laporan['bytes_sebelum'].sum(), '', laporan['bytes_sesudah'].sum()]
+    return laporan
+
+
+if __name__ == '__main__':
+    df_typed = convert_csv_to_feather()
+    print(f"✅ {FILE_ADVANCED} ({len(df_typed)} baris) dikonversi ke {FILE_ADVANCED_FEATHER}.")
+    manifest = convert_to_partitions()
+    print(f"✅ {len(manifest['partisi'])} partisi stasiun ditulis ke {FILE_ADVANCED_PARTITIONS}/.")
+
+    # Laporan memori: frame seperti di app lama (CSV + stasiun_normal per baris) vs representasi ringkas
+    df_lama = pd.read_csv(FILE_ADVANCED)
+    df_lama['tanggal_lengkap'] = pd.to_datetime(df_lama['tanggal_lengkap'])
+    df_lama['stasiun_normal'] = df_lama[STATION_COL_NAME].astype(str).apply(normalize_station)
+    laporan = memory_report(df_lama, to_compact_frame(df_typed))
+    print("\n--- 📦 LAPORAN MEMORI PER KOLOM (bytes) ---")
+    print(laporan.to_string())
@@ -0,0 +1,155 @@
+# eval_matrix.py — Matriks evaluasi bersama (X terskala float32 + Y) sebagai artefak memmap
+#
+# Jalankan:   python eval_matrix.py              (bangun/cek matriks untuk dataset & scaler aktif)
+#             python eval_matrix.py --rebuild    (paksa bangun ulang)
+#             python eval_matrix.py --prune      (hapus matriks lama selain kunci aktif)
+#
+# evaluate_cbf.py, tune_and_evaluate.py, threshold_tuning.py dan backtest.py semula masing-masing membaca
+# ulang dataset ADVANCED, mengisi NaN dengan mean, menjalankan scaler.transform pada seluruh baris, lalu
+# membagi data. Di sini X = scaler.transform(fillna(mean)) dan Y ditulis SEKALI ke .eval_cache/<kunci>/
+# sebagai .npy; kunci = SHA-256 isi dataset, scaler, dan fitur_list, sehingga artefak otomatis usang
+# saat data atau model dilatih ulang. Setiap proses membukanya dengan mmap_mode='r' (tanpa salinan).
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from config import STATION_COL_NAME
+from data_store import read_advanced_dataset, dataset_version
+from ingest_excel import file_sha256
+from preprocessing import SCALER_PATH, FITUR_LIST_PATH
+
+# Naikkan VERSI_MATRIX bila isi/format artefak berubah agar matriks lama tidak dipakai lagi
+CACHE_DIR = '.eval_cache'
+VERSI_MATRIX = 1
+UKURAN_BLOK = 100_000
+TARGET_COL = 'kategori_TIDAK SEHAT'
+ARRAY = ('X', 'y', 'tanggal', 'stasiun')
+
+EvalMatrix = namedtuple('EvalMatrix', ['X', 'y', 'tanggal', 'stasiun', 'fitur_list', 'nama_stasiun', 'paths',
+                                       'kunci'])
+
+
+# --- A. KUNCI ARTEFAK ---
+def matrix_key(scaler_path=SCALER_PATH, fitur_list_path=FITUR_LIST_PATH):
+    """Kunci isi: SHA-256 dari dataset ADVANCED aktif + scaler + fitur_list + VERSI_MATRIX."""
+    versi = dataset_version()
+    if versi is None:
+        raise FileNotFoundError("Dataset ADVANCED tidak ditemukan.")
+    hasher = hashlib.sha256(f"v{VERSI_MATRIX}".encode())
+    for path in (versi[0], scaler_path, fitur_list_path):
+        hasher.update(file_sha256(path).encode())
+    return hasher.hexdigest()[:20]
+
+
+# --- B. BANGUN ARTEFAK ---
+def build_eval_matrix(kunci=None, cache_dir=CACHE_DIR, scaler_path=SCALER_PATH, fitur_list_path=FITUR_LIST_PATH):
+    """Menulis X (float32, terskala), y, tanggal (ns) & kode stasiun ke cache_dir/<kunci>/; mengembalikan path-nya.
+
+    Ditulis ke direktori sementara lalu di-rename, sehingga proses lain (mis. tahap pipeline paralel) tidak
+    pernah membuka artefak setengah jadi; bila dua proses membangun bersamaan, hasil yang pertama dipakai.
+    """
+    kunci = kunci or matrix_key(scaler_path, fitur_list_path)
+    scaler = joblib.load(scaler_path)
+    fitur_list = joblib.load(fitur_list_path)
+    df = read_advanced_dataset()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tujuan = os.path.join(cache_dir, kunci)
+    tmp = tempfile.mkdtemp(prefix=f'{kunci}.tmp', dir=cache_dir)
+    try:
+        # Sama seperti skrip evaluasi lama: NaN diisi mean kolom atas seluruh dataset sebelum scaling
+        fitur = df[fitur_list]
+        rata_rata = fitur.mean()
+        X = np.lib.format.open_memmap(os.path.join(tmp, 'X.npy'), mode='w+', dtype=np.float32,
+                                      shape=(len(df), len(fitur_list)))
+        for awal in range(0, len(df), UKURAN_BLOK):
+            blok = fitur.iloc[awal:awal + UKURAN_BLOK].fillna(rata_rata)
+            X[awal:awal + len(blok)] = scaler.transform(blok)
+        X.flush()
+        del X
+
+        kode_stasiun, nama_stasiun = pd.factorize(df[STATION_COL_NAME].astype(str))
+        np.save(os.path.join(tmp, 'y.npy'), df[TARGET_COL].to_numpy(bool))
+        np.save(os.path.join(tmp, 'tanggal.npy'), df['tanggal_lengkap'].to_numpy('datetime64[ns]').astype(np.int64))
+        np.save(os.path.join(tmp, 'stasiun.npy'), kode_stasiun.astype(np.int32))
+        meta = {'kunci': kunci, 'versi': VERSI_MATRIX, 'n_baris': len(df), 'fitur_list': list(fitur_list),
+                'nama_stasiun': list(nama_stasiun), 'dibuat_pada': time.strftime('%Y-%m-%d %H:%M:%S')}
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+        try:
+            os.rename(tmp, tujuan)
+        except OSError:
+            # Proses lain sudah menerbitkan kunci yang sama
+            if not os.path.exists(os.path.join(tujuan, 'meta.json')):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return tujuan
+
+
+# --- C. BUKA ARTEFAK (ZERO-COPY) ---
+def open_eval_matrix(cache_dir=CACHE_DIR, rebuild=False, scaler_path=SCALER_PATH, fitur_list_path=FITUR_LIST_PATH):
+    """EvalMatrix untuk dataset & scaler aktif; array dibuka mmap_mode='r', dibangun dulu bila belum ada."""
+    kunci = matrix_key(scaler_path, fitur_list_path)
+    direktori = os.path.join(cache_dir, kunci)
+    if rebuild and os.path.isdir(direktori):
+        shutil.rmtree(direktori)
+    if not os.path.exists(os.path.join(direktori, 'meta.json')):
+        mulai = time.perf_counter()
+        build_eval_matrix(kunci, cache_dir, scaler_path, fitur_list_path)
+        print(f"✅ Matriks evaluasi '{direktori}' dibangun dalam {time.perf_counter() - mulai:.2f} detik.")
+    return open_eval_matrix_dir(direktori)
+
+
+def open_eval_matrix_dir(direktori):
+    """Membuka artefak yang sudah ada dari path direktorinya (mis. di proses worker)."""
+    with open(os.path.join(direktori, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    paths = {nama: os.path.join(direktori, f'{nama}.npy') for nama in ARRAY}
+    arrays = {nama: np.load(path, mmap_mode='r') for nama, path in paths.items()}
+    return EvalMatrix(fitur_list=meta['fitur_list'], nama_stasiun=meta['nama_stasiun'], paths=paths,
+                      kunci=meta['kunci'], **arrays)
+
+
+def test_split(em, test_size=0.2, random_state=42):
+    """(X_test, Y_test) identik dengan train_test_split(X, Y, test_size=0.2, random_state=42) saat pelatihan.
+
+    Hanya indeks yang diacak, sehingga yang disalin dari memmap hanya baris uji.
+    """
+    _, idx_uji = train_test_split(np.arange(len(em.y)), test_size=test_size, random_state=random_state)
+    return em.X[idx_uji], em.y[idx_uji]
+
+
+def prune_eval_cache(kunci_aktif, cache_dir=CACHE_DIR):
+    """Menghapus artefak selain kunci aktif (bukan yang sedang dibangun); mengembalikan jumlah yang dihapus."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    lama = [nama for nama in os.listdir(cache_dir) if nama != kunci_aktif and '.tmp' not in nama]
+    for nama in lama:
+        shutil.rmtree(os.path.join(cache_dir, nama), ignore_errors=True)
+    return len(lama)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Matriks evaluasi bersama (memmap) Atmosfera-X")
+    parser.add_argument('--rebuild', action='store_true', help="Paksa bangun ulang matriks untuk kunci aktif")
+    parser.add_argument('--prune', action='store_true', help="Hapus matriks lama selain kunci aktif")
+    args = parser.parse_args()
+    em = open_eval_matrix(rebuild=args.rebuild)
+    ukuran_mb = sum(os.path.getsize(p) for p in em.paths.values()) / 1e6
+    print(f"Kunci {em.kunci}: {em.X.shape[0]} baris x {em.X.shape[1]} fitur, {len(em.nama_stasiun)} stasiun, "
+          f"{ukuran_mb:.2f} MB di '{os.path.dirname(em.paths['X'])}'")
+    if args.prune:
+        print(f"🧹 {prune_eval_cache(em.kunci)} matriks lama dihapus.")
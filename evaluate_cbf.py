@@ -1,42 +1,29 @@
+import sys
+
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-import pandas as pd
 import numpy as np
 import joblib
 
+from eval_matrix import open_eval_matrix, test_split
+
 # --- 1. Konfigurasi dan Muat Aset ---
-FILE_ADVANCED = 'data_ispu_preprocess_final_ADVANCED.csv'
 MODEL_CBF_PATH = 'model_cbf_rekomendasi.pkl'
-SCALER_PATH = 'scaler_rekomendasi.pkl'
-FITUR_LIST_PATH = 'fitur_list.pkl'
 
 print("--- Memuat Aset dan Data untuk Evaluasi ---")
 try:
-    df_clean = pd.read_csv(FILE_ADVANCED)
+    # X terskala & Y dibaca dari matriks evaluasi bersama (memmap, dibangun sekali per dataset + scaler)
+    eval_data = open_eval_matrix()
     cbf_model = joblib.load(MODEL_CBF_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    fitur_list = joblib.load(FITUR_LIST_PATH)
 except FileNotFoundError as e:
     print(f"❌ ERROR: Aset tidak ditemukan. Pastikan file (.csv, .pkl) sudah dibuat di langkah pelatihan.")
     print(f"Detail: {e}")
-    exit()
+    sys.exit(1)
 
 # --- 2. Persiapan Data Uji (Replikasi Pembagian Data) ---
 
-# Definisikan X dan Y (Menggunakan fitur yang sama seperti saat pelatihan)
-X = df_clean[fitur_list].fillna(df_clean[fitur_list].mean())
-Y = df_clean['kategori_TIDAK SEHAT'] # Target: 1 jika TIDAK SEHAT
-
-# Scaling X (data penuh)
-# Penting: Gunakan scaler yang sudah dilatih (scaler.transform)
-X_scaled = scaler.transform(X)
-
-# Bagi Data Ulang (Wajib menggunakan random_state=42 yang sama)
+# Pembagian ulang dengan random_state=42 yang sama (lihat eval_matrix.test_split)
 # Ini memastikan X_test dan Y_test identik dengan yang digunakan saat pelatihan
-X_train, X_test, Y_train, Y_test = train_test_split(
-    X_scaled, Y, test_size=0.2, random_state=42
-)
+X_test, Y_test = test_split(eval_data)
 
 # --- 3. Evaluasi Model ---
 
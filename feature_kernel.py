@@ -0,0 +1,105 @@
+# feature_kernel.py
+
+import numpy as np
+import pandas as pd
+
+
+# --- A. BLOK STASIUN TERURUT ---
+def _blok_grup(keys):
+    """Urutan stabil per grup + posisi awal blok tiap baris (pada urutan tersebut).
+
+    Urutan baris di dalam grup dipertahankan, sama seperti groupby() pandas. Kunci NaN mendapat kode -1.
+    """
+    codes, _ = pd.factorize(keys)
+    urutan = np.argsort(codes, kind='stable')
+    codes_urut = codes[urutan]
+    idx = np.arange(len(codes_urut))
+    awal = np.r_[True, codes_urut[1:] != codes_urut[:-1]] if len(codes_urut) else np.array([], dtype=bool)
+    awal_blok = np.maximum.accumulate(np.where(awal, idx, 0)) if len(idx) else idx
+    return urutan, codes_urut, idx, awal_blok
+
+
+def _kembalikan_urutan(nilai_urut, urutan):
+    hasil = np.empty_like(nilai_urut)
+    hasil[urutan] = nilai_urut
+    return hasil
+
+
+# --- B. KERNEL ---
+def grouped_ffill(df, kolom, group_col='stasiun'):
+    """Forward fill per grup untuk semua kolom sekaligus (setara groupby(group_col)[kolom].ffill())."""
+    urutan, codes_urut, idx, awal_blok = _blok_grup(df[group_col].to_numpy())
+    nilai = df[kolom].to_numpy(np.float64)[urutan]
+
+    # Posisi terakhir yang valid (tidak NaN) sampai baris ini; tidak boleh melewati awal blok
+    posisi_valid = np.where(np.isnan(nilai), -1, idx[:, None])
+    posisi_valid = np.maximum.accumulate(posisi_valid, axis=0) if len(idx) else posisi_valid
+    kolom_idx = np.arange(nilai.shape[1])[None, :]
+    hasil = nilai[np.maximum(posisi_valid, 0), kolom_idx]
+    hasil[(posisi_valid < awal_blok[:, None]) | (codes_urut < 0)[:, None]] = np.nan
+    return pd.DataFrame(_kembalikan_urutan(hasil, urutan), index=df.index, columns=kolom)
+
+
+def compute_lag_roll_features(df, kolom, group_col='stasiun', lags=(1,), windows=(7,), min_periods=1):
+    """Lag dan rata-rata bergulir per grup untuk semua kolom dalam satu lintasan.
+
+    Rata-rata bergulir dihitung dari selisih jumlah kumulatif (cumsum) pada blok grup yang terurut, sehingga
+    setiap window tambahan hanya menambah satu operasi selisih. Seperti rolling(window, min_periods).mean(),
+    NaN diabaikan dan hasilnya NaN bila jumlah observasi < min_periods. Jumlah kumulatif memakai longdouble;
+    hasil berbeda dari rolling pandas paling banyak beberapa ulp.
+
+    Kolom hasil berurutan per kolom sumber: {col}_lag{k} untuk setiap lag, lalu {col}_roll{w} untuk setiap window.
+    """
+    urutan, codes_urut, idx, awal_blok = _blok_grup(df[group_col].to_numpy())
+    nilai = df[kolom].to_numpy(np.float64)[urutan]
+    tanpa_grup = codes_urut < 0
+    fitur = {}
+
+    for k in lags:
+        lag = np.full_like(nilai, np.nan)
+        if k < len(nilai):
+            lag[k:] = nilai[:len(nilai) - k]
+        lag[(idx - awal_blok < k) | tanpa_grup] = np.nan
+        fitur.update({f'{col}_lag{k}': lag[:, j] for j, col in enumerate(kolom)})
+
+    if windows:
+        valid = ~np.isnan(nilai)
+        nol = np.zeros((1, nilai.shape[1]))
+        jumlah = np.vstack([nol, np.cumsum(np.where(valid, nilai, 0.0).astype(np.longdouble), axis=0)])
+        jumlah_obs = np.vstack([nol, np.cumsum(valid, axis=0)])
+        for w in windows:
+            mulai = np.maximum(awal_blok, idx - w + 1)
+            n_obs = jumlah_obs[idx + 1] - jumlah_obs[mulai]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rata = ((jumlah[idx + 1] - jumlah[mulai]) / n_obs).astype(np.float64)
+            rata[(n_obs < max(min_periods, 1)) | tanpa_grup[:, None]] = np.nan
+            fitur.update({f'{col}_roll{w}': rata[:, j] for j, col in enumerate(kolom)})
+
+    # Urutan akhir: per kolom sumber, lag lalu roll (sama dengan loop lama di preprocessing.py)
+    nama_urut = [nama for col in kolom
+                 for nama in [f'{col}_lag{k}' for k in lags] + [f'{col}_roll{w}' for w in windows]]
+    hasil = np.column_stack([fitur[nama] for nama in nama_urut]) if nama_urut else np.empty((len(idx), 0))
+    return pd.DataFrame(_kembalikan_urutan(hasil, urutan), index=df.index, columns=nama_urut)
+
+
+def verify_feature_kernel(df, kolom, group_col='stasiun', lags=(1, 2, 3), windows=(3, 7, 14, 30), atol=1e-9):
+    """Membandingkan kernel dengan groupby().shift() / groupby().rolling().mean() pandas."""
+    hasil = compute_lag_roll_features(df, kolom, group_col, lags=lags, windows=windows)
+    selisih_maks = 0.0
+    for col in kolom:
+        grup = df.groupby(group_col)[col]
+        for k in lags:
+            acuan = grup.shift(k).to_numpy()
+            selisih_maks = max(selisih_maks, float(np.nanmax(np.abs(hasil[f'{col}_lag{k}'].to_numpy() - acuan), initial=0)))
+            if not np.array_equal(np.isnan(acuan), np.isnan(hasil[f'{col}_lag{k}'].to_numpy())):
+                selisih_maks = np.inf
+        for w in windows:
+            acuan = grup.rolling(w, min_periods=1).mean().reset_index(level=0, drop=True).reindex(df.index).to_numpy()
+            kernel = hasil[f'{col}_roll{w}'].to_numpy()
+            selisih_maks = max(selisih_maks, float(np.nanmax(np.abs(kernel - acuan), initial=0)))
+            if not np.array_equal(np.isnan(acuan), np.isnan(kernel)):
+                selisih_maks = np.inf
+    cocok = selisih_maks <= atol
+    print(f"{'✅ COCOK' if cocok else '❌ TIDAK COCOK'}: lag {list(lags)}, window {list(windows)}, "
+          f"selisih maks {selisih_maks:.3e}")
+    return cocok
@@ -0,0 +1,235 @@
+# generate_synthetic_ispu.py — Generator data ISPU sintetis berskema gabungan (KOLOM_STANDAR)
+#
+# Jalankan:   python generate_synthetic_ispu.py --stations 100 --years 5 --output sintetis_100x5.csv
+#             python generate_synthetic_ispu.py --stations 1000 --years 10 --chunk-days 60 --output besar.csv
+#             python preprocessing.py --chunked   (dengan FILE_DATA diarahkan ke file hasil, untuk uji skala)
+#
+# Data dibangkitkan per blok waktu (chunk_hari x semua stasiun) lalu langsung ditambahkan ke CSV, sehingga
+# memori hanya O(stasiun x chunk_hari). Model per polutan (skala ISPU, log-normal):
+#   log x = log median + level stasiun + musiman tahunan + efek hari kerja
+#           + sigma * (loading * (faktor regional + faktor klaster) + idiosinkratik)
+# Faktor regional, klaster, dan idiosinkratik adalah proses AR(1) yang statusnya dibawa antar chunk,
+# sehingga stasiun satu klaster berkorelasi tinggi. Hari hilang (termasuk gangguan beruntun), nilai polutan
+# kosong, baris 'TIDAK ADA DATA', variasi penulisan nama stasiun, dan duplikat kunci ikut disimulasikan.
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import STATION_MAP
+from merge_data_2020_2021_2022_2023 import KOLOM_STANDAR
+from chunked_preprocessing import peak_rss_mb
+
+OUTPUT_DEFAULT = 'data_kualitas_udara_sintetis.csv'
+CHUNK_HARI = 90
+
+# Polutan: (median ISPU, sigma log, amplitudo musiman, efek hari kerja, peluang nilai kosong)
+PARAMETER_POLUTAN = {
+    'pm10': (50.0, 0.30, 0.20, 0.05, 0.06),
+    'pm25': (74.0, 0.30, 0.25, 0.05, 0.10),
+    'so2':  (34.0, 0.40, 0.15, 0.03, 0.03),
+    'co':   (13.0, 0.45, 0.15, 0.10, 0.02),
+    'o3':   (27.0, 0.55, 0.20, -0.03, 0.02),
+    'no2':  (19.0, 0.55, 0.10, 0.12, 0.02),
+}
+LABEL_KRITIS = {'pm10': 'PM10', 'pm25': 'PM25', 'so2': 'SO2', 'co': 'CO', 'o3': 'O3', 'no2': 'NO2'}
+HARI_PUNCAK = 200  # Puncak musim kemarau (Juli) seperti data historis
+PHI_REGIONAL, PHI_KLASTER, PHI_IDIO = 0.85, 0.70, 0.50
+
+P_HARI_HILANG = 0.02         # hari hilang acak per stasiun
+P_MULAI_GANGGUAN = 0.002     # awal gangguan beruntun (rata-rata PANJANG_GANGGUAN hari)
+PANJANG_GANGGUAN = 7
+P_TIDAK_ADA_DATA = 0.007
+P_TANPA_KRITIS = 0.20
+P_DUPLIKAT = 0.005
+P_VARIAN_NAMA = 0.03
+
+
+# --- A. KATEGORI ISPU ---
+def kategori_ispu(max_ispu):
+    """Kategori ISPU dari nilai maksimum (batas resmi 50/100/199/299)."""
+    return np.select(
+        [max_ispu <= 50, max_ispu <= 100, max_ispu <= 199, max_ispu <= 299],
+        ['BAIK', 'SEDANG', 'TIDAK SEHAT', 'SANGAT TIDAK SEHAT'],
+        default='BERBAHAYA'
+    ).astype(object)
+
+
+# --- B. STASIUN ---
+def daftar_stasiun(n_stasiun):
+    """Lima stasiun DKI nyata lebih dulu, sisanya 'DKI<n> Sintetis <n>' (tetap lolos filter stasiun DKI)."""
+    nyata = sorted(set(STATION_MAP.values()))
+    tambahan = [f"DKI{j + 1} Sintetis {j + 1:04d}" for j in range(len(nyata), n_stasiun)]
+    return (nyata + tambahan)[:n_stasiun]
+
+
+def _varian_nama(nama):
+    """Penulisan lain untuk nama yang sama (alias STATION_MAP berawalan DKI, spasi ganda)."""
+    varian = [k for k, v in STATION_MAP.items() if v == nama and k != nama and k.startswith('DKI')]
+    return varian + [nama.replace(' ', '  ', 1)]
+
+
+class _ProsesAR1:
+    """Proses AR(1) ber-varians 1 dengan status yang dibawa antar chunk."""
+
+    def __init__(self, phi, bentuk, rng):
+        self.phi = phi
+        self.rng = rng
+        self.nilai = rng.standard_normal(bentuk)
+
+    def langkah(self, n_hari):
+        keluaran = np.empty((n_hari,) + self.nilai.shape)
+        skala = np.sqrt(1 - self.phi ** 2)
+        for t in range(n_hari):
+            self.nilai = self.phi * self.nilai + skala * self.rng.standard_normal(self.nilai.shape)
+            keluaran[t] = self.nilai
+        return keluaran
+
+
+# --- C. GENERATOR PER CHUNK ---
+class SyntheticISPUGenerator:
+    """Membangkitkan data gabungan sintetis per blok waktu; iter_chunks() menghasilkan DataFrame KOLOM_STANDAR."""
+
+    def __init__(self, n_stasiun=50, n_tahun=5, mulai='2020-01-01', n_klaster=None, seed=42,
+                 chunk_hari=CHUNK_HARI):
+        self.rng = np.random.default_rng(seed)
+        self.stasiun = np.array(daftar_stasiun(n_stasiun), dtype=object)
+        self.tanggal = pd.date_range(mulai, pd.Timestamp(mulai) + pd.DateOffset(years=n_tahun) - pd.Timedelta(days=1))
+        self.chunk_hari = chunk_hari
+        self.polutan = list(PARAMETER_POLUTAN)
+        n_pol = len(self.polutan)
+        n_klaster = n_klaster or max(1, int(np.sqrt(n_stasiun)))
+
+        param = np.array(list(PARAMETER_POLUTAN.values()))
+        median, self.sigma, self.amplitudo, self.efek_kerja, self.p_kosong = param.T
+        self.log_median = np.log(median)
+        self.klaster = np.arange(n_stasiun) * n_klaster // n_stasiun
+        self.level = self.rng.normal(0, 0.15, (n_stasiun, n_pol))
+        self.loading = self.rng.uniform(0.6, 0.95, (n_stasiun, 1))
+
+        self.regional = _ProsesAR1(PHI_REGIONAL, (1, n_pol), self.rng)
+        self.per_klaster = _ProsesAR1(PHI_KLASTER, (n_klaster, n_pol), self.rng)
+        self.idio = _ProsesAR1(PHI_IDIO, (n_stasiun, n_pol), self.rng)
+        self.sisa_gangguan = np.zeros(n_stasiun, dtype=np.int64)
+        self.varian = {i: _varian_nama(nama) for i, nama in enumerate(self.stasiun[:len(set(STATION_MAP.values()))])}
+
+    @property
+    def n_baris_perkiraan(self):
+        return len(self.tanggal) * len(self.stasiun)
+
+    def _hari_ada(self, n_hari):
+        """Masker (hari, stasiun) baris yang tercatat: hari hilang acak + gangguan beruntun per stasiun."""
+        ada = self.rng.random((n_hari, len(self.stasiun))) >= P_HARI_HILANG
+        for t in range(n_hari):
+            mulai = (self.sisa_gangguan == 0) & (self.rng.random(len(self.stasiun)) < P_MULAI_GANGGUAN)
+            self.sisa_gangguan[mulai] = self.rng.geometric(1 / PANJANG_GANGGUAN, mulai.sum())
+            ada[t] &= self.sisa_gangguan == 0
+            self.sisa_gangguan = np.maximum(self.sisa_gangguan - 1, 0)
+        return ada
+
+    def _chunk(self, tanggal):
+        n_hari, n_pol = len(tanggal), len(self.polutan)
+
+        # 1. Nilai polutan (hari, stasiun, polutan)
+        doy = tanggal.dayofyear.to_numpy()[:, None, None]
+        musiman = self.amplitudo * np.cos(2 * np.pi * (doy - HARI_PUNCAK) / 365.25)
+        hari_kerja = (tanggal.dayofweek.to_numpy() < 5)[:, None, None]
+        efek_kerja = np.where(hari_kerja, self.efek_kerja, -1.5 * self.efek_kerja)
+        bersama = 0.7 * self.regional.langkah(n_hari) + 0.5 * self.per_klaster.langkah(n_hari)[:, self.klaster]
+        bersama /= np.sqrt(0.7 ** 2 + 0.5 ** 2)
+        acak = self.loading * bersama + np.sqrt(1 - self.loading ** 2) * self.idio.langkah(n_hari)
+        nilai = np.exp(self.log_median + self.level + musiman + efek_kerja + self.sigma * acak).round()
+
+        # 2. Hanya baris hari yang tercatat, urut hari lalu stasiun
+        ada = self._hari_ada(n_hari)
+        idx_hari, idx_stasiun = np.nonzero(ada)
+        nilai = nilai[idx_hari, idx_stasiun]
+        n = len(idx_hari)
+
+        # 3. Nilai kosong per polutan dan baris 'TIDAK ADA DATA'
+        nilai[self.rng.random((n, n_pol)) < self.p_kosong] = np.nan
+        tanpa_data = self.rng.random(n) < P_TIDAK_ADA_DATA
+        nilai[tanpa_data] = np.nan
+        semua_kosong = np.isnan(nilai).all(axis=1)
+        max_ispu = np.where(semua_kosong, 0.0, np.nanmax(np.where(semua_kosong[:, None], 0, nilai), axis=1))
+        kritis = np.array([LABEL_KRITIS[p] for p in self.polutan], dtype=object)[
+            np.nanargmax(np.where(np.isnan(nilai), -np.inf, nilai), axis=1)]
+        kritis[semua_kosong | (self.rng.random(n) < P_TANPA_KRITIS)] = np.nan
+        kritis[(kritis == 'PM25') & (self.rng.random(n) < 0.07)] = 'PM2,5'
+        kategori = kategori_ispu(max_ispu)
+        kategori[semua_kosong] = 'TIDAK ADA DATA'
+
+        # 4. Nama stasiun (dengan variasi penulisan untuk stasiun nyata)
+        nama = self.stasiun[idx_stasiun].copy()
+        for i, varian in self.varian.items():
+            pilih = (idx_stasiun == i) & (self.rng.random(n) < P_VARIAN_NAMA)
+            nama[pilih] = self.rng.choice(np.array(varian, dtype=object), pilih.sum())
+
+        tgl = tanggal[idx_hari]
+        df = pd.DataFrame({
+            'periode_data': tgl.year * 100 + tgl.month,
+            'tanggal_lengkap': tgl.strftime('%Y-%m-%d'),
+            'tahun': tgl.year.astype(float), 'bulan': tgl.month.astype(float), 'hari': tgl.day.astype(float),
+            'stasiun': nama,
+            **{p: nilai[:, j] for j, p in enumerate(self.polutan)},
+            'max_ispu': max_ispu, 'parameter_kritis': kritis, 'kategori': kategori,
+        })
+
+        # 5. Duplikat kunci (tanggal, stasiun): pengukuran ulang dengan sedikit selisih
+        duplikat = df[self.rng.random(n) < P_DUPLIKAT].copy()
+        if len(duplikat):
+            duplikat[self.polutan] = (duplikat[self.polutan] + self.rng.integers(-2, 3, (len(duplikat), n_pol))).clip(lower=0)
+            df = pd.concat([df, duplikat], ignore_index=True)
+        return df[KOLOM_STANDAR]
+
+    def iter_chunks(self):
+        for awal in range(0, len(self.tanggal), self.chunk_hari):
+            yield self._chunk(self.tanggal[awal:awal + self.chunk_hari])
+
+
+# --- D. TULIS KE CSV SECARA STREAMING ---
+def generate_to_csv(output=OUTPUT_DEFAULT, n_stasiun=50, n_tahun=5, mulai='2020-01-01', seed=42,
+                    chunk_hari=CHUNK_HARI, n_klaster=None):
+    """Menulis data sintetis chunk demi chunk ke CSV; mengembalikan ringkasan (baris, duplikat, kategori, RSS)."""
+    generator = SyntheticISPUGenerator(n_stasiun, n_tahun, mulai, n_klaster=n_klaster, seed=seed,
+                                       chunk_hari=chunk_hari)
+    print(f"--- 🧪 MEMBANGKITKAN DATA SINTETIS: {n_stasiun} stasiun x {n_tahun} tahun "
+          f"(≈{generator.n_baris_perkiraan:,} slot stasiun-hari) ---")
+    mulai_waktu = time.perf_counter()
+    n_baris, n_duplikat, kategori = 0, 0, {}
+    tmp = output + '.tmp'
+    for i, chunk in enumerate(generator.iter_chunks()):
+        chunk.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        n_baris += len(chunk)
+        n_duplikat += int(chunk.duplicated(['tanggal_lengkap', 'stasiun']).sum())
+        for nama, jumlah in chunk['kategori'].value_counts().items():
+            kategori[nama] = kategori.get(nama, 0) + int(jumlah)
+    os.replace(tmp, output)
+
+    ringkasan = {
+        'output': output, 'baris': n_baris, 'stasiun': n_stasiun, 'hari': len(generator.tanggal),
+        'slot_terisi_persen': round(100 * (n_baris - n_duplikat) / generator.n_baris_perkiraan, 2),
+        'duplikat_kunci': n_duplikat, 'kategori': kategori,
+        'ukuran_mb': round(os.path.getsize(output) / 1e6, 1),
+        'durasi_detik': round(time.perf_counter() - mulai_waktu, 2), 'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    print(f"✅ {n_baris:,} baris ({ringkasan['ukuran_mb']} MB) ditulis ke '{output}' dalam "
+          f"{ringkasan['durasi_detik']} detik; peak RSS {ringkasan['peak_rss_mb']} MB.")
+    print(f"   Slot terisi: {ringkasan['slot_terisi_persen']}% | duplikat kunci: {n_duplikat} | kategori: {kategori}")
+    return ringkasan
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generator data ISPU sintetis (skema gabungan) untuk uji skala")
+    parser.add_argument('--stations', type=int, default=50)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--start', default='2020-01-01')
+    parser.add_argument('--clusters', type=int, default=None, help="Jumlah klaster stasiun berkorelasi (default √S)")
+    parser.add_argument('--chunk-days', type=int, default=CHUNK_HARI)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=OUTPUT_DEFAULT)
+    args = parser.parse_args()
+    generate_to_csv(args.output, args.stations, args.years, args.start, args.seed, args.chunk_days, args.clusters)
@@ -0,0 +1,248 @@
+# incremental_training.py — Pembaruan model CBF secara inkremental (tanpa refit liblinear penuh)
+#
+# Jalankan:   python incremental_training.py --rows baris_baru_advanced.csv   (perbarui aset .pkl dari baris baru)
+#             python incremental_training.py --report                         (bandingkan dengan refit penuh)
+#
+# Scaler diperbarui dengan StandardScaler.partial_fit (mean & varians berjalan). Model LogisticRegression
+# dikonversi menjadi SGDClassifier(loss='log_loss') dengan koefisien, C, dan class_weight yang sama, diperbarui
+# dengan partial_fit hanya dari baris baru, lalu dikembalikan ke LogisticRegression (C & class_weight tetap)
+# agar tipe .pkl stabil bagi threshold_tuning & skrip lain. Kontrak file .pkl tetap: scaler, model, fitur_list.
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+import preprocessing
+from preprocessing import MODEL_CBF_PATH, SCALER_PATH, FITUR_LIST_PATH
+
+KELAS = np.array([False, True])
+N_EPOCH = 5
+ETA0 = 0.01
+
+
+# --- A. KONVERSI & PENYESUAIAN KOEFISIEN ---
+def _bobot_kelas(jumlah_per_kelas, y, class_weight='balanced'):
+    """Bobot sampel sesuai class_weight model: 'balanced' (n / (2 * n_kelas), dari jumlah kumulatif), dict, atau None."""
+    y = np.asarray(y, dtype=int)
+    if class_weight is None:
+        return np.ones(len(y))
+    if isinstance(class_weight, dict):
+        return np.array([class_weight.get(k, 1.0) for k in KELAS])[y]
+    jumlah_per_kelas = np.maximum(jumlah_per_kelas, 1)
+    bobot_kelas = jumlah_per_kelas.sum() / (len(KELAS) * jumlah_per_kelas)
+    return bobot_kelas[y]
+
+
+def _alpha(C, jumlah_per_kelas):
+    """alpha = 1 / (C * n) menyamakan regularisasi L2 SGD dengan objektif liblinear pada n baris latih."""
+    return 1.0 / (C * np.sum(jumlah_per_kelas))
+
+
+def to_online_model(cbf_model, jumlah_per_kelas, random_state=42):
+    """SGDClassifier log-loss dengan koefisien, C, dan class_weight dari model CBF (disimpan sebagai C_ & class_weight_)."""
+    if isinstance(cbf_model, SGDClassifier):
+        # Model SGD yang tersimpan oleh versi lama (tanpa C_) dilatih dengan C=1 & bobot seimbang
+        cbf_model.C_ = getattr(cbf_model, 'C_', 1.0)
+        cbf_model.class_weight_ = getattr(cbf_model, 'class_weight_', 'balanced')
+        return cbf_model
+    jumlah_per_kelas = np.asarray(jumlah_per_kelas, dtype=np.int64)
+    C = float(getattr(cbf_model, 'C', 1.0))
+    model = SGDClassifier(loss='log_loss', alpha=_alpha(C, jumlah_per_kelas), learning_rate='constant',
+                          eta0=ETA0, random_state=random_state)
+    # partial_fit sekali untuk membentuk atribut (classes_, coef_, ...), lalu koefisien ditimpa dari model lama
+    model.partial_fit(np.zeros((1, cbf_model.coef_.shape[1])), KELAS[:1], classes=KELAS)
+    model.coef_ = cbf_model.coef_.astype(np.float64).copy()
+    model.intercept_ = cbf_model.intercept_.astype(np.float64).copy()
+    model.jumlah_per_kelas_ = jumlah_per_kelas
+    model.C_ = C
+    model.class_weight_ = getattr(cbf_model, 'class_weight', 'balanced')
+    return model
+
+
+def to_logistic_model(model):
+    """Kebalikan to_online_model: LogisticRegression(C, class_weight) dengan koefisien hasil SGD.
+
+    Dengan learning_rate='constant' SGD tidak punya state lain, sehingga konversi bolak-balik tidak
+    kehilangan informasi; predict_proba keduanya sama (sigmoid fungsi keputusan).
+    """
+    hasil = preprocessing.buat_model_cbf(C=model.C_, class_weight=model.class_weight_)
+    hasil.classes_ = model.classes_.copy()
+    hasil.coef_ = model.coef_.copy()
+    hasil.intercept_ = model.intercept_.copy()
+    hasil.n_features_in_ = model.coef_.shape[1]
+    hasil.n_iter_ = np.zeros(1, dtype=np.int32)
+    hasil.jumlah_per_kelas_ = model.jumlah_per_kelas_.copy()
+    return hasil
+
+
+def _sesuaikan_ke_skala_baru(model, mean_lama, skala_lama, scaler):
+    """Memetakan koefisien ke ruang scaler yang baru agar fungsi keputusan pada X mentah tidak berubah.
+
+    w·(x - m_lama)/s_lama + b = w'·(x - m_baru)/s_baru + b'  dengan  w' = w * s_baru / s_lama
+    dan  b' = b + w·(m_baru - m_lama)/s_lama.
+    """
+    w = model.coef_[0]
+    model.intercept_ = model.intercept_ + np.dot(w, (scaler.mean_ - mean_lama) / skala_lama)
+    model.coef_ = (w * scaler.scale_ / skala_lama)[None, :]
+
+
+# --- B. PEMBARUAN INKREMENTAL ---
+def update_incremental(scaler, cbf_model, fitur_list, df_baru, n_epoch=N_EPOCH, jumlah_per_kelas=None,
+                       random_state=42):
+    """Memperbarui scaler & model hanya dari df_baru (baris dataset ADVANCED); mengembalikan (scaler, model).
+
+    Model yang dikembalikan selalu LogisticRegression. jumlah_per_kelas (label False/True data latih
+    sebelumnya) hanya diperlukan bila model belum menyimpannya sendiri di atribut jumlah_per_kelas_.
+    """
+    _, X_baru, y_baru = preprocessing.fitur_dan_target(df_baru, fitur_list)
+    # Tetap DataFrame: scaler dilatih dengan nama fitur
+    X_baru = X_baru.astype(np.float64)
+    y_baru = y_baru.to_numpy(bool)
+    if len(X_baru) == 0:
+        return scaler, cbf_model
+
+    if jumlah_per_kelas is None:
+        jumlah_per_kelas = getattr(cbf_model, 'jumlah_per_kelas_', None)
+    if jumlah_per_kelas is None:
+        raise ValueError("jumlah_per_kelas wajib diisi bila model tidak menyimpan jumlah label data latihnya.")
+    model = to_online_model(cbf_model, jumlah_per_kelas)
+
+    # 1. Scaler: mean & varians berjalan, lalu koefisien dipetakan ke skala baru
+    mean_lama, skala_lama = scaler.mean_.copy(), scaler.scale_.copy()
+    scaler.partial_fit(X_baru)
+    _sesuaikan_ke_skala_baru(model, mean_lama, skala_lama, scaler)
+
+    # 2. Model: beberapa epoch partial_fit pada baris baru saja, dengan C & class_weight model asal
+    model.jumlah_per_kelas_ = model.jumlah_per_kelas_ + preprocessing.jumlah_per_kelas(y_baru)
+    model.alpha = _alpha(model.C_, model.jumlah_per_kelas_)
+    X_skala = scaler.transform(X_baru)
+    bobot = _bobot_kelas(model.jumlah_per_kelas_, y_baru, model.class_weight_)
+    rng = np.random.default_rng(random_state)
+    for _ in range(n_epoch):
+        urutan = rng.permutation(len(X_skala))
+        model.partial_fit(X_skala[urutan], y_baru[urutan], sample_weight=bobot[urutan])
+    return scaler, to_logistic_model(model)
+
+
+def _jumlah_kelas_split_latih(n_baris_baru=0):
+    """Jumlah label False/True pada split latih 80% (random_state=42) yang dipakai build_assets_and_train.
+
+    Cadangan untuk model lama yang belum menyimpan jumlah_per_kelas_; n_baris_baru baris terakhir (hasil
+    append) dikeluarkan dulu agar split sama dengan saat model dilatih.
+    """
+    from data_store import read_advanced_dataset
+    y = read_advanced_dataset(columns=['kategori_TIDAK SEHAT'])['kategori_TIDAK SEHAT'].to_numpy(bool)
+    y = y[:len(y) - n_baris_baru]
+    idx_latih, _ = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    return preprocessing.jumlah_per_kelas(y[idx_latih])
+
+
+def update_model_assets(df_baru, n_epoch=N_EPOCH, simpan=True, termasuk_baris_baru=False):
+    """Memuat aset .pkl, memperbaruinya dari df_baru, lalu menyimpan ulang dengan nama file yang sama.
+
+    Jumlah label awal dibaca dari model (jumlah_per_kelas_); model lama tanpa atribut itu memakai split
+    latih dataset ADVANCED. termasuk_baris_baru=True berarti df_baru sudah ditambahkan ke dataset (mode
+    append) sehingga tidak ikut dihitung.
+    """
+    scaler = joblib.load(SCALER_PATH)
+    cbf_model = joblib.load(MODEL_CBF_PATH)
+    fitur_list = joblib.load(FITUR_LIST_PATH)
+    jumlah_per_kelas = None
+    if getattr(cbf_model, 'jumlah_per_kelas_', None) is None:
+        jumlah_per_kelas = _jumlah_kelas_split_latih(len(df_baru) if termasuk_baris_baru else 0)
+
+    mulai = time.perf_counter()
+    scaler, cbf_model = update_incremental(scaler, cbf_model, fitur_list, df_baru, n_epoch=n_epoch,
+                                           jumlah_per_kelas=jumlah_per_kelas)
+    durasi = time.perf_counter() - mulai
+    if simpan:
+        joblib.dump(cbf_model, MODEL_CBF_PATH)
+        joblib.dump(scaler, SCALER_PATH)
+        joblib.dump(fitur_list, FITUR_LIST_PATH)
+    print(f"✅ Model CBF diperbarui secara inkremental dari {len(df_baru)} baris baru dalam {durasi * 1e3:.1f} ms.")
+    return scaler, cbf_model
+
+
+# --- C. LAPORAN: INKREMENTAL vs REFIT PENUH ---
+def _metrik(nama, model, scaler, X_uji, y_uji, durasi):
+    proba = model.predict_proba(scaler.transform(X_uji))[:, 1]
+    prediksi = proba >= 0.5
+    return {
+        'model': nama,
+        'waktu_latih_ms': round(durasi * 1e3, 1),
+        'accuracy': accuracy_score(y_uji, prediksi),
+        'precision': precision_score(y_uji, prediksi, zero_division=0),
+        'recall': recall_score(y_uji, prediksi, zero_division=0),
+        'f1': f1_score(y_uji, prediksi, zero_division=0),
+        'roc_auc': roc_auc_score(y_uji, proba),
+    }
+
+
+def _refit_penuh(X, y):
+    mulai = time.perf_counter()
+    scaler = StandardScaler()
+    X_skala = scaler.fit_transform(X)
+    model = preprocessing.buat_model_cbf().fit(X_skala, y)
+    return scaler, model, time.perf_counter() - mulai
+
+
+def compare_incremental_vs_full(n_hari_baru=(30, 90, 180), n_epoch=N_EPOCH):
+    """Model awal dilatih pada data sebelum n hari terakhir; baris n hari terakhir lalu ditambahkan secara
+    inkremental vs refit penuh. Keduanya dievaluasi pada holdout acak 20% yang sama (tidak pernah dilatih).
+    """
+    from data_store import read_advanced_dataset
+
+    df = read_advanced_dataset()
+    fitur_list, X, y = preprocessing.fitur_dan_target(df, joblib.load(FITUR_LIST_PATH))
+    X, y = X.astype(np.float64), y.to_numpy(bool)
+    idx_latih, idx_uji = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+    tanggal = df['tanggal_lengkap'].to_numpy()
+    hari_unik = np.sort(np.unique(tanggal))
+
+    baris = []
+    for n in n_hari_baru:
+        batas = hari_unik[-n]
+        lama = idx_latih[tanggal[idx_latih] < batas]
+        baru = idx_latih[tanggal[idx_latih] >= batas]
+
+        scaler_awal, model_awal, durasi_awal = _refit_penuh(X.iloc[lama], y[lama])
+        baris.append(_metrik('awal (tanpa data baru)', model_awal, scaler_awal, X.iloc[idx_uji], y[idx_uji], durasi_awal))
+
+        scaler_penuh, model_penuh, durasi_penuh = _refit_penuh(X.iloc[idx_latih], y[idx_latih])
+        baris.append(_metrik('refit penuh liblinear', model_penuh, scaler_penuh, X.iloc[idx_uji], y[idx_uji], durasi_penuh))
+
+        mulai = time.perf_counter()
+        scaler_inc, model_inc = update_incremental(
+            scaler_awal, model_awal, fitur_list, df.iloc[baru], n_epoch=n_epoch,
+            jumlah_per_kelas=preprocessing.jumlah_per_kelas(y[lama]))
+        baris.append(_metrik('inkremental SGD', model_inc, scaler_inc, X.iloc[idx_uji], y[idx_uji],
+                             time.perf_counter() - mulai))
+        for hasil in baris[-3:]:
+            hasil.update({'hari_baru': n, 'baris_lama': len(lama), 'baris_baru': len(baru)})
+
+    laporan = pd.DataFrame(baris)[['hari_baru', 'baris_lama', 'baris_baru', 'model', 'waktu_latih_ms',
+                                   'accuracy', 'precision', 'recall', 'f1', 'roc_auc']]
+    print("--- 📊 INKREMENTAL vs REFIT PENUH (holdout 20%, threshold 0.5) ---")
+    print(laporan.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    return laporan
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pembaruan inkremental model CBF Atmosfera-X")
+    parser.add_argument('--rows', metavar='CSV', help="Baris baru berformat dataset ADVANCED")
+    parser.add_argument('--epochs', type=int, default=N_EPOCH)
+    parser.add_argument('--report', action='store_true', help="Bandingkan akurasi & waktu dengan refit penuh")
+    args = parser.parse_args()
+    if args.report:
+        compare_incremental_vs_full(n_epoch=args.epochs)
+    elif args.rows:
+        update_model_assets(pd.read_csv(args.rows, parse_dates=['tanggal_lengkap']), n_epoch=args.epochs)
+    else:
+        parser.print_help()
@@ -0,0 +1,149 @@
+# ingest_excel.py — Ingest workbook ISPU tahunan secara paralel dengan cache berbasis hash isi file
+#
+# Jalankan:   python ingest_excel.py            (menghasilkan dua CSV antara seperti script lama)
+#             python ingest_excel.py --final    (sekaligus menjalankan merge_ispu_data.final_merge_and_clean)
+#             python ingest_excel.py --no-cache (paksa parsing ulang semua workbook)
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import create_2024_date_column as ispu_2024
+import merge_data_2020_2021_2022_2023 as ispu_2020_2023
+
+# Naikkan VERSI_PARSER bila logika standardisasi berubah agar cache lama tidak dipakai lagi
+CACHE_DIR = '.ingest_cache'
+VERSI_PARSER = 1
+
+
+# --- A. HASH ISI FILE & LOKASI CACHE ---
+def file_sha256(path, ukuran_blok=1 << 20):
+    """SHA-256 dari isi file (bukan nama/mtime), sehingga salinan identik berbagi cache."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for blok in iter(lambda: f.read(ukuran_blok), b''):
+            hasher.update(blok)
+    return hasher.hexdigest()
+
+
+def _cache_path(jenis, sha, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{jenis}_{sha}_v{VERSI_PARSER}.pkl")
+
+
+# --- B. PARSER PER WORKBOOK (DIJALANKAN DI PROSES TERPISAH) ---
+def _parse_tahunan(path, year):
+    """Workbook satu tahun (2020-2023): dibaca sekali lalu diseragamkan."""
+    return ispu_2020_2023.load_and_standardize(path, year)
+
+
+def _parse_2024_2025(path, tahun=(2024, 2025)):
+    """Workbook gabungan 2024/2025: dibaca SEKALI, lalu difilter per tahun dari frame yang sama."""
+    try:
+        df_workbook = pd.read_excel(path, engine='openpyxl')
+    except FileNotFoundError:
+        print(f"❌ ERROR: File {path} tidak ditemukan.")
+        return None
+    bagian = [ispu_2024.fix_2024_2025_date_columns(path, t, df=df_workbook) for t in tahun]
+    bagian = [df for df in bagian if df is not None]
+    if not bagian:
+        return None
+    return ispu_2024.standardize_final_2024_data(pd.concat(bagian, ignore_index=True))
+
+
+PARSER = {
+    'tahunan': _parse_tahunan,
+    '2024_2025': _parse_2024_2025,
+}
+
+
+def _jalankan_tugas(tugas):
+    jenis, path, argumen = tugas
+    return PARSER[jenis](path, *argumen)
+
+
+def default_jobs():
+    """Daftar tugas (jenis, path, argumen) untuk semua workbook di folder dataset."""
+    jobs = [('tahunan', path, (year,)) for year, path in ispu_2020_2023.data_files_subset.items()]
+    jobs.append(('2024_2025', ispu_2024.FILE_INPUT, ()))
+    return jobs
+
+
+# --- C. INGEST PARALEL DENGAN CACHE ---
+def ingest_workbooks(jobs=None, max_workers=None, gunakan_cache=True, cache_dir=CACHE_DIR):
+    """Mem-parse workbook yang belum ada di cache secara paralel; mengembalikan list frame sesuai urutan jobs."""
+    jobs = default_jobs() if jobs is None else jobs
+    os.makedirs(cache_dir, exist_ok=True)
+
+    hasil = [None] * len(jobs)
+    belum = []
+    for i, (jenis, path, argumen) in enumerate(jobs):
+        if not os.path.exists(path):
+            print(f"❌ ERROR: File tidak ditemukan di {path}. Lewati.")
+            continue
+        cache = _cache_path(f"{jenis}{''.join(f'_{a}' for a in argumen)}", file_sha256(path), cache_dir)
+        if gunakan_cache and os.path.exists(cache):
+            hasil[i] = pd.read_pickle(cache)
+        else:
+            belum.append((i, cache))
+
+    print(f"--- 📦 INGEST WORKBOOK: {len(jobs) - len(belum)} dari cache, {len(belum)} perlu di-parse ---")
+    if belum:
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(belum), os.cpu_count() or 1)) as executor:
+            frames = executor.map(_jalankan_tugas, [jobs[i] for i, _ in belum])
+            for (i, cache), df in zip(belum, frames):
+                hasil[i] = df
+                if df is not None:
+                    # Tulis ke file sementara lalu rename agar cache tidak pernah setengah jadi
+                    df.to_pickle(cache + '.tmp')
+                    os.replace(cache + '.tmp', cache)
+    return hasil
+
+
+def build_2020_2023(gunakan_cache=True, max_workers=None):
+    """Workbook 2020-2023 -> data_kualitas_udara_gabungan_2020_2021_2022_2023.csv."""
+    jobs = [job for job in default_jobs() if job[0] == 'tahunan']
+    frames = [df for df in ingest_workbooks(jobs, max_workers=max_workers, gunakan_cache=gunakan_cache)
+              if df is not None]
+    if not frames:
+        print("\n❌ Gagal menggabungkan data karena tidak ada file yang berhasil dimuat.")
+        return None
+    final_df = ispu_2020_2023.merge_standardized(frames)
+    ispu_2020_2023.save_merged(final_df)
+    return final_df
+
+
+def build_2024_2025(gunakan_cache=True):
+    """Workbook 2024/2025 -> ispu_2024_2025_date_fixed.csv."""
+    jobs = [job for job in default_jobs() if job[0] == '2024_2025']
+    frames = [df for df in ingest_workbooks(jobs, max_workers=1, gunakan_cache=gunakan_cache) if df is not None]
+    if not frames:
+        return None
+    frames[0].to_csv(ispu_2024.OUTPUT_CSV, index=False)
+    print(f"✅ Data 2024 & 2025 ({len(frames[0])} baris) disimpan di: {ispu_2024.OUTPUT_CSV}")
+    return frames[0]
+
+
+def main(final=False, gunakan_cache=True, max_workers=None):
+    waktu_mulai = time.perf_counter()
+    # Semua workbook di-parse bersamaan dalam satu pool; build_* kemudian hanya membaca cache
+    ingest_workbooks(max_workers=max_workers, gunakan_cache=gunakan_cache)
+    build_2020_2023()
+    build_2024_2025()
+
+    if final:
+        import merge_ispu_data
+        merge_ispu_data.final_merge_and_clean()
+    print(f"\n⏱️ Ingest selesai dalam {time.perf_counter() - waktu_mulai:.2f} detik.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingest paralel workbook ISPU dengan cache berbasis hash isi")
+    parser.add_argument('--final', action='store_true', help="Jalankan juga penggabungan final (merge_ispu_data.py)")
+    parser.add_argument('--no-cache', action='store_true', help="Abaikan cache dan parse ulang semua workbook")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    main(final=args.final, gunakan_cache=not args.no_cache, max_workers=args.workers)
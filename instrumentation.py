@@ -0,0 +1,288 @@
+# instrumentation.py — Pengukuran waktu per tahap + ekspor metrik format teks Prometheus
+#
+# Aktifkan lewat environment (default mati):
+#   ATMOSFERA_METRICS=1                         aktifkan pengukuran
+#   ATMOSFERA_METRICS_FILE=metrics.prom         tulis metrik ke file (setiap flush, mis. akhir rerun Streamlit)
+#   ATMOSFERA_METRICS_PORT=9464                 sajikan GET /metrics di http://127.0.0.1:<port>
+#
+# Jalankan:   ATMOSFERA_METRICS=1 streamlit run app.py
+#             ATMOSFERA_METRICS=1 ATMOSFERA_METRICS_FILE=build.prom python preprocessing.py
+#             python instrumentation.py --overhead     (biaya per panggilan saat mati vs hidup)
+#
+# Saat mati, stage() mengembalikan satu objek no-op bersama dan @timed hanya memeriksa satu flag, sehingga
+# biaya per panggilan berada di orde ratusan nanodetik. Saat hidup, setiap tahap punya histogram kumulatif
+# (bucket tetap, gaya Prometheus) dan jendela bergulir N observasi terakhir untuk kuantil p50/p90/p99.
+
+import argparse
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+ENV_AKTIF = 'ATMOSFERA_METRICS'
+ENV_FILE = 'ATMOSFERA_METRICS_FILE'
+ENV_PORT = 'ATMOSFERA_METRICS_PORT'
+NAMA_METRIK = 'atmosfera_stage_duration_seconds'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+KUANTIL = (0.5, 0.9, 0.99)
+JENDELA = 1024
+
+_AKTIF = [os.environ.get(ENV_AKTIF, '').lower() in ('1', 'true', 'yes', 'on')]
+
+
+# --- A. HISTOGRAM BERGULIR ---
+class RollingHistogram:
+    """Histogram kumulatif (bucket tetap, sum, count) + ring buffer JENDELA durasi terakhir untuk kuantil."""
+
+    def __init__(self, buckets=BUCKETS, jendela=JENDELA):
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self.counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)  # slot terakhir = +Inf
+        self.total = 0.0
+        self.count = 0
+        self._ring = np.zeros(jendela, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def observe(self, detik):
+        slot = int(np.searchsorted(self.buckets, detik, side='left'))
+        with self._lock:
+            self.counts[slot] += 1
+            self._ring[self.count % len(self._ring)] = detik
+            self.total += detik
+            self.count += 1
+
+    def snapshot(self):
+        """(bucket kumulatif, sum, count, durasi jendela) yang konsisten satu sama lain."""
+        with self._lock:
+            jendela = self._ring[:min(self.count, len(self._ring))].copy()
+            return np.cumsum(self.counts), self.total, self.count, jendela
+
+
+class MetricsRegistry:
+    """Kumpulan histogram per nama tahap."""
+
+    def __init__(self):
+        self._histogram = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, nama):
+        hist = self._histogram.get(nama)
+        if hist is None:
+            with self._lock:
+                hist = self._histogram.setdefault(nama, RollingHistogram())
+        return hist
+
+    def observe(self, nama, detik):
+        self.histogram(nama).observe(detik)
+
+    def stages(self):
+        return sorted(self._histogram)
+
+    def reset(self):
+        with self._lock:
+            self._histogram.clear()
+
+    def summary(self):
+        """Ringkasan per tahap (count, total, p50/p90/p99 jendela) dalam milidetik, untuk dicetak."""
+        baris = []
+        for nama in self.stages():
+            _, total, count, jendela = self._histogram[nama].snapshot()
+            baris.append({'stage': nama, 'count': count, 'total_ms': total * 1e3,
+                          **{f'p{int(q * 100)}_ms': float(np.quantile(jendela, q)) * 1e3 for q in KUANTIL}})
+        return baris
+
+
+REGISTRY = MetricsRegistry()
+
+
+# --- B. API PENGUKURAN ---
+def enable(aktif=True):
+    _AKTIF[0] = bool(aktif)
+
+
+def is_enabled():
+    return _AKTIF[0]
+
+
+class _Timer:
+    """Timer satu tahap; mulai saat dibuat, dicatat sekali saat stop() atau keluar dari blok with."""
+
+    __slots__ = ('nama', 'mulai', 'selesai')
+
+    def __init__(self, nama):
+        self.nama = nama
+        self.selesai = False
+        self.mulai = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stop(self):
+        if not self.selesai:
+            self.selesai = True
+            REGISTRY.observe(self.nama, time.perf_counter() - self.mulai)
+
+
+class _NoOpTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def stop(self):
+        pass
+
+
+_NOOP = _NoOpTimer()
+
+
+def stage(nama):
+    """`with stage('core.cbf_transform'): ...` atau `t = stage(...); ...; t.stop()`; no-op bila mati."""
+    return _Timer(nama) if _AKTIF[0] else _NOOP
+
+
+def timed(nama):
+    """Dekorator pengukur durasi fungsi (termasuk yang berakhir dengan exception)."""
+    def dekorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _AKTIF[0]:
+                return func(*args, **kwargs)
+            mulai = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.observe(nama, time.perf_counter() - mulai)
+        return wrapper
+    return dekorator
+
+
+# --- C. EKSPOR PROMETHEUS ---
+def _label(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _angka(nilai):
+    return '+Inf' if nilai == np.inf else repr(float(nilai))
+
+
+def export_prometheus(registry=REGISTRY):
+    """Metrik semua tahap dalam format eksposisi teks Prometheus (histogram kumulatif + summary jendela)."""
+    baris_hist = [f"# HELP {NAMA_METRIK} Durasi per tahap (detik), kumulatif sejak proses dimulai.",
+                  f"# TYPE {NAMA_METRIK} histogram"]
+    nama_jendela = f"{NAMA_METRIK.replace('_seconds', '')}_window_seconds"
+    baris_jendela = [f"# HELP {nama_jendela} Kuantil durasi per tahap pada {JENDELA} observasi terakhir.",
+                     f"# TYPE {nama_jendela} summary"]
+    for nama in registry.stages():
+        hist = registry.histogram(nama)
+        kumulatif, total, count, jendela = hist.snapshot()
+        label = f'stage="{_label(nama)}"'
+        for batas, jumlah in zip(list(hist.buckets) + [np.inf], kumulatif):
+            baris_hist.append(f'{NAMA_METRIK}_bucket{{{label},le="{_angka(batas)}"}} {int(jumlah)}')
+        baris_hist.append(f'{NAMA_METRIK}_sum{{{label}}} {_angka(total)}')
+        baris_hist.append(f'{NAMA_METRIK}_count{{{label}}} {count}')
+        for q in KUANTIL:
+            nilai = np.quantile(jendela, q) if len(jendela) else np.nan
+            baris_jendela.append(f'{nama_jendela}{{{label},quantile="{q}"}} {_angka(nilai)}')
+        baris_jendela.append(f'{nama_jendela}_sum{{{label}}} {_angka(jendela.sum())}')
+        baris_jendela.append(f'{nama_jendela}_count{{{label}}} {len(jendela)}')
+    return '\n'.join(baris_hist + baris_jendela) + '\n'
+
+
+def write_prometheus(path, registry=REGISTRY):
+    """Menulis metrik ke file secara atomik (cocok untuk node_exporter textfile collector)."""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(export_prometheus(registry))
+    os.replace(path + '.tmp', path)
+
+
+def flush():
+    """Menulis metrik ke ATMOSFERA_METRICS_FILE bila pengukuran aktif dan path diset."""
+    path = os.environ.get(ENV_FILE)
+    if _AKTIF[0] and path:
+        write_prometheus(path)
+
+
+_SERVER = []
+_SERVER_LOCK = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = export_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    """Menyajikan GET /metrics di thread daemon; dipanggil berulang (mis. tiap rerun) hanya membuat satu server."""
+    with _SERVER_LOCK:
+        if not _SERVER:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True, name='metrics-http').start()
+            _SERVER.append(server)
+    return _SERVER[0]
+
+
+def start_from_env():
+    """Menjalankan endpoint /metrics bila pengukuran aktif dan ATMOSFERA_METRICS_PORT diset."""
+    port = os.environ.get(ENV_PORT)
+    if _AKTIF[0] and port:
+        serve_metrics(int(port))
+
+
+# --- D. BIAYA OVERHEAD ---
+def measure_overhead(n=200_000):
+    """Biaya rata-rata per panggilan stage() dan @timed (nanodetik) saat mati dan saat hidup."""
+    @timed('overhead.timed')
+    def kosong():
+        return None
+
+    def ukur(fungsi):
+        mulai = time.perf_counter()
+        for _ in range(n):
+            fungsi()
+        return (time.perf_counter() - mulai) / n * 1e9
+
+    def pakai_stage():
+        with stage('overhead.stage'):
+            pass
+
+    awal = is_enabled()
+    dasar = ukur(lambda: None)
+    hasil = {}
+    for aktif in (False, True):
+        enable(aktif)
+        hasil['hidup' if aktif else 'mati'] = {'stage_ns': ukur(pakai_stage) - dasar, 'timed_ns': ukur(kosong) - dasar}
+    enable(awal)
+    for kondisi, nilai in hasil.items():
+        print(f"{kondisi:<6} stage(): {nilai['stage_ns']:8.0f} ns/panggilan | @timed: {nilai['timed_ns']:8.0f} ns/panggilan")
+    return hasil
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Instrumentasi waktu per tahap Atmosfera-X")
+    parser.add_argument('--overhead', action='store_true', help="Ukur biaya per panggilan saat mati vs hidup")
+    args = parser.parse_args()
+    if args.overhead:
+        measure_overhead()
+    else:
+        parser.print_help()
@@ -0,0 +1,114 @@
+# load_test_service.py — Uji beban untuk scoring_service.py
+#
+# Jalankan layanan dulu (python scoring_service.py), lalu:
+#   python load_test_service.py --requests 2000 --concurrency 16
+#   python load_test_service.py --endpoint /recommend/batch --batch-size 50
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from data_store import read_advanced_dataset
+from config import STATION_COL_NAME
+
+
+def build_payloads(n_sampel=500, seed=42):
+    """Mengambil contoh baris nyata dari dataset ADVANCED sebagai payload {'stasiun', 'data'}."""
+    df = read_advanced_dataset()
+    sampel = df.sample(n=min(n_sampel, len(df)), random_state=seed)
+    kolom_fitur = [c for c in sampel.columns if c not in ('tanggal_lengkap', STATION_COL_NAME, 'kategori')]
+    payloads = []
+    for _, row in sampel.iterrows():
+        data = {kolom: (bool(row[kolom]) if isinstance(row[kolom], (bool, np.bool_)) else float(row[kolom]))
+                for kolom in kolom_fitur}
+        payloads.append({"stasiun": str(row[STATION_COL_NAME]), "data": data})
+    return payloads
+
+
+async def _kirim(reader, writer, host, path, body):
+    """Mengirim satu POST keep-alive dan membaca respons lengkap; mengembalikan status HTTP."""
+    request = (
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode('latin-1') + body
+    writer.write(request)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    panjang = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        nama, _, nilai = line.decode('latin-1').partition(':')
+        if nama.strip().lower() == 'content-length':
+            panjang = int(nilai.strip())
+    await reader.readexactly(panjang)
+    return status
+
+
+async def _worker(host, port, path, bodies, antrean, latensi, gagal):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                i = antrean.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            mulai = time.perf_counter()
+            status = await _kirim(reader, writer, host, path, bodies[i % len(bodies)])
+            latensi.append(time.perf_counter() - mulai)
+            if status != 200:
+                gagal.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, path, n_requests, concurrency, batch_size):
+    payloads = build_payloads()
+    if path.endswith('/batch'):
+        bodies = [
+            json.dumps({"items": payloads[i:i + batch_size]}).encode('utf-8')
+            for i in range(0, len(payloads), batch_size)
+        ]
+    else:
+        bodies = [json.dumps(p).encode('utf-8') for p in payloads]
+
+    antrean = asyncio.Queue()
+    for i in range(n_requests):
+        antrean.put_nowait(i)
+    latensi, gagal = [], []
+
+    mulai = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, path, bodies, antrean, latensi, gagal) for _ in range(concurrency)
+    ])
+    durasi = time.perf_counter() - mulai
+
+    latensi_ms = np.array(latensi) * 1000
+    print("\n--- 📈 HASIL UJI BEBAN LAYANAN SKORING ---")
+    print(f"Endpoint        : POST {path}" + (f" (batch {batch_size} item)" if path.endswith('/batch') else ""))
+    print(f"Permintaan      : {len(latensi)} (gagal: {len(gagal)}) | Konkurensi: {concurrency}")
+    print(f"Durasi total    : {durasi:.2f} detik")
+    print(f"Latensi p50     : {np.percentile(latensi_ms, 50):.2f} ms")
+    print(f"Latensi p99     : {np.percentile(latensi_ms, 99):.2f} ms")
+    print(f"Throughput      : {len(latensi) / durasi:.1f} permintaan/detik")
+    if path.endswith('/batch'):
+        print(f"Throughput item : {len(latensi) * batch_size / durasi:.1f} item/detik")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Uji beban scoring_service.py (p50/p99 dan permintaan/detik)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--endpoint', default='/recommend', choices=['/recommend', '/recommend/batch'])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run_load_test(args.host, args.port, args.endpoint, args.requests,
+                              args.concurrency, args.batch_size))
@@ -47,7 +47,11 @@ def load_and_standardize(file_path, year):
     except Exception as e:
         print(f"❌ ERROR saat membaca file {file_path}: {e}. Lewati.")
         return None
+    return standardize_frame(df, year)
 
+
+def standardize_frame(df, year):
+    """Menyeragamkan DataFrame mentah satu tahun (hasil read_excel) ke KOLOM_STANDAR."""
     # Membersihkan nama kolom dan mengubah ke huruf kecil
     df.columns = df.columns.str.strip().str.lower()
     
@@ -124,33 +128,48 @@ data_files_subset = {
     # 2025: os.path.join(dataset, 'ispu_jakarta_2024_2025.xlsx'), # Dihapus Sementara
 }
 
-all_dataframes = []
-
-for year, file_path in data_files_subset.items():
-    df_standard = load_and_standardize(file_path, year)
-    if df_standard is not None:
-        all_dataframes.append(df_standard)
 
-# --- 5. Menggabungkan dan Menyimpan Hasil (Sama) ---
-if all_dataframes:
+def merge_standardized(all_dataframes):
+    """Menggabungkan frame yang sudah seragam dan mengonversi kolom polutan ke numerik."""
     final_df = pd.concat(all_dataframes, ignore_index=True)
     
     # Konversi kolom polutan ke numerik 
     kolom_ispu = ['pm10', 'pm25', 'so2', 'co', 'o3', 'no2', 'max_ispu']
     for col in kolom_ispu:
         final_df[col] = pd.to_numeric(final_df[col], errors='coerce') 
+    return final_df
+
 
-    OUTPUT_FILE = 'data_kualitas_udara_gabungan_2020_2021_2022_2023.csv'
-    final_df.to_csv(OUTPUT_FILE, index=False)
+OUTPUT_FILE = 'data_kualitas_udara_gabungan_2020_2021_2022_2023.csv'
+
+
+def save_merged(final_df, output_file=OUTPUT_FILE):
+    final_df.to_csv(output_file, index=False)
     
     print("\n==============================================")
     print("✅ PROSES GABUNG DATA SELESAI!")
     print(f"Total baris data yang berhasil digabungkan: {len(final_df)}")
-    print(f"Hasil disimpan di: {OUTPUT_FILE}")
+    print(f"Hasil disimpan di: {output_file}")
     print("==============================================")
 
     print("\nContoh data yang sudah seragam:")
     print(final_df[['tanggal_lengkap', 'stasiun', 'pm10', 'pm25', 'max_ispu', 'kategori']].head(10))
 
-else:
-    print("\n❌ Gagal menggabungkan data karena tidak ada file yang berhasil dimuat.")
\ No newline at end of file
+
+def main():
+    all_dataframes = []
+
+    for year, file_path in data_files_subset.items():
+        df_standard = load_and_standardize(file_path, year)
+        if df_standard is not None:
+            all_dataframes.append(df_standard)
+
+    # --- 5. Menggabungkan dan Menyimpan Hasil (Sama) ---
+    if all_dataframes:
+        save_merged(merge_standardized(all_dataframes))
+    else:
+        print("\n❌ Gagal menggabungkan data karena tidak ada file yang berhasil dimuat.")
+
+
+if __name__ == '__main__':
+    main()
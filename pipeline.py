@@ -0,0 +1,314 @@
+# pipeline.py — Runner pipeline data & model dengan graf tahap eksplisit
+#
+# Jalankan:   python pipeline.py                  (jalankan tahap yang input/parameternya berubah)
+#             python pipeline.py --dry-run        (tampilkan tahap yang akan dijalankan/dilewati)
+#             python pipeline.py --force preprocessing
+#             python pipeline.py --only final_merge (tahap ini beserta semua dependensinya)
+#
+# Setiap tahap mencatat sidik jari (SHA-256) dari file input, file kode, dan parameternya di
+# PIPELINE_STATE. Tahap dilewati bila sidik jari sama dan semua outputnya masih utuh.
+# Tahap yang tidak saling bergantung dijalankan paralel.
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ingest_excel import file_sha256
+
+PIPELINE_STATE = '.pipeline_state.json'
+
+
+# --- A. DEFINISI TAHAP ---
+class Stage:
+    """Satu tahap pipeline: fungsi run, file input/output, file kode yang memengaruhi hasil, dan parameter."""
+
+    def __init__(self, nama, run, inputs, outputs, kode=(), params=None, inputs_opsional=()):
+        self.nama = nama
+        self.run = run
+        self.inputs = list(inputs)
+        # Input yang boleh belum ada (mis. baris mode append); ada/tidaknya ikut menentukan sidik jari
+        self.inputs_opsional = list(inputs_opsional)
+        self.outputs = list(outputs)
+        self.kode = list(kode)
+        self.params = params or {}
+
+    def fingerprint(self):
+        """Sidik jari gabungan dari isi semua input & kode serta parameter tahap."""
+        hasher = hashlib.sha256(self.nama.encode())
+        for path in sorted(set(self.inputs) | set(self.kode)):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Input tahap '{self.nama}' tidak ditemukan: {path}")
+            hasher.update(path.encode())
+            hasher.update(file_sha256(path).encode())
+        for path in sorted(set(self.inputs_opsional)):
+            hasher.update(path.encode())
+            hasher.update((file_sha256(path) if os.path.exists(path) else 'tidak ada').encode())
+        hasher.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+        return hasher.hexdigest()
+
+    def output_hashes(self):
+        return {path: file_sha256(path) for path in self.outputs if os.path.exists(path)}
+
+
+def _jalankan_script(script, laporan):
+    """Menjalankan script evaluasi lama apa adanya dan menyimpan keluarannya sebagai laporan."""
+    hasil = subprocess.run([sys.executable, script], capture_output=True, text=True)
+    if hasil.returncode != 0:
+        # Script lama mencetak pesan error ke stdout, traceback ke stderr: sertakan keduanya
+        detail = (hasil.stderr.strip() or hasil.stdout.strip())[-2000:]
+        raise RuntimeError(f"{script} keluar dengan kode {hasil.returncode}:\n{detail}")
+    with open(laporan, 'w', encoding='utf-8') as f:
+        f.write(hasil.stdout)
+
+
+def _run_merge_2020_2023():
+    import ingest_excel
+    ingest_excel.build_2020_2023()
+
+
+def _run_fix_2024_2025():
+    import ingest_excel
+    ingest_excel.build_2024_2025()
+
+
+def _run_final_merge():
+    import merge_ispu_data
+    merge_ispu_data.final_merge_and_clean()
+
+
+def _run_preprocessing():
+    import preprocessing
+    preprocessing.build_assets_and_train()
+
+
+def _run_threshold_tuning():
+    import threshold_tuning
+    threshold_tuning.tune()
+
+
+def _run_backtest():
+    import backtest
+    backtest.run_backtest()
+
+
+def default_stages():
+    """Graf tahap standar: ingest (paralel) -> merge final -> preprocessing & training -> evaluasi (paralel)."""
+    import backtest
+    import create_2024_date_column as ispu_2024
+    import merge_data_2020_2021_2022_2023 as ispu_2020_2023
+    import merge_ispu_data
+    import preprocessing
+    import threshold_tuning
+    from config import THRESHOLD_CONFIG_PATH
+
+    kode_ingest = ['ingest_excel.py']
+    aset_model = [preprocessing.MODEL_CBF_PATH, preprocessing.SCALER_PATH, preprocessing.FITUR_LIST_PATH]
+    return [
+        Stage('merge_2020_2023', _run_merge_2020_2023,
+              inputs=list(ispu_2020_2023.data_files_subset.values()),
+              outputs=[ispu_2020_2023.OUTPUT_FILE],
+              kode=kode_ingest + ['merge_data_2020_2021_2022_2023.py']),
+        Stage('fix_2024_2025', _run_fix_2024_2025,
+              inputs=[ispu_2024.FILE_INPUT],
+              outputs=[ispu_2024.OUTPUT_CSV],
+              kode=kode_ingest + ['create_2024_date_column.py']),
+        Stage('final_merge', _run_final_merge,
+              inputs=[merge_ispu_data.FILE_2020_2023, merge_ispu_data.FILE_2024_2025],
+              outputs=[merge_ispu_data.FINAL_OUTPUT_FILE],
+              kode=['merge_ispu_data.py']),
+        Stage('preprocessing', _run_preprocessing,
+              inputs=[preprocessing.FILE_DATA],
+              inputs_opsional=[preprocessing.FILE_DATA_APPEND],
+              outputs=[preprocessing.OUTPUT_FILE_ADVANCED, preprocessing.OUTPUT_FILE_ADVANCED_FEATHER,
+                       os.path.join(preprocessing.OUTPUT_DIR_PARTISI, 'manifest.json'),
+                       preprocessing.STATE_PATH] + aset_model,
+              kode=['preprocessing.py', 'feature_kernel.py', 'station_encoder.py', 'config.py', 'data_store.py'],
+              params={'POLUTAN_COLS': preprocessing.POLUTAN_COLS, 'LAGS': preprocessing.LAGS,
+                      'WINDOWS': preprocessing.WINDOWS}),
+        Stage('evaluate_cbf', lambda: _jalankan_script('evaluate_cbf.py', 'laporan_evaluasi_cbf.txt'),
+              inputs=[preprocessing.OUTPUT_FILE_ADVANCED] + aset_model,
+              outputs=['laporan_evaluasi_cbf.txt'],
+              kode=['evaluate_cbf.py', 'eval_matrix.py']),
+        Stage('threshold_tuning', _run_threshold_tuning,
+              inputs=[preprocessing.OUTPUT_FILE_ADVANCED] + aset_model,
+              outputs=[THRESHOLD_CONFIG_PATH],
+              kode=['threshold_tuning.py', 'eval_matrix.py'],
+              params={'GRID_C': threshold_tuning.GRID_C, 'GRID_CLASS_WEIGHT': threshold_tuning.GRID_CLASS_WEIGHT,
+                      'N_FOLD': threshold_tuning.N_FOLD}),
+        Stage('tune_and_evaluate', lambda: _jalankan_script('tune_and_evaluate.py', 'laporan_tuning_threshold.txt'),
+              inputs=[preprocessing.OUTPUT_FILE_ADVANCED, THRESHOLD_CONFIG_PATH] + aset_model,
+              outputs=['laporan_tuning_threshold.txt'],
+              kode=['tune_and_evaluate.py', 'eval_matrix.py']),
+        Stage('backtest', _run_backtest,
+              inputs=[preprocessing.OUTPUT_FILE_ADVANCED, THRESHOLD_CONFIG_PATH] + aset_model,
+              outputs=[backtest.OUTPUT_DEFAULT],
+              kode=['backtest.py', 'eval_matrix.py'],
+              params={'TEST_HARI': backtest.TEST_HARI, 'MIN_LATIH_HARI': backtest.MIN_LATIH_HARI}),
+    ]
+
+
+# --- B. GRAF & STATE ---
+def build_graph(stages):
+    """Dependensi diturunkan dari output -> input; memvalidasi output unik dan graf tanpa siklus."""
+    produsen = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if path in produsen:
+                raise ValueError(f"Output '{path}' dihasilkan oleh dua tahap: {produsen[path]} dan {stage.nama}")
+            produsen[path] = stage.nama
+    deps = {stage.nama: sorted({produsen[p] for p in stage.inputs if p in produsen} - {stage.nama})
+            for stage in stages}
+
+    # Validasi siklus (DFS)
+    status = {}
+    def kunjungi(nama, jalur):
+        if status.get(nama) == 'selesai':
+            return
+        if status.get(nama) == 'aktif':
+            raise ValueError(f"Siklus pada graf tahap: {' -> '.join(jalur + [nama])}")
+        status[nama] = 'aktif'
+        for dep in deps[nama]:
+            kunjungi(dep, jalur + [nama])
+        status[nama] = 'selesai'
+    for nama in deps:
+        kunjungi(nama, [])
+    return deps
+
+
+def _dengan_dependensi(nama_target, deps):
+    terpilih, tumpukan = set(), list(nama_target)
+    while tumpukan:
+        nama = tumpukan.pop()
+        if nama not in deps:
+            raise ValueError(f"Tahap tidak dikenal: {nama}")
+        if nama not in terpilih:
+            terpilih.add(nama)
+            tumpukan.extend(deps[nama])
+    return terpilih
+
+
+def load_state(path=PIPELINE_STATE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=PIPELINE_STATE):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _perlu_jalan(stage, state, force):
+    """Alasan tahap harus dijalankan, atau None bila boleh dilewati."""
+    if stage.nama in force:
+        return "dipaksa (--force)"
+    catatan = state.get(stage.nama)
+    if catatan is None:
+        return "belum pernah dijalankan"
+    if catatan.get('fingerprint') != stage.fingerprint():
+        return "input/kode/parameter berubah"
+    if catatan.get('outputs') != stage.output_hashes():
+        return "output hilang atau diubah di luar pipeline"
+    return None
+
+
+# --- C. EKSEKUSI PARALEL ---
+def run_pipeline(stages=None, force=(), only=None, max_workers=None, dry_run=False, state_path=PIPELINE_STATE):
+    """Menjalankan graf tahap; tahap siap (semua dependensi selesai) dijalankan bersamaan."""
+    stages = default_stages() if stages is None else stages
+    per_nama = {stage.nama: stage for stage in stages}
+    deps = build_graph(stages)
+    aktif = _dengan_dependensi(only, deps) if only else set(per_nama)
+    force = set(force)
+
+    state = load_state(state_path)
+    lock = threading.Lock()
+    waktu = {}
+    # Dry run: tahap yang akan dijalankan; turunannya ikut ditandai tanpa menghitung sidik jari
+    # (input mereka belum ditulis ulang, bahkan mungkin belum ada)
+    akan_jalan = set()
+
+    def eksekusi(nama):
+        stage = per_nama[nama]
+        if dry_run:
+            with lock:
+                dependensi_berubah = any(dep in akan_jalan for dep in deps[nama] if dep in aktif)
+            alasan = 'dependensi berubah' if dependensi_berubah else _perlu_jalan(stage, state, force)
+            if alasan is None:
+                return nama, 'dilewati', 0.0, None
+            with lock:
+                akan_jalan.add(nama)
+            return nama, f'akan dijalankan ({alasan})', 0.0, None
+        alasan = _perlu_jalan(stage, state, force)
+        if alasan is None:
+            return nama, 'dilewati', 0.0, None
+        print(f"\n▶️ [{nama}] mulai: {alasan}")
+        mulai = time.perf_counter()
+        stage.run()
+        durasi = time.perf_counter() - mulai
+        hilang = [path for path in stage.outputs if not os.path.exists(path)]
+        if hilang:
+            raise RuntimeError(f"output tidak dihasilkan: {hilang}")
+        with lock:
+            state[nama] = {
+                'fingerprint': stage.fingerprint(),
+                'outputs': stage.output_hashes(),
+                'durasi_detik': round(durasi, 3),
+                'selesai_pada': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            save_state(state, state_path)
+        return nama, f'dijalankan ({alasan})', durasi, None
+
+    selesai, gagal, berjalan = set(), set(), {}
+    mulai_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(aktif) or 1) as executor:
+        while len(selesai) + len(gagal) < len(aktif):
+            for nama in sorted(aktif - selesai - gagal - set(berjalan)):
+                if any(dep in gagal for dep in deps[nama] if dep in aktif):
+                    gagal.add(nama)
+                    waktu[nama] = ('dibatalkan (dependensi gagal)', 0.0)
+                elif all(dep in selesai for dep in deps[nama] if dep in aktif):
+                    berjalan[nama] = executor.submit(eksekusi, nama)
+            if not berjalan:
+                continue
+            beres, _ = wait(list(berjalan.values()), return_when=FIRST_COMPLETED)
+            for nama, future in list(berjalan.items()):
+                if future not in beres:
+                    continue
+                del berjalan[nama]
+                try:
+                    _, status, durasi, _ = future.result()
+                    selesai.add(nama)
+                    waktu[nama] = (status, durasi)
+                except Exception as e:
+                    gagal.add(nama)
+                    waktu[nama] = (f'GAGAL: {e}', 0.0)
+
+    total = time.perf_counter() - mulai_total
+    print("\n--- ⏱️ RINGKASAN PIPELINE ---")
+    for stage in stages:
+        if stage.nama in waktu:
+            status, durasi = waktu[stage.nama]
+            ikon = '❌' if stage.nama in gagal else ('⏭️' if status == 'dilewati' else ('🔜' if dry_run else '✅'))
+            print(f"{ikon} {stage.nama:<20} {durasi:>8.2f} dtk  {status}")
+    print(f"Total waktu: {total:.2f} detik")
+    return not gagal
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pipeline data & model Atmosfera-X dengan skip berbasis sidik jari")
+    parser.add_argument('--force', nargs='*', default=[], metavar='TAHAP', help="Paksa tahap dijalankan ulang")
+    parser.add_argument('--only', nargs='*', default=None, metavar='TAHAP', help="Hanya tahap ini (+ dependensinya)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    sukses = run_pipeline(force=args.force, only=args.only, max_workers=args.workers, dry_run=args.dry_run)
+    sys.exit(0 if sukses else 1)
@@ -1,131 +1,415 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
-import joblib 
+import joblib
+
+from data_store import (
+    write_advanced_dataset, read_advanced_dataset, write_partitioned_dataset, append_partitioned_dataset
+)
+from feature_kernel import grouped_ffill, compute_lag_roll_features
+from station_encoder import normalize_station_series
+from instrumentation import stage, timed, flush as flush_metrics
 
 # --- A. KONFIGURASI DAN DEFINISI ---
-FILE_DATA = 'data_kualitas_udara_gabungan_final.csv' 
+FILE_DATA = 'data_kualitas_udara_gabungan_final.csv'
+# Baris mentah dari mode append; disimpan terpisah karena FILE_DATA adalah output merge_ispu_data
+# (tahap final_merge pipeline) yang bisa ditulis ulang kapan saja dari file sumber
+FILE_DATA_APPEND = 'data_kualitas_udara_append.csv'
 OUTPUT_FILE_ADVANCED = 'data_ispu_preprocess_final_ADVANCED.csv'
+OUTPUT_FILE_ADVANCED_FEATHER = 'data_ispu_preprocess_final_ADVANCED.feather'
+# Salinan terpartisi per stasiun (satu Feather per stasiun + manifest.json) untuk pemuatan selektif
+OUTPUT_DIR_PARTISI = 'data_ispu_preprocess_final_ADVANCED_partisi'
 MODEL_CBF_PATH = 'model_cbf_rekomendasi.pkl'
 SCALER_PATH = 'scaler_rekomendasi.pkl'
 FITUR_LIST_PATH = 'fitur_list.pkl'
+# State untuk mode append: statistik global yang dibekukan + ekor data per stasiun
+STATE_PATH = 'preprocessing_state.pkl'
 
 POLUTAN_COLS = ['pm10', 'pm25', 'so2', 'co', 'o3', 'no2']
 WINDOW_SIZE = 7
+# Lag & window rolling yang dibuat kernel fitur (mis. LAGS = (1, 2, 3), WINDOWS = (3, 7, 14, 30))
+LAGS = (1,)
+WINDOWS = (WINDOW_SIZE,)
+KOLOM_LAG_ROLL = [nama for col in POLUTAN_COLS
+                  for nama in [f'{col}_lag{k}' for k in LAGS] + [f'{col}_roll{w}' for w in WINDOWS]]
+# Jumlah baris terakhir per stasiun yang dibutuhkan untuk melanjutkan semua lag/window
+N_EKOR = max(max(LAGS), max(WINDOWS) - 1)
 
-# --- B. FUNGSI UTAMA: BUILD ASSET & TRAIN MODEL ---
-def build_assets_and_train():
-    print("--- ⚙️ TAHAP 1: MEMUAT DAN MEMBERSIHKAN DATA GABUNGAN ---")
-    
-    try:
-        df = pd.read_csv(FILE_DATA)
-    except FileNotFoundError:
-        print(f"❌ ERROR: File '{FILE_DATA}' tidak ditemukan. Mohon pastikan script merging sudah berjalan.")
-        return
+# Kunci Primer (yang harus unik)
+PRIMARY_KEY = ['stasiun', 'tanggal_lengkap', 'jam']
+# Kolom yang tidak relevan untuk input model
+KOLOM_YANG_DIHAPUS = ['periode_data', 'max_ispu', 'tahun', 'bulan', 'hari', 'parameter_kritis']
 
-    # 1. Pembersihan & Imputasi Dasar
-    df['tanggal_lengkap'] = pd.to_datetime(df['tanggal_lengkap'], errors='coerce')
-    
+
+# --- B. TAHAP FEATURE ENGINEERING (DIPAKAI MODE PENUH & MODE APPEND) ---
+def filter_stasiun_valid(df):
+    """Hanya baris stasiun DKI, dengan nama stasiun kanonik."""
     # Filter Data Leakage (Hanya stasiun valid)
     df = df[df['stasiun'].astype(str).str.startswith('DKI')].copy()
-    
+    # Seragamkan varian penulisan nama stasiun (mis. 'DKI1  Bunderan HI') agar satu stasiun = satu grup & satu kolom OHE
+    df['stasiun'] = normalize_station_series(df['stasiun'])
+    return df
+
+
+def bersihkan_data_gabungan(df, verbose=True):
+    """Parsing tanggal, filter stasiun DKI, hapus duplikat Kunci Primer, lalu urutkan kronologis per stasiun."""
+    df['tanggal_lengkap'] = pd.to_datetime(df['tanggal_lengkap'], errors='coerce')
+    df = filter_stasiun_valid(df)
+
     # --- PERBAIKAN KRITIS #1: Tentukan dan Hapus Duplikat pada Kunci Primer ---
-    
+
     # 1. Pastikan kolom 'jam' dihitung untuk Kunci Primer (Asumsi data Anda harian, jam = 0)
-    df['jam'] = df['tanggal_lengkap'].dt.hour.fillna(0).astype(int) 
-    
-    # 2. Definisikan Kunci Primer (yang harus unik)
-    PRIMARY_KEY = ['stasiun', 'tanggal_lengkap', 'jam']
-    
+    df['jam'] = df['tanggal_lengkap'].dt.hour.fillna(0).astype(int)
+
     initial_rows = len(df)
-    
-    # 3. Menghapus duplikat. Jika ada baris tumpang tindih pada Kunci Primer, hanya ambil yang pertama.
+
+    # 2. Menghapus duplikat. Jika ada baris tumpang tindih pada Kunci Primer, hanya ambil yang pertama.
     df.drop_duplicates(subset=PRIMARY_KEY, keep='first', inplace=True)
-    print(f"   [Pembersihan Duplikat Kunci]: {initial_rows - len(df)} baris duplikat (dengan Kunci Primer yang sama) dihapus.")
-    
+    if verbose:
+        print(f"   [Pembersihan Duplikat Kunci]: {initial_rows - len(df)} baris duplikat (dengan Kunci Primer yang sama) dihapus.")
+
     # --- PERBAIKAN KRITIS #2: Urutkan Data SECARA KETAT sebelum Lag/Roll ---
     # Wajib diurutkan berdasarkan Stasiun, Tanggal, dan Jam secara kronologis.
-    df = df.sort_values(by=PRIMARY_KEY).reset_index(drop=True)
+    return df.sort_values(by=PRIMARY_KEY).reset_index(drop=True)
+
+
+def imputasi_polutan(df, stats=None, ffill_terakhir=None):
+    """ffill per stasiun, isi sisa NaN dengan mean global, batasi outlier (kuantil 0.99).
 
-    # Imputasi & Outlier
+    stats=None menghitung statistik dari df (mode penuh); selain itu statistik beku dipakai (mode append).
+    ffill_terakhir melanjutkan ffill dari nilai terakhir tiap stasiun pada data sebelumnya.
+    """
+    hitung_stats = stats is None
+    if hitung_stats:
+        stats = {'mean_isi': {}, 'batas_atas': {}}
+    ffill_baru = {}
+    bertanggal = df['tanggal_lengkap'].notna()
+    # Imputasi dilakukan per stasiun untuk mengisi gap (Forward Fill), semua polutan dalam satu lintasan
+    df[POLUTAN_COLS] = grouped_ffill(df, POLUTAN_COLS)
     for col in POLUTAN_COLS:
-        # Imputasi dilakukan per stasiun untuk mengisi gap (Forward Fill)
-        df[col] = df.groupby('stasiun')[col].ffill() 
-        df[col] = df[col].fillna(df[col].mean()) # Isi sisa NaN dengan mean global
-        batas_atas = df[col].quantile(0.99)
+        if ffill_terakhir is not None:
+            df[col] = df[col].fillna(df['stasiun'].map(ffill_terakhir[col]))
+        # Nilai ffill terakhir per stasiun (baris tanpa tanggal selalu di urutan akhir, jadi diabaikan)
+        ffill_baru[col] = df.loc[bertanggal, col].groupby(df.loc[bertanggal, 'stasiun']).last()
+        if ffill_terakhir is not None:
+            ffill_baru[col] = ffill_baru[col].combine_first(ffill_terakhir[col])
+
+        if hitung_stats:
+            stats['mean_isi'][col] = df[col].mean()
+        df[col] = df[col].fillna(stats['mean_isi'][col]) # Isi sisa NaN dengan mean global
+        if hitung_stats:
+            stats['batas_atas'][col] = df[col].quantile(0.99)
+        batas_atas = stats['batas_atas'][col]
         df[col] = np.where(df[col] > batas_atas, batas_atas, df[col]) # Batasi outlier
-    
-    print("✅ Pembersihan dan Imputasi Dasar Selesai.")
-    
-    # --- 2. Feature Engineering Siklus Waktu ---
-    # Kolom jam sudah dibuat
+    return df, stats, ffill_baru
+
+
+def tambah_fitur_waktu(df):
+    """Feature Engineering Siklus Waktu (kolom jam sudah dibuat saat pembersihan)."""
     df['hari_dalam_minggu'] = df['tanggal_lengkap'].dt.dayofweek.fillna(0).astype(int) # Senin=0, Minggu=6
     df['nomor_bulan'] = df['tanggal_lengkap'].dt.month.fillna(0).astype(int)
     df['musim'] = (df['nomor_bulan'] % 12 + 3) // 3
+    return df
 
-    # --- 3. ADVANCED FEATURE ENGINEERING (Lagged & Rolling) ---
-    print("\n--- 🧠 TAHAP 2: ADVANCED FEATURE ENGINEERING (Lag/Roll) ---")
 
-    for col in POLUTAN_COLS:
-        # Lagged Features (t-1): Menggunakan GROUPBY untuk mencegah data leak antar stasiun.
-        df[f'{col}_lag1'] = df.groupby('stasiun')[col].shift(1)
-        
-        # Rolling Average (7 hari): Menggunakan GROUPBY dan ROLLING pada data yang sudah diurutkan
-        df[f'{col}_roll{WINDOW_SIZE}'] = df.groupby('stasiun')[col].rolling(
-            window=WINDOW_SIZE, min_periods=1
-        ).mean().reset_index(level=0, drop=True)
-
-    # Isi NaN pada kolom fitur yang baru dibuat (Lag/Roll)
-    lag_roll_cols = [c for c in df.columns if '_lag1' in c or f'_roll{WINDOW_SIZE}' in c]
+def hitung_lag_roll(df):
+    """Lag dan Rolling Average per stasiun (LAGS/WINDOWS); df wajib sudah terurut kronologis per stasiun."""
+    # Satu lintasan untuk semua polutan, per stasiun agar tidak ada data leak antar stasiun
+    fitur = compute_lag_roll_features(df, POLUTAN_COLS, group_col='stasiun', lags=LAGS, windows=WINDOWS)
+    df[list(fitur.columns)] = fitur
+    return df
+
+
+def isi_nan_lag_roll(df, stats):
+    """Mengisi NaN Lag/Roll dengan mean kolom (dihitung bila belum ada di stats)."""
+    lag_roll_cols = [c for c in KOLOM_LAG_ROLL if c in df.columns]
+    mean_lag_roll = stats.setdefault('mean_lag_roll', {})
     for col in lag_roll_cols:
         # Mengisi nilai NaN pada data awal dengan mean kolom tersebut.
-        df[col] = df[col].fillna(df[col].mean())
+        if col not in mean_lag_roll:
+            mean_lag_roll[col] = df[col].mean()
+        df[col] = df[col].fillna(mean_lag_roll[col])
+    return df
+
+
+def one_hot_encode(df, kolom_ohe=None):
+    """OHE stasiun & kategori; kolom_ohe (daftar kolom beku) dipakai agar skema append sama dengan data lama."""
+    if kolom_ohe is None:
+        df_ohe_stasiun = pd.get_dummies(df['stasiun'], prefix='stasiun', dtype=bool)
+        df_ohe_kategori = pd.get_dummies(df['kategori'], prefix='kategori', dtype=bool)
+        df_ohe = pd.concat([df_ohe_stasiun, df_ohe_kategori], axis=1)
+    else:
+        df_ohe = pd.DataFrame({
+            kolom: df[sumber].to_numpy() == kolom[len(sumber) + 1:]
+            for kolom in kolom_ohe
+            for sumber in ('stasiun', 'kategori') if kolom.startswith(f'{sumber}_')
+        }, index=df.index, columns=kolom_ohe)
+    return pd.concat([df, df_ohe], axis=1), list(df_ohe.columns)
+
+
+def _ekor_per_stasiun(df):
+    """N_EKOR baris terakhir (nilai polutan terproses) tiap stasiun sebagai konteks Lag/Roll berikutnya."""
+    bertanggal = df[df['tanggal_lengkap'].notna()]
+    return bertanggal[['stasiun', 'tanggal_lengkap'] + POLUTAN_COLS].groupby('stasiun').tail(N_EKOR).reset_index(drop=True)
+
+
+def build_feature_store(df, state=None):
+    """Pipeline penuh: data gabungan mentah -> dataset ADVANCED + state untuk mode append.
+
+    state=None menghitung statistik global dari df (perilaku asli); state dari build sebelumnya
+    membekukan statistik & skema OHE (dipakai untuk verifikasi mode append).
+    """
+    df = bersihkan_data_gabungan(df)
+
+    stats_beku = None if state is None else state['stats']
+    df, stats, ffill_terakhir = imputasi_polutan(df, stats=stats_beku)
+    stats = {k: dict(v) for k, v in stats.items()}
+    print("✅ Pembersihan dan Imputasi Dasar Selesai.")
+
+    df = tambah_fitur_waktu(df)
+
+    # --- ADVANCED FEATURE ENGINEERING (Lagged & Rolling) ---
+    print("\n--- 🧠 TAHAP 2: ADVANCED FEATURE ENGINEERING (Lag/Roll) ---")
+    df = hitung_lag_roll(df)
+    df = isi_nan_lag_roll(df, stats)
+    ekor = _ekor_per_stasiun(df)
 
     # Hapus semua baris yang mungkin masih memiliki NaN pada kolom krusial (biasanya baris pertama)
     df_clean = df.dropna().reset_index(drop=True)
     print(f"   [Pembersihan NaN Final]: {len(df) - len(df_clean)} baris dengan NaN di Lag/Roll (akibat data sangat awal) dihapus.")
     df = df_clean
-    
-    # --- 4. One-Hot Encoding (OHE) ---
-    df_ohe_stasiun = pd.get_dummies(df['stasiun'], prefix='stasiun', dtype=bool)
-    df_ohe_kategori = pd.get_dummies(df['kategori'], prefix='kategori', dtype=bool)
-    df = pd.concat([df, df_ohe_stasiun, df_ohe_kategori], axis=1)
-
-    # Hapus kolom yang tidak relevan untuk input model
-    KOLOM_YANG_DIHAPUS = ['periode_data', 'max_ispu', 'tahun', 'bulan', 'hari', 'parameter_kritis']
+
+    # --- One-Hot Encoding (OHE) ---
+    df, kolom_ohe = one_hot_encode(df, None if state is None else state['kolom_ohe'])
     df_clean = df.drop(columns=KOLOM_YANG_DIHAPUS, errors='ignore')
-    
-    # Simpan Data Advanced FE
-    df_clean.to_csv(OUTPUT_FILE_ADVANCED, index=False)
-    print(f"✅ Dataset Advanced FE ({len(df_clean)} baris) tersimpan di: {OUTPUT_FILE_ADVANCED}")
 
-    # --- 5. PELATIHAN MODEL CBF & PENYIMPANAN ASET ---
-    print("\n--- 🤖 TAHAP 3: PELATIHAN MODEL CBF & PENYIMPANAN ASET ---")
-    
-    # Definisikan Fitur (X) dan Target (Y)
-    fitur_input = [col for col in df_clean.columns if col not in ['tanggal_lengkap', 'stasiun', 'kategori']]
-    fitur_input = [col for col in fitur_input if not col.startswith('kategori_')] # Hapus kolom OHE kategori dari X
+    state_baru = {
+        'stats': stats,
+        'ffill_terakhir': ffill_terakhir,
+        'ekor': ekor,
+        'kolom_ohe': kolom_ohe,
+        'kolom_output': list(df_clean.columns),
+    }
+    return df_clean, state_baru
 
-    X = df_clean[fitur_input].fillna(0) # Sudah diisi di atas, tapi jaga-jaga
+
+# --- C. MODE APPEND: HANYA BARIS BARU ---
+def baca_data_gabungan(file_data=FILE_DATA, file_append=FILE_DATA_APPEND):
+    """Data gabungan mentah untuk build penuh: FILE_DATA + baris mode append (bila ada), berurutan."""
+    df = pd.read_csv(file_data)
+    if file_append and os.path.exists(file_append):
+        df = pd.concat([df, pd.read_csv(file_append)], ignore_index=True)
+    return df
+
+
+def append_feature_store(df_baru, state=None, simpan=True):
+    """Memproses hanya baris baru memakai ekor data & statistik beku per stasiun, lalu menambahkannya ke feature store.
+
+    Baris baru harus lebih baru dari data terakhir stasiunnya; data yang datang terlambat memerlukan build penuh.
+    """
+    if state is None:
+        state = joblib.load(STATE_PATH)
+    ekor = state['ekor']
+    tanggal_terakhir = ekor.groupby('stasiun')['tanggal_lengkap'].max()
+
+    df_mentah = df_baru.copy()
+    df = bersihkan_data_gabungan(df_baru.copy())
+
+    # Baris dengan kunci yang sudah ada dibuang (keep='first' seperti build penuh); baris yang lebih lama ditolak
+    batas = df['stasiun'].map(tanggal_terakhir)
+    sama = df['tanggal_lengkap'] == batas
+    lebih_lama = df['tanggal_lengkap'] < batas
+    if lebih_lama.any():
+        raise ValueError(
+            f"{int(lebih_lama.sum())} baris baru lebih lama dari data terakhir stasiunnya; jalankan build penuh."
+        )
+    if sama.any():
+        print(f"   [Append]: {int(sama.sum())} baris dengan Kunci Primer yang sudah ada dilewati.")
+        df = df[~sama].reset_index(drop=True)
+
+    stasiun_baru = sorted(set(df['stasiun'].dropna()) - set(tanggal_terakhir.index))
+    if stasiun_baru:
+        print(f"⚠️ Stasiun baru {stasiun_baru} tidak punya kolom OHE di feature store; jalankan build penuh untuk menambahkannya.")
+
+    df, _, ffill_baru = imputasi_polutan(df, stats=state['stats'], ffill_terakhir=state['ffill_terakhir'])
+    df = tambah_fitur_waktu(df)
+
+    # Lag/Roll dihitung pada [ekor per stasiun + baris baru], lalu baris ekor dibuang
+    konteks = pd.concat([
+        ekor.assign(_baru=False),
+        df[['stasiun', 'tanggal_lengkap'] + POLUTAN_COLS].assign(_baru=True),
+    ], ignore_index=True)
+    konteks = konteks.sort_values('stasiun', kind='stable').reset_index(drop=True)
+    konteks = hitung_lag_roll(konteks)
+    kolom_lag_roll = [c for c in KOLOM_LAG_ROLL if c in konteks.columns]
+    hasil_baru = konteks[konteks['_baru']]
+    # Baris baru di konteks tetap berurutan sama seperti df (urut stabil per stasiun)
+    for col in kolom_lag_roll:
+        df[col] = hasil_baru[col].to_numpy()
+    df = isi_nan_lag_roll(df, state['stats'])
+    ekor_baru = _ekor_per_stasiun(pd.concat([ekor, df[ekor.columns]], ignore_index=True)
+                                  .sort_values('stasiun', kind='stable'))
+
+    n_sebelum = len(df)
+    df = df.dropna().reset_index(drop=True)
+    print(f"   [Pembersihan NaN Final]: {n_sebelum - len(df)} baris baru dengan NaN dihapus.")
+    df, _ = one_hot_encode(df, state['kolom_ohe'])
+    df_clean = df.drop(columns=KOLOM_YANG_DIHAPUS, errors='ignore').reindex(columns=state['kolom_output'])
+
+    state_baru = dict(state, ffill_terakhir=ffill_baru, ekor=ekor_baru)
+    if simpan:
+        # Data mentah dicatat di FILE_DATA_APPEND agar build penuh berikutnya (baca_data_gabungan) tetap lengkap
+        kolom_gabungan = pd.read_csv(FILE_DATA, nrows=0).columns
+        df_mentah.reindex(columns=kolom_gabungan).to_csv(
+            FILE_DATA_APPEND, mode='a', header=not os.path.exists(FILE_DATA_APPEND), index=False)
+        df_clean.to_csv(OUTPUT_FILE_ADVANCED, mode='a', header=False, index=False)
+        df_lama = read_advanced_dataset(path=OUTPUT_FILE_ADVANCED_FEATHER, csv_path=OUTPUT_FILE_ADVANCED)
+        write_advanced_dataset(pd.concat([df_lama, df_clean], ignore_index=True), OUTPUT_FILE_ADVANCED_FEATHER)
+        append_partitioned_dataset(df_clean, OUTPUT_DIR_PARTISI)
+        joblib.dump(state_baru, STATE_PATH)
+        print(f"✅ {len(df_clean)} baris baru ditambahkan ke {OUTPUT_FILE_ADVANCED}, {OUTPUT_FILE_ADVANCED_FEATHER} & {OUTPUT_DIR_PARTISI}/")
+    return df_clean, state_baru
+
+
+def verify_append_mode(n_hari_baru=30, atol=1e-9, n_kolom_drift=5):
+    """Memeriksa mekanisme append terhadap build penuh yang memakai statistik BEKU yang sama.
+
+    Ini bukan rebuild sejati: statistik imputasi (mean/kuantil) sengaja dibekukan di kedua sisi, sehingga
+    COCOK hanya berarti append = build penuh dengan state yang sama. Drift statistik setelah append
+    dilaporkan terpisah (informasi, tidak memengaruhi hasil) terhadap build_feature_store sungguhan
+    pada data gabungan (state dihitung ulang).
+    """
+    df_raw = baca_data_gabungan()
+    tanggal = pd.to_datetime(df_raw['tanggal_lengkap'], errors='coerce')
+    batas = np.sort(tanggal.dropna().unique())[-n_hari_baru]
+    baru = tanggal >= batas
+
+    df_lama, state = build_feature_store(df_raw[~baru].copy())
+    df_append, _ = append_feature_store(df_raw[baru].copy(), state=state, simpan=False)
+    df_inkremental = pd.concat([df_lama, df_append], ignore_index=True)
+
+    df_penuh, _ = build_feature_store(df_raw.copy(), state=state)
+
+    # Append menambah baris di belakang; build penuh mengurutkan per stasiun -> bandingkan setelah diurutkan
+    kunci = ['stasiun', 'tanggal_lengkap', 'jam']
+    kiri = df_inkremental.sort_values(kunci).reset_index(drop=True)
+    kanan = df_penuh[df_inkremental.columns].sort_values(kunci).reset_index(drop=True)
+    kolom_angka = kiri.select_dtypes(include='number').columns
+    selisih = float(np.nanmax(np.abs(kiri[kolom_angka].to_numpy(float) - kanan[kolom_angka].to_numpy(float))))
+    lainnya = kiri.drop(columns=kolom_angka).equals(kanan.drop(columns=kolom_angka))
+
+    cocok = len(kiri) == len(kanan) and lainnya and selisih <= atol
+    print(f"{'✅ COCOK' if cocok else '❌ TIDAK COCOK'}: {len(df_append)} baris append, "
+          f"{len(kiri)} vs {len(kanan)} baris, selisih maks numerik {selisih:.3e} (statistik beku)")
+
+    # Drift terhadap rebuild sejati (mean/kuantil imputasi dihitung ulang dari data gabungan)
+    df_rebuild, _ = build_feature_store(df_raw.copy())
+    gabung = kiri.merge(df_rebuild[df_inkremental.columns], on=kunci, how='outer', suffixes=('', '_rebuild'),
+                        indicator=True)
+    sama = gabung['_merge'] == 'both'
+    kolom_drift = [c for c in kolom_angka if c not in kunci]
+    drift = pd.Series({c: float(np.nanmax(np.abs(gabung.loc[sama, c].to_numpy(float)
+                                                 - gabung.loc[sama, f'{c}_rebuild'].to_numpy(float)), initial=0.0))
+                       for c in kolom_drift}).sort_values(ascending=False)
+    n_drift = int((drift > atol).sum())
+    print(f"{'⚠️' if n_drift else '✅'} Drift vs rebuild sejati: {len(df_rebuild)} baris rebuild, "
+          f"{int((gabung['_merge'] == 'left_only').sum())} hanya di append, "
+          f"{int((gabung['_merge'] == 'right_only').sum())} hanya di rebuild, {n_drift} kolom berbeda > {atol:g}")
+    for kolom, nilai in drift.head(n_kolom_drift).items():
+        if nilai > atol:
+            print(f"   {kolom:<24} selisih maks {nilai:.4g}")
+    return cocok
+
+
+def fitur_dan_target(df_clean, fitur_input=None):
+    """Fitur (X) dan target (Y) dari dataset ADVANCED; fitur_input=None menurunkan daftar fitur dari kolom."""
+    if fitur_input is None:
+        # Definisikan Fitur (X) dan Target (Y)
+        fitur_input = [col for col in df_clean.columns if col not in ['tanggal_lengkap', 'stasiun', 'kategori']]
+        fitur_input = [col for col in fitur_input if not col.startswith('kategori_')] # Hapus kolom OHE kategori dari X
+
+    X = df_clean.reindex(columns=fitur_input).fillna(0) # Sudah diisi di atas, tapi jaga-jaga
     Y = df_clean['kategori_TIDAK SEHAT'] # Target: Klasifikasi TIDAK SEHAT (1) atau tidak (0)
+    return fitur_input, X, Y
+
+
+def jumlah_per_kelas(y):
+    """Jumlah label [False, True]; disimpan di model sebagai jumlah_per_kelas_ untuk pembaruan inkremental."""
+    return np.bincount(np.asarray(y, dtype=int), minlength=2)
+
+
+def buat_model_cbf(C=1.0, class_weight='balanced'):
+    return LogisticRegression(solver='liblinear', random_state=42, C=C, class_weight=class_weight)
+
+
+@timed('preprocessing.build_assets_and_train')
+def build_assets_and_train():
+    print("--- ⚙️ TAHAP 1: MEMUAT DAN MEMBERSIHKAN DATA GABUNGAN ---")
+
+    try:
+        with stage('preprocessing.read_csv'):
+            df = baca_data_gabungan()
+    except FileNotFoundError:
+        print(f"❌ ERROR: File '{FILE_DATA}' tidak ditemukan. Mohon pastikan script merging sudah berjalan.")
+        return
+
+    with stage('preprocessing.build_feature_store'):
+        df_clean, state = build_feature_store(df)
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Simpan Data Advanced FE (CSV untuk inspeksi + Feather bertipe untuk pemuatan cepat)
+    with stage('preprocessing.write_outputs'):
+        df_clean.to_csv(OUTPUT_FILE_ADVANCED, index=False)
+        write_advanced_dataset(df_clean, OUTPUT_FILE_ADVANCED_FEATHER)
+        write_partitioned_dataset(df_clean, OUTPUT_DIR_PARTISI)
+        joblib.dump(state, STATE_PATH)
+    print(f"✅ Dataset Advanced FE ({len(df_clean)} baris) tersimpan di: {OUTPUT_FILE_ADVANCED}, {OUTPUT_FILE_ADVANCED_FEATHER} & {OUTPUT_DIR_PARTISI}/")
 
-    X_train, X_test, Y_train, Y_test = train_test_split(X_scaled, Y, test_size=0.2, random_state=42)
-    cbf_model = LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')
-    cbf_model.fit(X_train, Y_train)
+    # --- PELATIHAN MODEL CBF & PENYIMPANAN ASET ---
+    print("\n--- 🤖 TAHAP 3: PELATIHAN MODEL CBF & PENYIMPANAN ASET ---")
+
+    with stage('preprocessing.train'):
+        fitur_input, X, Y = fitur_dan_target(df_clean)
+
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+
+        X_train, X_test, Y_train, Y_test = train_test_split(X_scaled, Y, test_size=0.2, random_state=42)
+        cbf_model = buat_model_cbf()
+        cbf_model.fit(X_train, Y_train)
+        cbf_model.jumlah_per_kelas_ = jumlah_per_kelas(Y_train)
 
     # Simpan Aset Model
-    joblib.dump(cbf_model, MODEL_CBF_PATH)
-    joblib.dump(scaler, SCALER_PATH)
-    joblib.dump(fitur_input, FITUR_LIST_PATH)
-    
+    with stage('preprocessing.save_assets'):
+        joblib.dump(cbf_model, MODEL_CBF_PATH)
+        joblib.dump(scaler, SCALER_PATH)
+        joblib.dump(fitur_input, FITUR_LIST_PATH)
+
     print(f"--- ✅ ASET SIAP! Model, Scaler, dan Fitur List (.pkl) tersimpan.")
 
 # --- EKSEKUSI UTAMA ---
 if __name__ == '__main__':
-    build_assets_and_train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Preprocessing & pelatihan CBF Atmosfera-X")
+    parser.add_argument('--append', metavar='CSV', help="Mode append: proses hanya baris baru dari CSV ini (tanpa melatih ulang)")
+    parser.add_argument('--verify-append', action='store_true', help="Cek mode append terhadap build penuh ulang")
+    parser.add_argument('--chunked', action='store_true',
+                        help="Mode out-of-core: partisi per stasiun di disk (feature store saja, tanpa melatih ulang)")
+    parser.add_argument('--train-incremental', action='store_true',
+                        help="Bersama --append: perbarui scaler & model CBF secara inkremental dari baris baru saja")
+    args = parser.parse_args()
+    if args.verify_append:
+        verify_append_mode()
+    elif args.chunked:
+        import chunked_preprocessing
+        chunked_preprocessing.build_feature_store_chunked()
+    elif args.append:
+        df_append, _ = append_feature_store(pd.read_csv(args.append))
+        if args.train_incremental:
+            import incremental_training
+            incremental_training.update_model_assets(df_append, termasuk_baris_baru=True)
+    else:
+        build_assets_and_train()
+    flush_metrics()
@@ -1,32 +1,99 @@
 # recommender_core.py
 
+import logging
+import os
+
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 import joblib
-import streamlit as st 
+
+from cache_layer import cache_data, cache_resource
+from instrumentation import stage, timed
 
 # Import konfigurasi dari file config.py
 from config import (
-    FILE_ADVANCED, MODEL_CBF_PATH, SCALER_PATH, FITUR_LIST_PATH,
-    OPTIMAL_THRESHOLD, REKOMENDASI_TINDAKAN, STATION_COL_NAME
+    FILE_ADVANCED, MODEL_CBF_PATH, SCALER_PATH, FITUR_LIST_PATH, THRESHOLD_CONFIG_PATH,
+    REKOMENDASI_TINDAKAN, STATION_COL_NAME, POLUTAN_COLS, read_threshold_config
+)
+from data_store import (
+    to_compact_frame, build_feature_frame, dataset_version,
+    read_manifest, read_partitioned_dataset, partitioned_dataset_version
 )
+from station_similarity import (
+    compute_station_similarity, build_station_neighbor_index, top_neighbor_from_similarity,
+    IncrementalStationSimilarity, compute_similarity_tensor
+)
+from station_index import build_station_latest_index
+
+# Kolom minimum untuk matriks/tensor kesamaan antar stasiun
+KOLOM_KESAMAAN = ['tanggal_lengkap', STATION_COL_NAME] + POLUTAN_COLS
+
+
+# --- PELAPORAN ERROR (BISA DIGANTI ADAPTER, MIS. st.error) ---
+logger = logging.getLogger(__name__)
+_error_handler = [logger.error]
+
+
+def set_error_handler(handler):
+    """Mengganti fungsi pelapor error (default: logging); adapter Streamlit memasang st.error."""
+    _error_handler[0] = handler
+
+
+def _laporkan_error(pesan):
+    _error_handler[0](pesan)
 
 
 # --- FUNGSI MUAT ASET DENGAN CACHING ---
 
-@st.cache_data
-def load_data():
-    """Memuat data ISPU dari CSV dan melakukan preprocessing dasar."""
+@cache_data
+@timed('core.load_data')
+def load_data(columns=None, versi_data=None):
+    """Memuat data ISPU lengkap (semua partisi stasiun dibaca paralel; Feather/CSV utuh sebagai cadangan).
+
+    versi_data (lihat data_version) hanya menjadi bagian kunci cache agar data baru terbaca tanpa restart.
+    """
     try:
         # Gunakan data yang sudah dipreprocess
-        df = pd.read_csv(FILE_ADVANCED)
-        df['tanggal_lengkap'] = pd.to_datetime(df['tanggal_lengkap']) 
+        return read_partitioned_dataset(columns=columns)
+    except Exception as e:
+        _laporkan_error(f"Gagal memuat data: {e}. Pastikan '{FILE_ADVANCED}' ada.")
+        return pd.DataFrame()
+
+@cache_data
+@timed('core.load_data_compact')
+def load_data_compact(columns=None, versi_data=None):
+    """Memuat data ISPU dalam representasi ringkas (categorical, float32, one-hot terpadatkan)."""
+    df = load_data(columns=columns, versi_data=versi_data)
+    if df.empty:
         return df
+    return to_compact_frame(df)
+
+def data_version():
+    """Versi data yang aktif: manifest partisi bila ada, selain itu file dataset utuh."""
+    return partitioned_dataset_version() or dataset_version()
+
+@cache_data
+def load_station_list(versi_data=None):
+    """Daftar stasiun kanonik dari manifest partisi tanpa membaca data (cadangan: indeks dari dataset utuh)."""
+    manifest = read_manifest()
+    if manifest is not None:
+        return list(manifest['partisi'])
+    df = load_data(columns=['tanggal_lengkap', STATION_COL_NAME], versi_data=versi_data)
+    return build_station_latest_index(df).stations() if not df.empty else []
+
+@cache_data
+@timed('core.load_station_data')
+def load_station_data(stations, start=None, end=None, columns=None, versi_data=None):
+    """Data ringkas hanya untuk stasiun (dan rentang tanggal) yang diminta; partisi stasiun lain tidak dibaca."""
+    try:
+        df = read_partitioned_dataset(stations=list(stations), start=start, end=end, columns=columns)
     except Exception as e:
-        st.error(f"Gagal memuat data: {e}. Pastikan '{FILE_ADVANCED}' ada.")
+        _laporkan_error(f"Gagal memuat data stasiun {list(stations)}: {e}")
         return pd.DataFrame()
+    return df if df.empty else to_compact_frame(df)
 
-@st.cache_resource
+@cache_resource
+@timed('core.load_ml_assets')
 def load_ml_assets():
     """Memuat model, scaler, dan daftar fitur dari file .pkl."""
     try:
@@ -35,24 +102,53 @@ def load_ml_assets():
         fitur_list = joblib.load(FITUR_LIST_PATH)
         return scaler, cbf_model, fitur_list
     except Exception as e:
-        st.error(f"Gagal memuat aset ML: {e}. Pastikan file .pkl sudah tersedia.")
+        _laporkan_error(f"Gagal memuat aset ML: {e}. Pastikan file .pkl sudah tersedia.")
         return None, None, None
 
-@st.cache_data
+def threshold_config_version():
+    """Versi artefak threshold (mtime & ukuran) agar hasil tuning baru terbaca tanpa restart."""
+    try:
+        info = os.stat(THRESHOLD_CONFIG_PATH)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+@cache_data
+def load_thresholds(versi=None):
+    """(threshold global, {stasiun: threshold}) dari threshold_config.json; OPTIMAL_THRESHOLD sebagai cadangan."""
+    return read_threshold_config(THRESHOLD_CONFIG_PATH)
+
+def get_thresholds():
+    return load_thresholds(threshold_config_version())
+
+@cache_data
+@timed('core.calculate_station_similarity')
 def calculate_station_similarity(df, polutan='pm25'):
     """Menghitung matriks kesamaan antar stasiun menggunakan Cosine Similarity."""
-    df_pivot = df.pivot_table(
-        index='tanggal_lengkap', 
-        columns=STATION_COL_NAME, 
-        values=polutan
-    ).fillna(0)
-    item_similarity_matrix = cosine_similarity(df_pivot.T)
-    item_similarity_df = pd.DataFrame(
-        item_similarity_matrix,
-        index=df_pivot.columns,
-        columns=df_pivot.columns
-    )
-    return item_similarity_df
+    return compute_station_similarity(df, polutan=polutan)
+
+@cache_resource
+def load_similarity_engine(polutan='pm25'):
+    """Mesin kesamaan inkremental yang hidup selama proses (mis. server Streamlit) berjalan."""
+    return IncrementalStationSimilarity(polutan=polutan)
+
+@cache_data
+@timed('core.calculate_station_similarity_incremental')
+def calculate_station_similarity_incremental(df, polutan='pm25'):
+    """Sama seperti calculate_station_similarity, tetapi hanya bacaan baru yang diproses saat data berubah."""
+    return load_similarity_engine(polutan).sync(df).similarity_df()
+
+@cache_data
+@timed('core.calculate_similarity_tensor')
+def calculate_similarity_tensor(df, polutan_cols=None, bobot=None):
+    """Menghitung tensor kesamaan semua polutan (plus matriks gabungan) sebagai satu objek cache."""
+    return compute_similarity_tensor(df, polutan_cols=polutan_cols, bobot=bobot)
+
+@cache_resource
+def load_station_neighbor_index(sim_df, k=None):
+    """Membangun indeks tetangga top-k sekali untuk setiap matriks kesamaan."""
+    return build_station_neighbor_index(sim_df, k=k)
+
 
 
 # --- FUNGSI REKOMENDASI KONDISI AKTUAL SAAT INI (Masyarakat) ---
@@ -74,6 +170,11 @@ def get_actual_recommendation(kategori):
 
 
 # --- FUNGSI REKOMENDASI KEBIJAKAN UNTUK DATA HISTORIS (Pejabat) ---
+REKOMENDASI_HISTORIS_DARURAT = "DARURAT: WFH/Pembatasan Kendaraan & Prioritas RTH."
+REKOMENDASI_HISTORIS_MITIGASI = "MITIGASI: Uji Emisi Ketat & Tinjauan Operasional Industri."
+REKOMENDASI_HISTORIS_RUTIN = "RUTIN: Monitoring & Investasi Jangka Panjang (LEZ/RTH)."
+
+
 def get_historical_pejabat_recommendation(row):
     """Menentukan rekomendasi kebijakan berdasarkan data historis aktual."""
     pm25_val = row.get('pm25', 0)
@@ -82,11 +183,64 @@ def get_historical_pejabat_recommendation(row):
     is_pm_high = pm25_val > 70 
 
     if is_pm_critical:
-        return "DARURAT: WFH/Pembatasan Kendaraan & Prioritas RTH."
+        return REKOMENDASI_HISTORIS_DARURAT
     elif is_pm_high and is_weekday:
-        return "MITIGASI: Uji Emisi Ketat & Tinjauan Operasional Industri."
+        return REKOMENDASI_HISTORIS_MITIGASI
     else:
-        return "RUTIN: Monitoring & Investasi Jangka Panjang (LEZ/RTH)."
+        return REKOMENDASI_HISTORIS_RUTIN
+
+
+# --- VERSI VEKTOR UNTUK SELURUH KOLOM (DASHBOARD HISTORIS) ---
+def get_actual_recommendation_vectorized(kategori):
+    """Sama dengan get_actual_recommendation, tetapi untuk satu kolom: aturan hanya dievaluasi per kategori unik."""
+    kategori = pd.Series(kategori)
+    codes, uniques = pd.factorize(kategori, use_na_sentinel=False)
+    lookup = np.array([get_actual_recommendation(k) for k in uniques], dtype=object)
+    return pd.Series(lookup[codes], index=kategori.index, name=kategori.name)
+
+
+def get_historical_pejabat_recommendation_vectorized(df):
+    """Sama dengan get_historical_pejabat_recommendation, tetapi dengan masker kondisi untuk semua baris."""
+    pm25 = (df['pm25'] if 'pm25' in df.columns else pd.Series(0, index=df.index)).to_numpy(dtype=np.float64)
+    hari = (df['hari_dalam_minggu'] if 'hari_dalam_minggu' in df.columns
+            else pd.Series(0, index=df.index)).to_numpy(dtype=np.float64)
+    hasil = np.select(
+        [pm25 > 100, (pm25 > 70) & (hari < 5)],
+        [REKOMENDASI_HISTORIS_DARURAT, REKOMENDASI_HISTORIS_MITIGASI],
+        default=REKOMENDASI_HISTORIS_RUTIN
+    ).astype(object)
+    return pd.Series(hasil, index=df.index)
+
+
+@cache_data
+@timed('core.compute_historical_recommendations')
+def compute_historical_recommendations(_df, versi_data):
+    """Kolom rekomendasi masyarakat & pejabat untuk seluruh data; dihitung sekali per versi dataset."""
+    return pd.DataFrame({
+        "Rekomendasi_Aktual_Masyarakat": get_actual_recommendation_vectorized(_df["kategori"]),
+        "Rekomendasi_Kebijakan_Pejabat": get_historical_pejabat_recommendation_vectorized(_df),
+    }, index=_df.index)
+
+
+# --- AGREGASI KPI DASHBOARD HISTORIS ---
+@timed('core.compute_dashboard_kpis')
+def compute_dashboard_kpis(df, selected_years):
+    """Filter tahun + KPI dashboard: tren PM2.5 bulanan, PM2.5 global, stasiun kritis, dan rasio sehat."""
+    df_filtered = df[df["tanggal_lengkap"].dt.year.isin(selected_years)].copy()
+    if df_filtered.empty:
+        return {"df_filtered": df_filtered}
+
+    df_filtered["Bulan_Tahun"] = df_filtered["tanggal_lengkap"].dt.strftime("%Y-%m")
+    kpi_monthly = df_filtered.groupby("Bulan_Tahun")["pm25"].mean().reset_index()
+
+    stasiun_tidak_sehat = df_filtered[df_filtered["kategori"] == "TIDAK SEHAT"]["stasiun_normal"].mode()
+    return {
+        "df_filtered": df_filtered,
+        "kpi_monthly": kpi_monthly,
+        "worst_station": stasiun_tidak_sehat.iloc[0] if not stasiun_tidak_sehat.empty else "N/A",
+        "global_pm25": df_filtered["pm25"].mean(),
+        "sehat_ratio": df_filtered["kategori"].str.contains("SEHAT|BAIK", case=False).mean() * 100,
+    }
 
 
 # --- FUNGSI STYLING UNTUK HISTORICAL TRACKING ---
@@ -103,8 +257,46 @@ def highlight_historical_recommendation(val):
         return ''
 
 
+# --- TEKS REKOMENDASI KEBIJAKAN (Pejabat) UNTUK PREDIKSI ---
+REKOMENDASI_PEJABAT_DARURAT = (
+    "TINDAKAN DARURAT: Terapkan kebijakan WFH atau pembatasan kendaraan berat (genap-ganjil) di zona ini selama 24 jam ke depan. "
+    "PERENCANAAN JANGKA MENENGAH: Segera finalisasi insentif bagi pengguna kendaraan listrik dan percepat konversi transportasi publik ke energi bersih."
+)
+REKOMENDASI_PEJABAT_MITIGASI = (
+    "PERKETAT UJI EMISI: Lakukan uji emisi mendadak di jalanan dan di titik keluar/masuk kawasan industri terdekat. "
+    "TATA RUANG: Kaji ulang izin operasional industri yang berdekatan. Tingkatkan efisiensi jalur Transjakarta dan KRL untuk mengurangi penggunaan mobil pribadi."
+)
+REKOMENDASI_PEJABAT_RUTIN = (
+    "PEMBANGUNAN BERKELANJUTAN: Lanjutkan pemantauan rutin dan investasikan dana untuk proyek "
+    "hijau seperti pengembangan kawasan bebas kendaraan bermotor (Low Emission Zone) dan penambahan 20% Ruang Terbuka Hijau (RTH) di lokasi korelasi tinggi."
+)
+
+
+def _format_cf_output(top_similar_stasiun, korelasi_score):
+    """Menyusun teks peringatan situasional CF dari stasiun terdekat."""
+    return (f"Stasiun dengan pola polusi terdekat: **{top_similar_stasiun}** (Korelasi: {korelasi_score:.2f}). "
+            f"Kualitas udara cenderung mengikuti pola lokasi tersebut.")
+
+
+def _format_cf_multi_polutan(top_neighbors):
+    """Menyusun teks peringatan CF per polutan dan gabungan dari StationSimilarityTensor.top_neighbors."""
+    if not top_neighbors:
+        return "Tidak ada peringatan korelasi multi-polutan."
+    bagian = [
+        f"{polutan.upper()}: {stasiun} ({skor:.2f})"
+        for polutan, (stasiun, skor) in top_neighbors.items() if polutan != 'gabungan'
+    ]
+    teks = "Tetangga terdekat per polutan — " + "; ".join(bagian) + "."
+    if 'gabungan' in top_neighbors:
+        stasiun, skor = top_neighbors['gabungan']
+        teks += f" Pola gabungan terdekat: **{stasiun}** (Skor: {skor:.2f})."
+    return teks
+
+
 # --- FUNGSI UTAMA REKOMENDASI HYBRID (PREDIKSI) ---
-def get_hybrid_recommendation(data_input_df, target_stasiun, sim_df, scaler, cbf_model, fitur_list):
+@timed('core.hybrid')
+def get_hybrid_recommendation(data_input_df, target_stasiun, sim_df, scaler, cbf_model, fitur_list,
+                              neighbor_index=None, sim_tensor=None):
     """Menjalankan sistem rekomendasi Hybrid (CBF + CF + Fusion) untuk PREDIKSI."""
     if scaler is None or cbf_model is None:
         return {"Error": "Aset model belum dimuat. Periksa log error."}
@@ -112,11 +304,15 @@ def get_hybrid_recommendation(data_input_df, target_stasiun, sim_df, scaler, cbf
     input_row = data_input_df.iloc[0]
     
     # --- A. Content-Based Filtering (CBF) - PREDIKSI ---
-    data_input_clean = pd.DataFrame([input_row]).reindex(columns=fitur_list).fillna(0)
+    with stage('core.hybrid.cbf_reindex'):
+        data_input_clean = build_feature_frame(pd.DataFrame([input_row]), fitur_list).fillna(0)
     if not data_input_clean.empty and not data_input_clean.isnull().all().all():
-        data_input_scaled = scaler.transform(data_input_clean)
-        cbf_proba = cbf_model.predict_proba(data_input_scaled)[0][1] 
-        cbf_prediction = 1 if cbf_proba >= OPTIMAL_THRESHOLD else 0 
+        with stage('core.hybrid.cbf_transform'):
+            data_input_scaled = scaler.transform(data_input_clean)
+        with stage('core.hybrid.cbf_predict_proba'):
+            cbf_proba = cbf_model.predict_proba(data_input_scaled)[0][1] 
+        threshold_global, threshold_stasiun = get_thresholds()
+        cbf_prediction = 1 if cbf_proba >= threshold_stasiun.get(target_stasiun, threshold_global) else 0 
     else:
         cbf_proba = 0.0
         cbf_prediction = 0
@@ -125,15 +321,14 @@ def get_hybrid_recommendation(data_input_df, target_stasiun, sim_df, scaler, cbf
     
     # --- B. Collaborative Filtering (CF) ---
     cf_output = "Tidak ada peringatan korelasi."
-    if target_stasiun in sim_df.columns:
-        similar_stations = sim_df[target_stasiun].sort_values(ascending=False).index.tolist()
-        if target_stasiun in similar_stations: similar_stations.remove(target_stasiun)
-        
-        if similar_stations:
-            top_similar_stasiun = similar_stations[0] 
-            korelasi_score = sim_df.loc[target_stasiun, top_similar_stasiun]
-            cf_output = (f"Stasiun dengan pola polusi terdekat: **{top_similar_stasiun}** (Korelasi: {korelasi_score:.2f}). "
-                         f"Kualitas udara cenderung mengikuti pola lokasi tersebut.")
+    with stage('core.hybrid.cf_lookup'):
+        if neighbor_index is not None:
+            top_similar = neighbor_index.top_neighbor(target_stasiun)
+        else:
+            top_similar = top_neighbor_from_similarity(sim_df, target_stasiun)
+    if top_similar is not None:
+        top_similar_stasiun, korelasi_score = top_similar
+        cf_output = _format_cf_output(top_similar_stasiun, korelasi_score)
             
     # --- C. Fusion Output dan Rekomendasi Pejabat ---
     pm25_val = input_row.get('pm25', 0)
@@ -142,27 +337,108 @@ def get_hybrid_recommendation(data_input_df, target_stasiun, sim_df, scaler, cbf
     is_pm_high = pm25_val > 70 
 
     if is_pm_critical:
-        rekomendasi_pejabat = (
-            "TINDAKAN DARURAT: Terapkan kebijakan WFH atau pembatasan kendaraan berat (genap-ganjil) di zona ini selama 24 jam ke depan. "
-            "PERENCANAAN JANGKA MENENGAH: Segera finalisasi insentif bagi pengguna kendaraan listrik dan percepat konversi transportasi publik ke energi bersih."
-        )
+        rekomendasi_pejabat = REKOMENDASI_PEJABAT_DARURAT
     elif is_pm_high and is_weekday:
-        rekomendasi_pejabat = (
-            "PERKETAT UJI EMISI: Lakukan uji emisi mendadak di jalanan dan di titik keluar/masuk kawasan industri terdekat. "
-            "TATA RUANG: Kaji ulang izin operasional industri yang berdekatan. Tingkatkan efisiensi jalur Transjakarta dan KRL untuk mengurangi penggunaan mobil pribadi."
-        )
+        rekomendasi_pejabat = REKOMENDASI_PEJABAT_MITIGASI
     else:
-        rekomendasi_pejabat = (
-            "PEMBANGUNAN BERKELANJUTAN: Lanjutkan pemantauan rutin dan investasikan dana untuk proyek "
-            "hijau seperti pengembangan kawasan bebas kendaraan bermotor (Low Emission Zone) dan penambahan 20% Ruang Terbuka Hijau (RTH) di lokasi korelasi tinggi."
-        )
+        rekomendasi_pejabat = REKOMENDASI_PEJABAT_RUTIN
     
     
-    return {
+    hasil = {
         "Stasiun Target": target_stasiun,
         "Status Prediksi (CBF)": "TIDAK SEHAT" if cbf_prediction == 1 else "AMAN/SEDANG",
         "Probabilitas TIDAK SEHAT": cbf_proba,
         "Rekomendasi Tindakan Primer": rekomendasi_utama, 
         "Peringatan Situasional (CF)": cf_output,
         "Rekomendasi Kebijakan (Pejabat)": rekomendasi_pejabat
-    }
\ No newline at end of file
+    }
+    if sim_tensor is not None:
+        with stage('core.hybrid.cf_multi_polutan'):
+            hasil["Peringatan Multi-Polutan (CF)"] = _format_cf_multi_polutan(sim_tensor.top_neighbors(target_stasiun))
+    return hasil
+
+
+# --- FUNGSI REKOMENDASI HYBRID BATCH (BANYAK STASIUN/TANGGAL SEKALIGUS) ---
+@timed('core.hybrid_batch')
+def get_hybrid_recommendation_batch(data_input_df, sim_df, scaler, cbf_model, fitur_list, target_stasiun=None,
+                                    neighbor_index=None, sim_tensor=None):
+    """Menjalankan rekomendasi Hybrid untuk N baris sekaligus (satu transform & satu predict_proba).
+
+    `target_stasiun` boleh berupa satu nama stasiun, daftar sepanjang N baris, atau None
+    (memakai kolom STATION_COL_NAME). Setiap baris hasil identik dengan get_hybrid_recommendation.
+    """
+    if scaler is None or cbf_model is None:
+        return pd.DataFrame({"Error": ["Aset model belum dimuat. Periksa log error."]})
+
+    n_rows = len(data_input_df)
+    if target_stasiun is None:
+        targets = data_input_df[STATION_COL_NAME].to_numpy(dtype=object)
+    elif isinstance(target_stasiun, str):
+        targets = np.full(n_rows, target_stasiun, dtype=object)
+    else:
+        targets = np.asarray(target_stasiun, dtype=object)
+
+    # --- A. Content-Based Filtering (CBF) - PREDIKSI SEKALIGUS ---
+    if n_rows > 0:
+        with stage('core.hybrid_batch.cbf_reindex'):
+            data_input_clean = build_feature_frame(data_input_df, fitur_list).fillna(0)
+        with stage('core.hybrid_batch.cbf_transform'):
+            data_input_scaled = scaler.transform(data_input_clean)
+        with stage('core.hybrid_batch.cbf_predict_proba'):
+            cbf_proba = cbf_model.predict_proba(data_input_scaled)[:, 1]
+    else:
+        cbf_proba = np.zeros(0)
+    threshold_global, threshold_stasiun = get_thresholds()
+    threshold = pd.Series(targets, dtype=object).map(threshold_stasiun).fillna(threshold_global).to_numpy(float)
+    cbf_prediction = (cbf_proba >= threshold).astype(int)
+
+    rekomendasi_utama = pd.Series(cbf_prediction).map(REKOMENDASI_TINDAKAN).fillna("Error dalam prediksi kategori.")
+
+    # --- B. Collaborative Filtering (CF) - LOOKUP TERVEKTORISASI ---
+    if neighbor_index is None:
+        neighbor_index = build_station_neighbor_index(sim_df, k=1)
+    top_names, top_scores = neighbor_index.top_neighbor_table()
+    cf_output = np.full(n_rows, "Tidak ada peringatan korelasi.", dtype=object)
+    target_series = pd.Series(targets)
+    neighbor = target_series.map(top_names)
+    has_neighbor = neighbor.notna().to_numpy()
+    if has_neighbor.any():
+        cf_lookup = {
+            stasiun: _format_cf_output(top_names[stasiun], top_scores[stasiun])
+            for stasiun in pd.unique(targets[has_neighbor])
+        }
+        cf_output[has_neighbor] = target_series[has_neighbor].map(cf_lookup).to_numpy()
+
+    # --- C. Fusion Output dan Rekomendasi Pejabat - MASKING KONDISI ---
+    if 'pm25' in data_input_df.columns:
+        pm25_val = data_input_df['pm25'].to_numpy(dtype=float)
+    else:
+        pm25_val = np.zeros(n_rows)
+    if 'hari_dalam_minggu' in data_input_df.columns:
+        is_weekday = data_input_df['hari_dalam_minggu'].to_numpy(dtype=float) < 5
+    else:
+        is_weekday = np.ones(n_rows, dtype=bool)
+    is_pm_critical = pm25_val > 100
+    is_pm_high = pm25_val > 70
+
+    rekomendasi_pejabat = np.select(
+        [is_pm_critical, is_pm_high & is_weekday],
+        [REKOMENDASI_PEJABAT_DARURAT, REKOMENDASI_PEJABAT_MITIGASI],
+        default=REKOMENDASI_PEJABAT_RUTIN
+    )
+
+    hasil = pd.DataFrame({
+        "Stasiun Target": targets,
+        "Status Prediksi (CBF)": np.where(cbf_prediction == 1, "TIDAK SEHAT", "AMAN/SEDANG"),
+        "Probabilitas TIDAK SEHAT": cbf_proba,
+        "Rekomendasi Tindakan Primer": rekomendasi_utama.to_numpy(),
+        "Peringatan Situasional (CF)": cf_output,
+        "Rekomendasi Kebijakan (Pejabat)": rekomendasi_pejabat
+    }, index=data_input_df.index)
+    if sim_tensor is not None:
+        multi_lookup = {
+            stasiun: _format_cf_multi_polutan(sim_tensor.top_neighbors(stasiun))
+            for stasiun in pd.unique(targets)
+        }
+        hasil["Peringatan Multi-Polutan (CF)"] = target_series.map(multi_lookup).to_numpy()
+    return hasil
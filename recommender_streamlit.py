@@ -0,0 +1,22 @@
+# recommender_streamlit.py — Adapter tipis Streamlit untuk recommender_core
+
+import streamlit as st
+
+import recommender_core
+from cache_layer import set_cache_backend
+
+# Pasang cache dan pelapor error Streamlit ke inti yang bebas Streamlit
+set_cache_backend(data=st.cache_data, resource=st.cache_resource)
+recommender_core.set_error_handler(st.error)
+
+from recommender_core import (  # noqa: E402
+    load_data, load_data_compact, load_ml_assets, load_station_list, load_station_data, data_version,
+    build_station_latest_index, KOLOM_KESAMAAN,
+    calculate_station_similarity, calculate_station_similarity_incremental,
+    calculate_similarity_tensor, load_station_neighbor_index, load_similarity_engine,
+    get_hybrid_recommendation, get_hybrid_recommendation_batch,
+    get_actual_recommendation, get_historical_pejabat_recommendation,
+    get_actual_recommendation_vectorized, get_historical_pejabat_recommendation_vectorized,
+    compute_historical_recommendations, compute_dashboard_kpis, dataset_version, load_thresholds, get_thresholds,
+    highlight_historical_recommendation
+)
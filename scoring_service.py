@@ -0,0 +1,199 @@
+# scoring_service.py — Layanan HTTP asyncio untuk rekomendasi Hybrid
+#
+# Jalankan:   python scoring_service.py --port 8080
+# Endpoint:
+#   GET  /health                -> {"status": "ok", "stasiun": [...]}
+#   POST /recommend             -> body {"stasiun": "...", "data": {"pm25": 120, "hari_dalam_minggu": 2, ...}}
+#   POST /recommend/batch       -> body {"items": [{"stasiun": "...", "data": {...}}, ...]}
+# Hasil setiap item sama persis dengan dict dari hybrid_recommender.get_hybrid_recommendation.
+
+import argparse
+import asyncio
+import json
+import time
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+import hybrid_recommender
+
+# Kolom minimal agar bagian rekomendasi pejabat bisa dihitung
+KOLOM_WAJIB = ['pm25', 'hari_dalam_minggu']
+BATAS_BODY = 8 * 1024 * 1024
+
+
+class RequestError(Exception):
+    """Kesalahan input dari klien (dibalas dengan status 4xx)."""
+
+    def __init__(self, status, pesan):
+        super().__init__(pesan)
+        self.status = status
+        self.pesan = pesan
+
+
+def _json_default(value):
+    """Konversi tipe numpy/pandas agar bisa diserialisasi JSON."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"Tipe {type(value).__name__} tidak bisa diserialisasi")
+
+
+# --- A. LOGIKA SKORING (ASET DIMUAT SEKALI SAAT STARTUP) ---
+class ScoringApp:
+    """Menyimpan aset yang sudah dimuat dan menjawab permintaan skor."""
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.stasiun = [str(s) for s in assets["sim_df"].columns]
+        self.kolom_numerik = set(assets["fitur_list"]) | set(KOLOM_WAJIB)
+
+    @staticmethod
+    def _validate_item(item):
+        if not isinstance(item, dict) or 'stasiun' not in item or not isinstance(item.get('data'), dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Setiap item wajib berisi 'stasiun' dan objek 'data'.")
+        hilang = [kolom for kolom in KOLOM_WAJIB if kolom not in item['data']]
+        if hilang:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Kolom wajib tidak ada di 'data': {hilang}")
+
+    def _input_frame(self, data_list):
+        """DataFrame input dengan kolom fitur dikonversi ke float; nilai non-numerik adalah kesalahan klien."""
+        data_input_df = pd.DataFrame(data_list)
+        kolom = [c for c in data_input_df.columns if c in self.kolom_numerik]
+        try:
+            data_input_df[kolom] = data_input_df[kolom].astype(np.float64)
+        except (ValueError, TypeError) as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Nilai fitur harus numerik: {e}")
+        return data_input_df
+
+    def recommend(self, payload):
+        self._validate_item(payload)
+        data_input_df = self._input_frame([payload['data']])
+        return hybrid_recommender.get_hybrid_recommendation(data_input_df, payload['stasiun'], assets=self.assets)
+
+    def recommend_batch(self, payload):
+        items = payload.get('items') if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Body wajib berisi daftar 'items'.")
+        if not items:
+            return {"results": []}
+        for item in items:
+            self._validate_item(item)
+        # Satu DataFrame untuk semua item: satu transform & satu predict_proba
+        data_input_df = self._input_frame([item['data'] for item in items])
+        targets = [item['stasiun'] for item in items]
+        hasil = hybrid_recommender.get_hybrid_recommendation_batch(data_input_df, targets, assets=self.assets)
+        return {"results": hasil}
+
+
+# --- B. SERVER HTTP/1.1 MINIMAL DI ATAS asyncio STREAMS ---
+class ScoringServer:
+    """Server HTTP keep-alive sederhana; skoring dijalankan di thread pool agar event loop tidak terblokir."""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = {
+            ('GET', '/health'): lambda _: {"status": "ok", "stasiun": self.app.stasiun},
+            ('POST', '/recommend'): self.app.recommend,
+            ('POST', '/recommend/batch'): self.app.recommend_batch,
+        }
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Request line tidak valid.")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            nama, _, nilai = line.decode('latin-1').partition(':')
+            headers[nama.strip().lower()] = nilai.strip()
+
+        try:
+            panjang = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Header Content-Length tidak valid.")
+        if panjang < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Header Content-Length tidak valid.")
+        if panjang > BATAS_BODY:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body terlalu besar.")
+        body = await reader.readexactly(panjang) if panjang else b''
+        return method.upper(), path.split('?', 1)[0], headers, body
+
+    async def _dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Endpoint {method} {path} tidak dikenal.")
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Body bukan JSON yang valid.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, handler, payload)
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        header = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(header.encode('latin-1') + body)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', 'keep-alive').lower() != 'close'
+                    status, payload = HTTPStatus.OK, await self._dispatch(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {"Error": e.pesan}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"Error": str(e)}
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(host='127.0.0.1', port=8080):
+    """Memuat aset sekali lalu melayani permintaan sampai dihentikan."""
+    waktu_mulai = time.perf_counter()
+    assets = hybrid_recommender.load_assets()
+    server = ScoringServer(ScoringApp(assets))
+    print(f"✅ Aset dimuat dalam {time.perf_counter() - waktu_mulai:.2f} detik.")
+
+    tcp_server = await asyncio.start_server(server.handle, host, port)
+    print(f"🚀 Layanan skoring berjalan di http://{host}:{port}")
+    async with tcp_server:
+        await tcp_server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Layanan HTTP rekomendasi Hybrid Atmosfera-X")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n--- Layanan skoring dihentikan ---")
@@ -0,0 +1,101 @@
+# station_encoder.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import STATION_MAP, normalize_station
+
+
+# --- ENCODER STASIUN KANONIK ---
+class StationEncoder:
+    """Nama stasiun mentah -> id integer nama kanonik; normalize_station dijalankan sekali per nama unik.
+
+    Id stabil selama proses berjalan: nama kanonik dari STATION_MAP mendapat id terurut abjad,
+    nama di luar STATION_MAP mendapat id berikutnya sesuai urutan pertama kali terlihat. NaN -> -1.
+    """
+
+    def __init__(self, nama_awal=None):
+        self.nama_kanonik = []
+        self._id_kanonik = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+        for nama in sorted(set(STATION_MAP.values()) if nama_awal is None else nama_awal):
+            self._daftarkan(nama)
+
+    def __len__(self):
+        return len(self.nama_kanonik)
+
+    def _daftarkan(self, nama):
+        kode = self._id_kanonik.get(nama)
+        if kode is None:
+            kode = self._id_kanonik[nama] = len(self.nama_kanonik)
+            self.nama_kanonik.append(nama)
+        return kode
+
+    def _kode_unik(self, uniques):
+        """Id kanonik untuk setiap nama unik; hanya nama yang belum pernah terlihat yang dinormalisasi."""
+        belum = [nama for nama in uniques if nama not in self._memo]
+        if belum:
+            with self._lock:
+                for nama in belum:
+                    if nama not in self._memo:
+                        self._memo[nama] = self._daftarkan(normalize_station(str(nama)))
+        return np.array([self._memo[nama] for nama in uniques], dtype=np.int64)
+
+    def canonical(self, nama):
+        """Nama kanonik untuk satu nama mentah (dipakai jalur per bacaan, mis. streaming)."""
+        if pd.isna(nama):
+            return nama
+        return self.nama_kanonik[self._kode_unik([nama])[0]]
+
+    def encode(self, stasiun):
+        """Array id kanonik per baris (-1 untuk NaN); biayanya O(baris) + O(nama unik)."""
+        if isinstance(stasiun, pd.Categorical) or isinstance(getattr(stasiun, 'dtype', None), pd.CategoricalDtype):
+            kategori = pd.Categorical(stasiun)
+            codes, uniques = kategori.codes.astype(np.int64), kategori.categories
+        else:
+            codes, uniques = pd.factorize(np.asarray(stasiun, dtype=object))
+        peta = self._kode_unik(list(uniques))
+        return np.where(codes >= 0, peta[np.maximum(codes, 0)] if len(peta) else -1, -1)
+
+    def decode(self, ids):
+        """Id kanonik -> nama kanonik (NaN untuk -1)."""
+        nama = np.array(self.nama_kanonik + [np.nan], dtype=object)
+        return nama[np.asarray(ids)]
+
+    def to_categorical(self, stasiun):
+        """Kolom stasiun sebagai Categorical nama kanonik (kategori terurut abjad, hanya yang muncul)."""
+        ids = self.encode(stasiun)
+        ada = np.unique(ids[ids >= 0])
+        kategori = pd.Index([self.nama_kanonik[i] for i in ada])
+        urutan = kategori.argsort()
+        peta = np.full(len(self.nama_kanonik), -1)
+        peta[ada[urutan]] = np.arange(len(ada))
+        codes = np.where(ids >= 0, peta[np.maximum(ids, 0)], -1)
+        return pd.Categorical.from_codes(codes, categories=kategori[urutan])
+
+    def normalize(self, stasiun):
+        """Series nama kanonik (object) dengan index yang sama seperti input."""
+        index = stasiun.index if isinstance(stasiun, pd.Series) else None
+        return pd.Series(self.decode(self.encode(stasiun)), index=index, dtype=object)
+
+
+_ENCODER = None
+_ENCODER_LOCK = threading.Lock()
+
+
+def get_station_encoder():
+    """Encoder bersama untuk satu proses (dibuat sekali, memo nama mentah dipakai ulang antar pemanggil)."""
+    global _ENCODER
+    if _ENCODER is None:
+        with _ENCODER_LOCK:
+            if _ENCODER is None:
+                _ENCODER = StationEncoder()
+    return _ENCODER
+
+
+def normalize_station_series(stasiun):
+    """Pengganti stasiun.apply(normalize_station) yang divektorisasi."""
+    return get_station_encoder().normalize(stasiun)
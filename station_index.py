@@ -0,0 +1,72 @@
+# station_index.py
+
+import numpy as np
+import pandas as pd
+
+from config import STATION_COL_NAME
+from station_encoder import normalize_station_series
+
+
+KOLOM_TANGGAL = 'tanggal_lengkap'
+KOLOM_STASIUN_NORMAL = 'stasiun_normal'
+
+
+def _station_keys(df):
+    """Nama stasiun kanonik per baris; memakai kolom stasiun_normal bila sudah ada."""
+    if KOLOM_STASIUN_NORMAL in df.columns:
+        return df[KOLOM_STASIUN_NORMAL]
+    return normalize_station_series(df[STATION_COL_NAME])
+
+
+# --- INDEKS BACAAN TERAKHIR PER STASIUN ---
+class StationLatestIndex:
+    """Peta stasiun (ternormalisasi) -> posisi baris terurut waktu; baris terbaru tersedia dalam O(1)."""
+
+    def __init__(self):
+        self.df = None
+        self._posisi = {}
+
+    def __len__(self):
+        return 0 if self.df is None else len(self.df)
+
+    def __contains__(self, stasiun):
+        return stasiun in self._posisi
+
+    def build(self, df):
+        """Membangun ulang indeks dari seluruh df."""
+        self.df = df.reset_index(drop=True)
+        kunci = _station_keys(self.df).to_numpy()
+        tanggal = pd.to_datetime(self.df[KOLOM_TANGGAL]).to_numpy()
+        codes, uniques = pd.factorize(kunci)
+        # Urut stabil per (stasiun, tanggal): baris dengan tanggal sama tetap dalam urutan masuk
+        urutan = np.lexsort((tanggal, codes))
+        urutan = urutan[codes[urutan] >= 0]
+        batas = np.flatnonzero(np.diff(codes[urutan])) + 1
+        self._posisi = {uniques[codes[grup[0]]]: grup for grup in np.split(urutan, batas) if len(grup)}
+        return self
+
+    def stations(self):
+        """Daftar stasiun ternormalisasi yang memiliki data, terurut abjad."""
+        return sorted(self._posisi)
+
+    def latest_position(self, stasiun):
+        """Posisi baris terbaru stasiun (None bila stasiun tidak dikenal)."""
+        posisi = self._posisi.get(stasiun)
+        return None if posisi is None else int(posisi[-1])
+
+    def latest_row(self, stasiun):
+        """Baris terbaru stasiun sebagai DataFrame satu baris (kosong bila tidak ada)."""
+        posisi = self.latest_position(stasiun)
+        if posisi is None:
+            return self.df.iloc[[]] if self.df is not None else pd.DataFrame()
+        return self.df.iloc[[posisi]]
+
+    def station_slice(self, stasiun, terbaru_dulu=True):
+        """Semua baris stasiun terurut waktu (default terbaru lebih dulu)."""
+        posisi = self._posisi.get(stasiun, np.array([], dtype=np.int64))
+        return self.df.iloc[posisi[::-1] if terbaru_dulu else posisi]
+
+
+def build_station_latest_index(df):
+    """Membangun StationLatestIndex dari seluruh df."""
+    return StationLatestIndex().build(df)
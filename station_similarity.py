@@ -0,0 +1,359 @@
+# station_similarity.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import FILE_ADVANCED, STATION_COL_NAME, POLUTAN_COLS, BOBOT_POLUTAN_CF
+
+
+# --- A. MATRIKS KESAMAAN STASIUN (CF) ---
+def compute_station_similarity(df, polutan='pm25'):
+    """Menghitung matriks kesamaan antar stasiun menggunakan Cosine Similarity."""
+    # Import saat dipakai: sklearn.metrics cukup berat untuk jalur import headless
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    df_pivot = df.pivot_table(
+        index='tanggal_lengkap',
+        columns=STATION_COL_NAME,
+        values=polutan,
+        observed=True
+    ).fillna(0)
+    # Hitung dalam float64 walaupun data sumber disimpan float32
+    item_similarity_matrix = cosine_similarity(df_pivot.T.astype(np.float64))
+    item_similarity_df = pd.DataFrame(
+        item_similarity_matrix,
+        index=df_pivot.columns,
+        columns=df_pivot.columns
+    )
+    return item_similarity_df
+
+
+# --- B. INDEKS TETANGGA TOP-K (LOOKUP CF O(k)) ---
+class StationNeighborIndex:
+    """Menyimpan id dan skor tetangga top-k setiap stasiun (tanpa dirinya sendiri) sebagai array padat."""
+
+    def __init__(self, stations, neighbor_ids, neighbor_scores):
+        self.stations = np.asarray(stations, dtype=object)
+        self.neighbor_ids = neighbor_ids          # (S, k) int32, urut dari yang paling mirip
+        self.neighbor_scores = neighbor_scores    # (S, k) float64, sejajar dengan neighbor_ids
+        self._posisi = {stasiun: i for i, stasiun in enumerate(self.stations)}
+
+    @property
+    def k(self):
+        return self.neighbor_ids.shape[1]
+
+    def __contains__(self, stasiun):
+        return stasiun in self._posisi
+
+    def neighbors(self, stasiun, k=1):
+        """Mengembalikan daftar (stasiun, skor) sebanyak k tetangga terdekat; [] jika stasiun tidak dikenal."""
+        posisi = self._posisi.get(stasiun)
+        if posisi is None:
+            return []
+        k = self.k if k is None else min(k, self.k)
+        ids = self.neighbor_ids[posisi, :k]
+        scores = self.neighbor_scores[posisi, :k]
+        return [(self.stations[i], scores[j]) for j, i in enumerate(ids)]
+
+    def top_neighbor(self, stasiun):
+        """Mengembalikan (stasiun, skor) tetangga paling mirip, atau None."""
+        hasil = self.neighbors(stasiun, k=1)
+        return hasil[0] if hasil else None
+
+    def top_neighbor_table(self):
+        """Tabel tetangga teratas per stasiun (dipakai untuk lookup CF tervektorisasi)."""
+        if self.k == 0:
+            return (pd.Series(index=self.stations, dtype=object),
+                    pd.Series(index=self.stations, dtype=float))
+        top_names = pd.Series(self.stations[self.neighbor_ids[:, 0]], index=self.stations)
+        top_scores = pd.Series(self.neighbor_scores[:, 0], index=self.stations)
+        return top_names, top_scores
+
+
+def build_station_neighbor_index(sim_df, k=None):
+    """Membangun StationNeighborIndex dari sim_df; k=None menyimpan semua tetangga (S-1)."""
+    stations = sim_df.columns
+    n_stasiun = len(stations)
+    k_simpan = n_stasiun - 1 if k is None else max(0, min(k, n_stasiun - 1))
+
+    # Kolom ke-j berisi kesamaan semua stasiun terhadap stasiun j (sama seperti sim_df[target])
+    sim_asli = sim_df.reindex(index=stations).to_numpy(dtype=float)
+    sim_matrix = sim_asli.T.copy()
+    np.fill_diagonal(sim_matrix, -np.inf)
+
+    if k_simpan == 1:
+        neighbor_ids = sim_matrix.argmax(axis=1)[:, None]
+    elif 0 < k_simpan < n_stasiun - 1:
+        # Partisi dulu (O(S)) lalu urutkan hanya k kandidat teratas
+        kandidat = np.argpartition(-sim_matrix, k_simpan - 1, axis=1)[:, :k_simpan]
+        kandidat.sort(axis=1)
+        urutan = np.argsort(-np.take_along_axis(sim_matrix, kandidat, axis=1), axis=1, kind='stable')
+        neighbor_ids = np.take_along_axis(kandidat, urutan, axis=1)
+    else:
+        neighbor_ids = np.argsort(-sim_matrix, axis=1, kind='stable')[:, :k_simpan]
+
+    neighbor_ids = np.ascontiguousarray(neighbor_ids, dtype=np.int32)
+    # Skor diambil dari baris stasiun target (setara sim_df.loc[target, tetangga])
+    neighbor_scores = np.take_along_axis(sim_asli, neighbor_ids, axis=1)
+    return StationNeighborIndex(stations, neighbor_ids, neighbor_scores)
+
+
+def top_neighbor_from_similarity(sim_df, stasiun):
+    """Mencari tetangga paling mirip satu stasiun langsung dari sim_df dalam O(S), tanpa indeks."""
+    if stasiun not in sim_df.columns:
+        return None
+    kolom = sim_df[stasiun].drop(labels=stasiun, errors='ignore')
+    if kolom.empty:
+        return None
+    top_similar_stasiun = kolom.idxmax()
+    return top_similar_stasiun, sim_df.loc[stasiun, top_similar_stasiun]
+
+
+# --- C. MESIN KESAMAAN INKREMENTAL (UPDATE HARIAN O(S²)) ---
+class IncrementalStationSimilarity:
+    """Menyimpan dot product dan norma kuadrat antar stasiun sehingga data harian baru cukup diproses O(S²).
+
+    Hasil similarity_df() identik (hingga pembulatan floating point) dengan compute_station_similarity
+    pada seluruh data yang sudah dimasukkan, termasuk bila satu tanggal menerima bacaan susulan.
+    """
+
+    def __init__(self, polutan='pm25'):
+        self.polutan = polutan
+        self.stations = []
+        self._posisi = {}
+        self._dot = np.zeros((0, 0))
+        self._n_valid = np.zeros(0, dtype=np.int64)
+        # tanggal -> (jumlah, banyak bacaan) per stasiun, untuk menghitung ulang rata-rata pivot_table
+        self._per_tanggal = {}
+        # tanggal -> (banyak baris, jumlah hash baris) dari bacaan yang sudah dimasukkan, dipakai sync()
+        self._sidik = {}
+        self.last_date = None
+        self._lock = threading.Lock()
+
+    def _pastikan_stasiun(self, stasiun_baru):
+        """Menambah baris/kolom nol untuk stasiun yang belum pernah terlihat."""
+        baru = [s for s in stasiun_baru if s not in self._posisi]
+        if not baru:
+            return
+        for stasiun in baru:
+            self._posisi[stasiun] = len(self.stations)
+            self.stations.append(stasiun)
+        n = len(self.stations)
+        dot = np.zeros((n, n))
+        lama = self._dot.shape[0]
+        dot[:lama, :lama] = self._dot
+        self._dot = dot
+        self._n_valid = np.concatenate([self._n_valid, np.zeros(n - lama, dtype=np.int64)])
+
+    def _vektor_rata_rata(self, tanggal):
+        """Vektor nilai pivot (rata-rata harian, 0 bila kosong) untuk satu tanggal."""
+        vektor = np.zeros(len(self.stations))
+        isi = self._per_tanggal.get(tanggal)
+        if isi:
+            posisi = np.fromiter(isi.keys(), dtype=np.int64, count=len(isi))
+            jumlah_banyak = np.array(list(isi.values()), dtype=float)
+            vektor[posisi] = jumlah_banyak[:, 0] / jumlah_banyak[:, 1]
+        return vektor
+
+    def _siapkan(self, df):
+        data = df[['tanggal_lengkap', STATION_COL_NAME, self.polutan]].dropna()
+        return data.assign(tanggal_lengkap=pd.to_datetime(data['tanggal_lengkap']))
+
+    def _sidik_per_tanggal(self, data):
+        """(banyak baris, jumlah hash 32-bit baris) per tanggal; tidak bergantung urutan baris."""
+        kunci = pd.DataFrame({'stasiun': data[STATION_COL_NAME].astype(str),
+                              'nilai': data[self.polutan].astype(np.float64)})
+        hash_baris = (pd.util.hash_pandas_object(kunci, index=False).to_numpy() >> np.uint64(32)).astype(np.int64)
+        return pd.Series(hash_baris, index=data.index).groupby(data['tanggal_lengkap']).agg(['count', 'sum'])
+
+    def _terapkan(self, data, tanggal_unik, ganti=False):
+        """Menambahkan bacaan data ke tanggal_unik; ganti=True membuang dulu isi lama tanggal-tanggal tsb.
+
+        Kontribusi lama tanggal yang tersentuh dikurangkan dari dot product lalu kontribusi barunya
+        ditambahkan, sehingga biayanya O(D·S²) untuk D tanggal.
+        """
+        agregat = data.groupby(['tanggal_lengkap', STATION_COL_NAME], observed=True)[self.polutan].agg(['sum', 'count'])
+        sidik = self._sidik_per_tanggal(data)
+        self._pastikan_stasiun(sorted(agregat.index.get_level_values(1).unique()))
+        x_lama = np.vstack([self._vektor_rata_rata(t) for t in tanggal_unik])
+
+        if ganti:
+            for tanggal in tanggal_unik:
+                for posisi in self._per_tanggal.pop(tanggal, {}):
+                    self._n_valid[posisi] -= 1
+                self._sidik.pop(tanggal, None)
+
+        for (tanggal, stasiun), jumlah, banyak in zip(agregat.index, agregat['sum'], agregat['count']):
+            isi = self._per_tanggal.setdefault(tanggal, {})
+            posisi = self._posisi[stasiun]
+            if posisi not in isi:
+                self._n_valid[posisi] += 1
+                isi[posisi] = (jumlah, banyak)
+            else:
+                jumlah_lama, banyak_lama = isi[posisi]
+                isi[posisi] = (jumlah_lama + jumlah, banyak_lama + banyak)
+        for tanggal, banyak, jumlah_hash in zip(sidik.index, sidik['count'], sidik['sum']):
+            banyak_lama, hash_lama = self._sidik.get(tanggal, (0, 0))
+            self._sidik[tanggal] = (banyak_lama + int(banyak), hash_lama + int(jumlah_hash))
+
+        x_baru = np.vstack([self._vektor_rata_rata(t) for t in tanggal_unik])
+        # Kurangi kontribusi lama tanggal yang diperbarui, lalu tambahkan kontribusi barunya
+        self._dot += x_baru.T @ x_baru - x_lama.T @ x_lama
+        self.last_date = max(self._per_tanggal) if self._per_tanggal else None
+
+    def update(self, df_new):
+        """Memasukkan bacaan baru (satu hari atau lebih); biaya O(D·S²) untuk D tanggal baru."""
+        data = self._siapkan(df_new)
+        if data.empty:
+            return self
+        with self._lock:
+            self._terapkan(data, data['tanggal_lengkap'].unique())
+        return self
+
+    def sync(self, df):
+        """Menyamakan mesin dengan df: hanya tanggal yang isinya berbeda dari yang sudah dimasukkan diproses.
+
+        Setiap tanggal dibandingkan lewat sidik (banyak baris + jumlah hash baris). Tanggal baru, bacaan
+        susulan untuk tanggal lama, koreksi nilai, maupun tanggal yang hilang dari df (dataset diganti)
+        semuanya diganti isinya dengan isi df, tanpa menghitung ulang tanggal yang tidak berubah.
+        """
+        data = self._siapkan(df)
+        sidik_df = self._sidik_per_tanggal(data)
+        with self._lock:
+            sidik_lama = pd.DataFrame(list(self._sidik.values()), index=list(self._sidik.keys()),
+                                      columns=['count', 'sum'], dtype=np.int64)
+            gabung = sidik_df.join(sidik_lama, how='outer', rsuffix='_lama')
+            berubah = gabung.index[(gabung['count'] != gabung['count_lama']) | (gabung['sum'] != gabung['sum_lama'])]
+            if len(berubah):
+                self._terapkan(data[data['tanggal_lengkap'].isin(berubah)], berubah, ganti=True)
+        return self
+
+    def similarity_df(self):
+        """Matriks cosine similarity antar stasiun dalam format yang sama dengan compute_station_similarity."""
+        with self._lock:
+            valid = [s for s in sorted(self.stations) if self._n_valid[self._posisi[s]] > 0]
+            posisi = np.array([self._posisi[s] for s in valid], dtype=np.int64)
+            dot = self._dot[np.ix_(posisi, posisi)]
+        norma = np.sqrt(np.clip(np.diag(dot), 0, None))
+        # Sama seperti sklearn: norma nol dianggap 1 sehingga kesamaannya 0
+        norma[norma == 0] = 1.0
+        sim_matrix = dot / np.outer(norma, norma)
+        kolom = pd.Index(valid, name=STATION_COL_NAME)
+        return pd.DataFrame(sim_matrix, index=kolom, columns=kolom)
+
+
+def verify_incremental_similarity(df, polutan='pm25', n_hari_awal=30, atol=1e-9):
+    """Membandingkan hasil mesin inkremental (diisi hari demi hari) dengan hitung ulang penuh."""
+    tanggal = pd.to_datetime(df['tanggal_lengkap'])
+    hari_urut = np.sort(tanggal.dropna().unique())
+    engine = IncrementalStationSimilarity(polutan=polutan)
+    engine.update(df[tanggal <= hari_urut[min(n_hari_awal, len(hari_urut)) - 1]])
+    for hari in hari_urut[n_hari_awal:]:
+        engine.update(df[tanggal == hari])
+
+    full = compute_station_similarity(df, polutan=polutan)
+    inkremental = engine.similarity_df()
+    if not full.index.equals(inkremental.index):
+        return False, np.inf
+    selisih = float(np.abs(full.to_numpy() - inkremental.to_numpy()).max()) if len(full) else 0.0
+    return selisih <= atol, selisih
+
+
+# --- D. TENSOR KESAMAAN MULTI-POLUTAN (POLUTAN × STASIUN × STASIUN) ---
+class StationSimilarityTensor:
+    """Menyimpan matriks kesamaan semua polutan sekaligus beserta matriks gabungan berbobot."""
+
+    def __init__(self, polutan_cols, stations, tensor, valid, bobot):
+        self.polutan_cols = list(polutan_cols)
+        self.stations = stations          # pd.Index nama stasiun (urut)
+        self.tensor = tensor              # (P, S, S) cosine similarity per polutan
+        self.valid = valid                # (P, S) True jika stasiun punya data polutan tsb
+        self.bobot = np.asarray(bobot, dtype=float)
+        self.fused = self._gabungkan()
+
+    def _gabungkan(self):
+        """Rata-rata berbobot per pasangan stasiun, hanya atas polutan yang tersedia di keduanya."""
+        pasangan_valid = self.valid[:, :, None] & self.valid[:, None, :]
+        bobot = self.bobot[:, None, None] * pasangan_valid
+        total_bobot = bobot.sum(axis=0)
+        fused = (bobot * self.tensor).sum(axis=0)
+        return np.divide(fused, total_bobot, out=np.zeros_like(fused), where=total_bobot > 0)
+
+    def matrix(self, polutan):
+        """Matriks kesamaan satu polutan (format dan isi sama dengan compute_station_similarity)."""
+        p = self.polutan_cols.index(polutan)
+        mask = self.valid[p]
+        kolom = self.stations[mask]
+        return pd.DataFrame(self.tensor[p][np.ix_(mask, mask)], index=kolom, columns=kolom)
+
+    def fused_df(self):
+        """Matriks kesamaan gabungan semua polutan sebagai DataFrame (bisa dipakai sebagai sim_df)."""
+        return pd.DataFrame(self.fused, index=self.stations, columns=self.stations)
+
+    def neighbor_index(self, polutan=None, k=None):
+        """Indeks tetangga top-k untuk satu polutan, atau untuk matriks gabungan bila polutan=None."""
+        sim_df = self.fused_df() if polutan is None else self.matrix(polutan)
+        return build_station_neighbor_index(sim_df, k=k)
+
+    def top_neighbors(self, stasiun):
+        """Tetangga teratas stasiun untuk setiap polutan dan gabungan: {polutan/'gabungan': (stasiun, skor)}."""
+        hasil = {}
+        if stasiun not in self.stations:
+            return hasil
+        s = self.stations.get_loc(stasiun)
+        for p, polutan in enumerate(self.polutan_cols):
+            if not self.valid[p, s]:
+                continue
+            kandidat = self.valid[p].copy()
+            kandidat[s] = False
+            if kandidat.any():
+                baris = np.where(kandidat, self.tensor[p, s], -np.inf)
+                j = int(baris.argmax())
+                hasil[polutan] = (self.stations[j], self.tensor[p, s, j])
+        if len(self.stations) > 1:
+            baris = self.fused[s].copy()
+            baris[s] = -np.inf
+            j = int(baris.argmax())
+            hasil['gabungan'] = (self.stations[j], self.fused[s, j])
+        return hasil
+
+
+def compute_similarity_tensor(df, polutan_cols=None, bobot=None):
+    """Membangun StationSimilarityTensor dari satu array bertumpuk (T × P × S) dalam sekali jalan."""
+    polutan_cols = list(POLUTAN_COLS if polutan_cols is None else polutan_cols)
+    bobot = BOBOT_POLUTAN_CF if bobot is None else bobot
+    bobot = [bobot.get(polutan, 0.0) for polutan in polutan_cols]
+
+    df_pivot = df.pivot_table(
+        index='tanggal_lengkap',
+        columns=STATION_COL_NAME,
+        values=polutan_cols,
+        observed=True
+    )
+    stations = df_pivot.columns.get_level_values(1).unique().sort_values()
+    kolom_penuh = pd.MultiIndex.from_product([polutan_cols, stations])
+    valid = df_pivot.columns.to_series().reindex(kolom_penuh).notna().to_numpy()
+    df_pivot = df_pivot.reindex(columns=kolom_penuh).fillna(0)
+
+    n_tanggal, n_polutan, n_stasiun = len(df_pivot), len(polutan_cols), len(stations)
+    stacked = df_pivot.to_numpy(dtype=float).reshape(n_tanggal, n_polutan, n_stasiun).transpose(1, 0, 2)
+
+    # Satu batched matmul: (P, S, T) @ (P, T, S) -> (P, S, S)
+    dot = np.matmul(stacked.transpose(0, 2, 1), stacked)
+    norma = np.sqrt(np.einsum('pii->pi', dot))
+    norma[norma == 0] = 1.0
+    tensor = dot / (norma[:, :, None] * norma[:, None, :])
+
+    stations = pd.Index(stations, name=STATION_COL_NAME)
+    return StationSimilarityTensor(polutan_cols, stations, tensor,
+                                   valid.reshape(n_polutan, n_stasiun), bobot)
+
+
+if __name__ == '__main__':
+    df_data = pd.read_csv(FILE_ADVANCED)
+    df_data['tanggal_lengkap'] = pd.to_datetime(df_data['tanggal_lengkap'])
+    cocok, selisih = verify_incremental_similarity(df_data)
+    status = "✅ COCOK" if cocok else "❌ BERBEDA"
+    print(f"{status}: Selisih maksimum inkremental vs hitung ulang penuh = {selisih:.3e}")
@@ -0,0 +1,179 @@
+# streaming_features.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import POLUTAN_COLS, LAGS, WINDOWS, STATE_PATH, PRIMARY_KEY
+from station_encoder import get_station_encoder
+
+
+# --- A. STATE PER STASIUN: RING BUFFER + JUMLAH KUMULATIF ---
+class StationFeatureState:
+    """Ring buffer max(LAGS, WINDOWS) x polutan dengan jumlah kumulatif; setiap bacaan diproses dalam O(1).
+
+    Rata-rata bergulir dihitung seperti feature_kernel: selisih jumlah kumulatif (longdouble) dibagi jumlah
+    observasi. Titik awal jumlah kumulatif berbeda (per stasiun, bukan seluruh data), sehingga nilainya sama
+    dengan preprocessing.py hanya dalam toleransi floating point (beberapa ulp; verify_streaming_features
+    memakai atol=1e-9), bukan identik bit per bit.
+    """
+
+    def __init__(self, n_polutan=len(POLUTAN_COLS), lags=LAGS, windows=WINDOWS):
+        self.lags = tuple(lags)
+        self.windows = tuple(windows)
+        self.kapasitas = max(self.lags + self.windows, default=1)
+        self.buffer = np.zeros((self.kapasitas, n_polutan))
+        # Jumlah kumulatif tepat sebelum nilai di posisi buffer yang sama
+        self.kumulatif = np.zeros((self.kapasitas, n_polutan), dtype=np.longdouble)
+        self.jumlah = np.zeros(n_polutan, dtype=np.longdouble)
+        self.pos = 0
+        self.nobs = 0
+        # Nilai mentah terakhir yang tidak NaN (untuk forward fill) dan tanggal bacaan terakhir
+        self.ffill = np.full(n_polutan, np.nan)
+        self.tanggal_terakhir = None
+
+    def lag(self, k):
+        """Nilai terproses k bacaan sebelumnya (NaN bila belum ada)."""
+        if self.nobs < k:
+            return np.full(self.buffer.shape[1], np.nan)
+        return self.buffer[(self.pos - k) % self.kapasitas].copy()
+
+    def push(self, nilai):
+        """Memasukkan satu vektor nilai terproses; mengembalikan rata-rata bergulir tiap window termasuk nilai ini."""
+        self.buffer[self.pos] = nilai
+        self.kumulatif[self.pos] = self.jumlah
+        self.jumlah = self.jumlah + nilai
+        self.pos = (self.pos + 1) % self.kapasitas
+        self.nobs = min(self.nobs + 1, self.kapasitas)
+
+        rata = []
+        for w in self.windows:
+            n = min(w, self.nobs)
+            rata.append(((self.jumlah - self.kumulatif[(self.pos - n) % self.kapasitas]) / n).astype(np.float64))
+        return rata
+
+
+# --- B. STORE SEMUA STASIUN ---
+class StreamingFeatureStore:
+    """Mengubah bacaan sensor mentah menjadi baris fitur (layout ADVANCED) memakai statistik beku preprocessing."""
+
+    def __init__(self, state):
+        self.stats = state['stats']
+        self.kolom_ohe = list(state['kolom_ohe'])
+        self.kolom_output = [c for c in state['kolom_output']
+                             if c != 'kategori' and not c.startswith('kategori_')]
+        self._mean_isi = np.array([self.stats['mean_isi'][c] for c in POLUTAN_COLS])
+        self._batas_atas = np.array([self.stats['batas_atas'][c] for c in POLUTAN_COLS])
+        # Pengisi NaN Lag/Roll; kolom yang tidak ada di state lama dibiarkan NaN (baris itu dibuang saat build penuh)
+        mean_lag_roll = self.stats.get('mean_lag_roll', {})
+        self._mean_lag = {k: np.array([mean_lag_roll.get(f'{c}_lag{k}', np.nan) for c in POLUTAN_COLS])
+                          for k in LAGS}
+        self._mean_roll = {w: np.array([mean_lag_roll.get(f'{c}_roll{w}', np.nan) for c in POLUTAN_COLS])
+                           for w in WINDOWS}
+        self.stations = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_preprocessing_state(cls, state=None, seed_tail=True):
+        """Membuat store dari preprocessing_state.pkl; seed_tail=True mengisi buffer dari ekor data terakhir."""
+        if state is None:
+            import joblib
+            state = joblib.load(STATE_PATH)
+        store = cls(state)
+        if seed_tail:
+            for stasiun, ekor in state['ekor'].groupby('stasiun', sort=False):
+                st_state = store._state(stasiun)
+                for tanggal, nilai in zip(ekor['tanggal_lengkap'], ekor[POLUTAN_COLS].to_numpy(np.float64)):
+                    st_state.push(nilai)
+                    st_state.tanggal_terakhir = pd.Timestamp(tanggal)
+            for i, col in enumerate(POLUTAN_COLS):
+                for stasiun, nilai in state['ffill_terakhir'][col].items():
+                    store._state(stasiun).ffill[i] = nilai
+        return store
+
+    def _state(self, stasiun):
+        st_state = self.stations.get(stasiun)
+        if st_state is None:
+            st_state = self.stations[stasiun] = StationFeatureState()
+        return st_state
+
+    def update(self, stasiun, tanggal, reading):
+        """Memproses satu bacaan {polutan: nilai}; mengembalikan dict fitur, atau None bila kunci sudah ada."""
+        stasiun = get_station_encoder().canonical(stasiun)
+        tanggal = pd.Timestamp(tanggal)
+        if pd.isna(tanggal):
+            raise ValueError("Bacaan tanpa tanggal tidak bisa diproses secara streaming.")
+        mentah = np.array([reading.get(c, np.nan) for c in POLUTAN_COLS], dtype=np.float64)
+
+        with self._lock:
+            st_state = self._state(stasiun)
+            if st_state.tanggal_terakhir is not None:
+                if tanggal == st_state.tanggal_terakhir:
+                    # Kunci Primer sudah ada: sama seperti drop_duplicates(keep='first')
+                    return None
+                if tanggal < st_state.tanggal_terakhir:
+                    raise ValueError(f"Bacaan {stasiun} pada {tanggal} lebih lama dari bacaan terakhir.")
+
+            # Imputasi: ffill per stasiun -> mean global beku -> batas outlier beku
+            st_state.ffill = np.where(np.isnan(mentah), st_state.ffill, mentah)
+            nilai = np.where(np.isnan(st_state.ffill), self._mean_isi, st_state.ffill)
+            nilai = np.where(nilai > self._batas_atas, self._batas_atas, nilai)
+
+            lag = {k: st_state.lag(k) for k in LAGS}
+            lag = {k: np.where(np.isnan(v), self._mean_lag[k], v) for k, v in lag.items()}
+            roll = {w: np.where(np.isnan(v), self._mean_roll[w], v)
+                    for w, v in zip(WINDOWS, st_state.push(nilai))}
+            st_state.tanggal_terakhir = tanggal
+
+        fitur = {'stasiun': stasiun, 'tanggal_lengkap': tanggal}
+        fitur.update(zip(POLUTAN_COLS, nilai.tolist()))
+        fitur['jam'] = tanggal.hour
+        fitur['hari_dalam_minggu'] = tanggal.dayofweek # Senin=0, Minggu=6
+        fitur['nomor_bulan'] = tanggal.month
+        fitur['musim'] = (tanggal.month % 12 + 3) // 3
+        for i, col in enumerate(POLUTAN_COLS):
+            for k in LAGS:
+                fitur[f'{col}_lag{k}'] = float(lag[k][i])
+            for w in WINDOWS:
+                fitur[f'{col}_roll{w}'] = float(roll[w][i])
+        for kolom in self.kolom_ohe:
+            if kolom.startswith('stasiun_'):
+                fitur[kolom] = kolom == f'stasiun_{stasiun}'
+        return fitur
+
+    def to_frame(self, daftar_fitur):
+        """Menyusun dict hasil update() menjadi DataFrame berurutan seperti dataset ADVANCED (siap ke scorer)."""
+        return pd.DataFrame([f for f in daftar_fitur if f is not None]).reindex(columns=self.kolom_output)
+
+
+def verify_streaming_features(file_data=None, atol=1e-9):
+    """Memutar ulang seluruh data gabungan lewat store streaming dan membandingkan dengan build_feature_store.
+
+    Toleransi default mengikuti feature_kernel (jumlah kumulatif), yang berbeda beberapa ulp dari rolling pandas.
+    """
+    import preprocessing
+
+    df_raw = pd.read_csv(file_data or preprocessing.FILE_DATA)
+    df_penuh, state = preprocessing.build_feature_store(df_raw.copy())
+
+    df_urut = preprocessing.bersihkan_data_gabungan(df_raw.copy())
+    df_urut = df_urut[df_urut['tanggal_lengkap'].notna()]
+    store = StreamingFeatureStore(state)
+    hasil = [store.update(row['stasiun'], row['tanggal_lengkap'], row)
+             for row in df_urut[['stasiun', 'tanggal_lengkap'] + POLUTAN_COLS].to_dict('records')]
+    df_stream = store.to_frame(hasil)
+
+    # Hanya baris yang lolos dropna di preprocessing yang dibandingkan
+    kanan = df_penuh[store.kolom_output].set_index(PRIMARY_KEY)
+    kiri = df_stream.set_index(PRIMARY_KEY).loc[kanan.index]
+    kolom_angka = [c for c in kanan.columns if pd.api.types.is_numeric_dtype(kanan[c]) and kanan[c].dtype != bool]
+    selisih = float(np.abs(kiri[kolom_angka].to_numpy(float) - kanan[kolom_angka].to_numpy(float)).max())
+    ohe_sama = (kiri.drop(columns=kolom_angka).to_numpy() == kanan.drop(columns=kolom_angka).to_numpy()).all()
+    cocok = bool(ohe_sama) and selisih <= atol
+    print(f"{'✅ COCOK' if cocok else '❌ TIDAK COCOK'}: {len(kanan)} baris, selisih maks {selisih:.3e}")
+    return cocok
+
+
+if __name__ == '__main__':
+    verify_streaming_features()
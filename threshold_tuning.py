@@ -0,0 +1,287 @@
+# threshold_tuning.py — Tuning threshold & hyperparameter model CBF
+#
+# Jalankan:   python threshold_tuning.py                       (grid C x class_weight + threshold global)
+#             python threshold_tuning.py --per-station         (tambahkan threshold per stasiun)
+#             python threshold_tuning.py --min-precision 0.6   (F1 terbaik di antara threshold dengan precision >= 0.6)
+#             python threshold_tuning.py --refit               (latih ulang aset .pkl dengan parameter terbaik)
+#             python threshold_tuning.py --verify              (bandingkan sapuan dengan precision_recall_curve)
+#
+# Sapuan threshold menghitung precision/recall/F1 untuk SEMUA nilai probabilitas unik dalam satu kali
+# pengurutan (O(n log n)). Grid C x class_weight dievaluasi dengan stratified K-fold di process pool;
+# threshold dipilih dari probabilitas out-of-fold lalu ditulis ke THRESHOLD_CONFIG_PATH yang dibaca
+# recommender_core.
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+import preprocessing
+from config import THRESHOLD_CONFIG_PATH, OPTIMAL_THRESHOLD
+from preprocessing import MODEL_CBF_PATH, SCALER_PATH, FITUR_LIST_PATH
+
+GRID_C = (0.01, 0.1, 1.0, 10.0, 100.0)
+GRID_CLASS_WEIGHT = ('balanced', None)
+N_FOLD = 5
+MIN_BARIS_STASIUN = 200
+
+
+# --- A. SAPUAN THRESHOLD O(n log n) ---
+def threshold_sweep(y_true, proba):
+    """Precision, recall, F1 untuk setiap probabilitas unik sebagai threshold (prediksi positif: proba >= t).
+
+    Satu argsort menurun, lalu TP/FP kumulatif diambil pada posisi terakhir setiap nilai unik.
+    Baris terurut dari threshold tertinggi ke terendah.
+    """
+    y = np.asarray(y_true, dtype=bool)
+    p = np.asarray(proba, dtype=np.float64)
+    urutan = np.argsort(-p, kind='mergesort')
+    p_urut, y_urut = p[urutan], y[urutan]
+    akhir = np.r_[np.flatnonzero(np.diff(p_urut)), len(p_urut) - 1] if len(p_urut) else np.array([], dtype=int)
+    tp = np.cumsum(y_urut)[akhir]
+    fp = np.cumsum(~y_urut)[akhir]
+    n_positif = int(y.sum())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = tp / n_positif if n_positif else np.zeros(len(tp))
+        f1 = np.where(tp + fp + n_positif > 0, 2 * tp / (tp + fp + n_positif), 0.0)
+    return pd.DataFrame({
+        'threshold': p_urut[akhir], 'tp': tp, 'fp': fp, 'fn': n_positif - tp,
+        'precision': precision, 'recall': recall, 'f1': f1,
+    })
+
+
+def pilih_threshold(sweep, min_precision=None):
+    """Baris sapuan dengan F1 tertinggi (opsional hanya di antara threshold dengan precision >= min_precision)."""
+    kandidat = sweep
+    if min_precision is not None:
+        memenuhi = sweep[sweep['precision'] >= min_precision]
+        kandidat = memenuhi if not memenuhi.empty else sweep
+    return kandidat.loc[kandidat['f1'].idxmax()].to_dict()
+
+
+def verify_threshold_sweep(n=20_000, seed=0):
+    """Sapuan harus sama dengan sklearn.metrics.precision_recall_curve (termasuk probabilitas kembar)."""
+    from sklearn.metrics import precision_recall_curve
+
+    rng = np.random.default_rng(seed)
+    y = rng.random(n) < 0.2
+    proba = np.round(np.clip(rng.normal(0.3 + 0.4 * y, 0.2), 0, 1), 3)
+    sweep = threshold_sweep(y, proba).iloc[::-1]
+    precision, recall, thresholds = precision_recall_curve(y, proba)
+    sama = (np.allclose(sweep['threshold'], thresholds) and np.allclose(sweep['precision'], precision[:-1])
+            and np.allclose(sweep['recall'], recall[:-1]))
+    print(f"{'✅' if sama else '❌'} Sapuan threshold {'identik' if sama else 'BERBEDA'} "
+          f"dengan precision_recall_curve ({len(sweep)} threshold unik dari {n} baris).")
+    return sama
+
+
+# --- B. GRID C x class_weight (CROSS-VALIDATION PARALEL) ---
+_DATA_WORKER = {}
+
+
+def _init_worker(X, y, n_fold, paths=None):
+    """X & y dikirim sekali per proses worker (atau dibuka memmap dari paths), bukan sekali per kandidat."""
+    if paths is not None:
+        X, y = np.load(paths['X'], mmap_mode='r'), np.load(paths['y'], mmap_mode='r')
+    _DATA_WORKER.update(X=X, y=y, n_fold=n_fold)
+
+
+def _cv_kandidat(param):
+    """Probabilitas out-of-fold dan AUC per fold untuk satu pasangan (C, class_weight)."""
+    C, class_weight = param
+    X, y = _DATA_WORKER['X'], _DATA_WORKER['y']
+    oof = np.zeros(len(y))
+    auc_fold = []
+    for idx_latih, idx_uji in StratifiedKFold(_DATA_WORKER['n_fold'], shuffle=True, random_state=42).split(X, y):
+        scaler = StandardScaler().fit(X[idx_latih])
+        model = preprocessing.buat_model_cbf(C=C, class_weight=class_weight)
+        model.fit(scaler.transform(X[idx_latih]), y[idx_latih])
+        oof[idx_uji] = model.predict_proba(scaler.transform(X[idx_uji]))[:, 1]
+        auc_fold.append(roc_auc_score(y[idx_uji], oof[idx_uji]))
+    return param, oof, auc_fold
+
+
+def grid_search_cv(X, y, grid_C=GRID_C, grid_class_weight=GRID_CLASS_WEIGHT, n_fold=N_FOLD,
+                   min_precision=None, max_workers=None, paths=None):
+    """Mengevaluasi semua kandidat di process pool; mengembalikan (tabel, {(C, nama class_weight): proba OOF}).
+
+    paths = {'X': .npy, 'y': .npy} (mis. eval_matrix) membuat worker membuka X & y via memmap alih-alih
+    menerima salinan hasil pickle.
+    """
+    y = np.asarray(y, dtype=bool)
+    if paths is None:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+    params = [(C, cw) for C in grid_C for cw in grid_class_weight]
+    data_worker = (X, y, n_fold) if paths is None else (None, None, n_fold, paths)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=data_worker) as executor:
+        hasil = list(executor.map(_cv_kandidat, params))
+
+    baris, oof_per_param = [], {}
+    for param, oof, auc_fold in hasil:
+        terbaik = pilih_threshold(threshold_sweep(y, oof), min_precision)
+        oof_per_param[_kunci(param)] = oof
+        baris.append({
+            'C': param[0], 'class_weight': _nama_class_weight(param[1]),
+            'auc_mean': float(np.mean(auc_fold)), 'auc_std': float(np.std(auc_fold)),
+            'threshold': terbaik['threshold'], 'precision': terbaik['precision'],
+            'recall': terbaik['recall'], 'f1': terbaik['f1'],
+        })
+    tabel = pd.DataFrame(baris).sort_values(['f1', 'auc_mean'], ascending=False, ignore_index=True)
+    return tabel, oof_per_param
+
+
+def parameter_model(model):
+    """(C, class_weight) model CBF aktif; model SGD hasil pembaruan inkremental versi lama membawa C_ & class_weight_."""
+    if hasattr(model, 'C_'):
+        print(f"⚠️ Model aktif adalah model SGD hasil pembaruan inkremental; grid memakai padanan "
+              f"LogisticRegression(C={model.C_}, class_weight={_nama_class_weight(model.class_weight_)}).")
+        return model.C_, model.class_weight_
+    if not hasattr(model, 'C'):
+        # SGDClassifier tersimpan sebelum C_ dicatat: dilatih dengan C=1 & bobot seimbang
+        print("⚠️ Model aktif tidak menyimpan C; diasumsikan C=1.0, class_weight=balanced.")
+        return 1.0, 'balanced'
+    return model.C, model.class_weight
+
+
+def _kunci(param):
+    return float(param[0]), _nama_class_weight(param[1])
+
+
+def _nama_class_weight(class_weight):
+    return 'none' if class_weight is None else (class_weight if isinstance(class_weight, str) else repr(class_weight))
+
+
+def _parse_class_weight(teks):
+    """'balanced' | 'none' | '<bobot kelas positif>' (mis. '3' -> {0: 1, 1: 3})."""
+    if teks.lower() == 'none':
+        return None
+    if teks == 'balanced':
+        return teks
+    return {0: 1.0, 1: float(teks)}
+
+
+# --- C. THRESHOLD PER STASIUN ---
+def per_station_thresholds(y, oof, stasiun, min_precision=None, min_baris=MIN_BARIS_STASIUN):
+    """Threshold F1 terbaik per stasiun dari probabilitas OOF; stasiun dengan data sedikit memakai threshold global."""
+    y = np.asarray(y, dtype=bool)
+    stasiun = pd.Series(stasiun).to_numpy(dtype=object)
+    hasil = {}
+    for nama in pd.unique(stasiun):
+        masker = stasiun == nama
+        if masker.sum() < min_baris or y[masker].all() or not y[masker].any():
+            continue
+        hasil[nama] = pilih_threshold(threshold_sweep(y[masker], oof[masker]), min_precision)
+    return hasil
+
+
+# --- D. ORKESTRASI & ARTEFAK ---
+def simpan_threshold_config(cfg, path=THRESHOLD_CONFIG_PATH):
+    """Menulis artefak threshold secara atomik (file sementara lalu os.replace)."""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cfg, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def tune(grid_C=GRID_C, grid_class_weight=GRID_CLASS_WEIGHT, n_fold=N_FOLD, min_precision=None,
+         per_station=False, refit=False, max_workers=None, simpan=True):
+    """Grid CV -> threshold dari proba OOF -> threshold_config.json (opsional: latih ulang aset .pkl)."""
+    from eval_matrix import open_eval_matrix
+
+    mulai = time.perf_counter()
+    # X sudah terskala oleh scaler aktif; StandardScaler per fold tetap dilatih ulang (hasilnya sama dengan X mentah)
+    eval_data = open_eval_matrix()
+    X, y, fitur_list = eval_data.X, np.asarray(eval_data.y), eval_data.fitur_list
+
+    # Parameter model yang sedang dipakai selalu ikut dievaluasi agar threshold-nya sesuai dengan model aktif
+    model_aktif = joblib.load(MODEL_CBF_PATH)
+    param_aktif = parameter_model(model_aktif)
+    grid_C = sorted(set(grid_C) | {param_aktif[0]})
+    grid_class_weight = list(grid_class_weight) + [cw for cw in [param_aktif[1]] if cw not in grid_class_weight]
+
+    tabel, oof_per_param = grid_search_cv(X, y, grid_C, grid_class_weight, n_fold, min_precision, max_workers,
+                                          paths=eval_data.paths)
+    terbaik = tabel.iloc[0]
+    param_terbaik = next(p for p in ((C, cw) for C in grid_C for cw in grid_class_weight)
+                         if _kunci(p) == (terbaik['C'], terbaik['class_weight']))
+
+    print(f"--- 🔎 GRID C x class_weight ({n_fold}-fold, {len(tabel)} kandidat) ---")
+    print(tabel.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if refit:
+        from data_store import read_advanced_dataset
+
+        # Scaler baru harus dilatih pada fitur mentah, bukan pada matriks yang sudah terskala
+        _, X_mentah, _ = preprocessing.fitur_dan_target(read_advanced_dataset(), fitur_list)
+        scaler = StandardScaler()
+        model = preprocessing.buat_model_cbf(C=param_terbaik[0], class_weight=param_terbaik[1])
+        model.fit(scaler.fit_transform(X_mentah.astype(np.float64)), y)
+        model.jumlah_per_kelas_ = preprocessing.jumlah_per_kelas(y)
+        if simpan:
+            joblib.dump(model, MODEL_CBF_PATH)
+            joblib.dump(scaler, SCALER_PATH)
+            joblib.dump(fitur_list, FITUR_LIST_PATH)
+        print(f"✅ Aset model dilatih ulang dengan C={param_terbaik[0]}, "
+              f"class_weight={_nama_class_weight(param_terbaik[1])}.")
+        param_dipakai = param_terbaik
+    else:
+        param_dipakai = param_aktif
+        if _kunci(param_aktif) != _kunci(param_terbaik):
+            print(f"⚠️ Parameter terbaik (C={param_terbaik[0]}, class_weight={_nama_class_weight(param_terbaik[1])}) "
+                  f"berbeda dari model aktif; jalankan dengan --refit untuk memakainya.")
+
+    oof = oof_per_param[_kunci(param_dipakai)]
+    sweep = threshold_sweep(y, oof)
+    global_terbaik = pilih_threshold(sweep, min_precision)
+    cfg = {
+        'threshold': round(float(global_terbaik['threshold']), 6),
+        'per_stasiun': {},
+        'model': {'C': float(param_dipakai[0]), 'class_weight': _nama_class_weight(param_dipakai[1])},
+        'kriteria': {'metrik': 'f1', 'min_precision': min_precision, 'n_fold': n_fold},
+        'metrik_oof': {k: round(float(global_terbaik[k]), 4) for k in ('precision', 'recall', 'f1')},
+        'threshold_sebelumnya': OPTIMAL_THRESHOLD,
+        'dibuat_pada': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if per_station:
+        per = per_station_thresholds(y, oof, np.asarray(eval_data.nama_stasiun)[eval_data.stasiun], min_precision)
+        cfg['per_stasiun'] = {nama: round(float(r['threshold']), 6) for nama, r in per.items()}
+        print("\n--- 📍 THRESHOLD PER STASIUN (proba OOF) ---")
+        for nama, r in per.items():
+            print(f"{nama:<32} t={r['threshold']:.4f}  precision={r['precision']:.3f}  "
+                  f"recall={r['recall']:.3f}  f1={r['f1']:.3f}")
+
+    if simpan:
+        simpan_threshold_config(cfg)
+    print(f"\n✅ Threshold global {cfg['threshold']:.4f} (F1 OOF {cfg['metrik_oof']['f1']:.4f}, "
+          f"{len(sweep)} threshold unik dievaluasi) -> '{THRESHOLD_CONFIG_PATH}'.")
+    print(f"Total waktu: {time.perf_counter() - mulai:.2f} detik")
+    return cfg, tabel
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tuning threshold & hyperparameter model CBF Atmosfera-X")
+    parser.add_argument('--C', type=float, nargs='+', default=list(GRID_C), help="Grid kekuatan regularisasi")
+    parser.add_argument('--class-weight', nargs='+', default=[_nama_class_weight(cw) for cw in GRID_CLASS_WEIGHT],
+                        help="'balanced', 'none', atau bobot kelas positif (mis. 3)")
+    parser.add_argument('--folds', type=int, default=N_FOLD)
+    parser.add_argument('--min-precision', type=float, default=None)
+    parser.add_argument('--per-station', action='store_true', help="Simpan juga threshold per stasiun")
+    parser.add_argument('--refit', action='store_true', help="Latih ulang aset .pkl dengan parameter terbaik")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+    if args.verify:
+        verify_threshold_sweep()
+    else:
+        tune(grid_C=args.C, grid_class_weight=[_parse_class_weight(cw) for cw in args.class_weight],
+             n_fold=args.folds, min_precision=args.min_precision, per_station=args.per_station,
+             refit=args.refit, max_workers=args.workers)
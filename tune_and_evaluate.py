@@ -1,40 +1,31 @@
+import sys
+
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import train_test_split
-import pandas as pd
 import numpy as np
 import joblib
 
+from config import read_threshold_config
+from eval_matrix import open_eval_matrix, test_split
+
 # --- 1. KONFIGURASI DAN MUAT ASET ---
-FILE_ADVANCED = 'data_ispu_preprocess_final_ADVANCED.csv'
 MODEL_CBF_PATH = 'model_cbf_rekomendasi.pkl'
-SCALER_PATH = 'scaler_rekomendasi.pkl'
-FITUR_LIST_PATH = 'fitur_list.pkl'
 
 # --- PARAMETER TUNING ---
 # Ambang Batas Prediksi Baru (Default adalah 0.5)
-# Kita naikkan untuk mengurangi False Positives (Alarm Palsu)
-NEW_THRESHOLD = 0.70 
+# Diambil dari artefak threshold_tuning.py (cadangan: config.OPTIMAL_THRESHOLD = 0.70)
+NEW_THRESHOLD, _ = read_threshold_config()
 
 try:
-    df_clean = pd.read_csv(FILE_ADVANCED)
+    eval_data = open_eval_matrix()
     cbf_model = joblib.load(MODEL_CBF_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    fitur_list = joblib.load(FITUR_LIST_PATH)
 except FileNotFoundError as e:
     print(f"❌ ERROR: Aset tidak ditemukan. Pastikan semua file (.csv, .pkl) sudah dibuat.")
     print(f"Detail: {e}")
-    exit()
+    sys.exit(1)
 
 # --- 2. PERSIAPAN DATA UJI ---
-# Definisikan X dan Y (sesuai yang digunakan saat pelatihan)
-X = df_clean[fitur_list].fillna(df_clean[fitur_list].mean())
-Y = df_clean['kategori_TIDAK SEHAT'] 
-
-# Scaling dan Pembagian Data Uji (Wajib random_state=42 yang sama)
-X_scaled = scaler.transform(X)
-X_train, X_test, Y_train, Y_test = train_test_split(
-    X_scaled, Y, test_size=0.2, random_state=42
-)
+# X terskala & Y dari matriks evaluasi bersama; pembagian data uji wajib random_state=42 yang sama
+X_test, Y_test = test_split(eval_data)
 
 # --- 3. EVALUASI DAN TUNING MODEL ---
 print("--- 🛠️ EVALUASI SETELAH PENYESUAIAN THRESHOLD ---")